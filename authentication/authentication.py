@@ -0,0 +1,57 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import get_principal
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user through the principal cache
+    instead of fetching the User row (and its profiles) on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_principal(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+def get_user_from_access_token(token):
+    """
+    Validate a raw access token string and return the cached principal.
+
+    Used by the WebSocket middleware and consumers. Returns None for invalid
+    or expired tokens, unknown users and inactive users.
+    """
+    try:
+        access_token = AccessToken(token)
+        user_id = access_token[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+    user = get_principal(user_id)
+    if user is None or not user.is_active:
+        return None
+    return user
@@ -0,0 +1,69 @@
+"""
+Principal cache for authenticated users.
+
+Resolves a user id (taken from a validated JWT) to a User instance with the
+role-scoping relations (doctor_profile, patient_profile, administered_clinic)
+already attached, so authentication and role checks cost zero queries on the
+hot path. Entries are invalidated by the signals in authentication/signals.py
+and otherwise expire after a short TTL.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_PREFIX = 'auth:principal:'
+PRINCIPAL_CACHE_TTL = getattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 60)
+
+# Reverse one-to-one relations used by views and consumers for role scoping.
+# select_related caches them (or their absence) on the instance, so later
+# hasattr(user, 'doctor_profile') style checks do not hit the database.
+PRINCIPAL_RELATIONS = ('doctor_profile', 'patient_profile', 'administered_clinic')
+
+
+def _principal_cache_key(user_id):
+    return f"{PRINCIPAL_CACHE_PREFIX}{user_id}"
+
+
+def load_principal(user_id):
+    """Load a user and its role-scoping relations from the database"""
+    User = get_user_model()
+    return User.objects.select_related(*PRINCIPAL_RELATIONS).get(id=user_id)
+
+
+def get_principal(user_id):
+    """
+    Return the cached principal for ``user_id``, loading it on a miss.
+
+    Returns None if the user does not exist.
+    """
+    key = _principal_cache_key(user_id)
+    user = cache.get(key)
+    if user is not None:
+        return user
+
+    User = get_user_model()
+    try:
+        user = load_principal(user_id)
+    except User.DoesNotExist:
+        return None
+
+    try:
+        cache.set(key, user, PRINCIPAL_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Could not cache principal for user {user_id}: {e}")
+    return user
+
+
+def invalidate_principal(user_id):
+    """Drop the cached principal for ``user_id``"""
+    if not user_id:
+        return
+    try:
+        cache.delete(_principal_cache_key(user_id))
+    except Exception as e:
+        logger.warning(f"Could not invalidate principal for user {user_id}: {e}")
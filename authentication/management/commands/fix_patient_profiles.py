@@ -3,6 +3,7 @@ from django.core.management.base import BaseCommand
 from authentication.models import User
 from patients.models import PatientProfile
 from django.utils import timezone
+from utils.response_cache import bump_model_version
 
 class Command(BaseCommand):
     help = 'Fix incomplete patient accounts by creating missing PatientProfiles'
@@ -78,6 +79,9 @@ class Command(BaseCommand):
         )
         
         deactivated_count = incomplete_patients.update(is_active=False)
+        if deactivated_count:
+            # update() skips post_save
+            bump_model_version(User)
         
         self.stdout.write(
             self.style.SUCCESS(f"Deactivated {deactivated_count} incomplete patient accounts")
@@ -0,0 +1,37 @@
+import signal
+import socket
+
+from django.core.management.base import BaseCommand
+
+from authentication.otp_service import process_otp_jobs
+
+
+class Command(BaseCommand):
+    help = 'Send queued OTP SMS and record OTP use (run one or more alongside the web workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--name',
+            default=socket.gethostname(),
+            help='Worker name (default: host name); give each worker on a host its own. '
+                 'A restarted worker with the same name resumes its unfinished jobs'
+        )
+        parser.add_argument(
+            '--block',
+            type=int,
+            default=5,
+            help='Seconds to wait for a job before checking for shutdown'
+        )
+
+    def handle(self, *args, **options):
+        stopping = []
+
+        def request_stop(signum, frame):
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.stdout.write(f"OTP delivery worker {options['name']} started")
+        process_otp_jobs(options['name'], block_seconds=options['block'], stop=lambda: bool(stopping))
+        self.stdout.write(self.style.SUCCESS(f"OTP delivery worker {options['name']} stopped"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_alter_user_blood_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP derivatives of profile_picture'),
+        ),
+    ]
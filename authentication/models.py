@@ -61,6 +61,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     date_of_birth = models.DateField(blank=True, null=True)
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP derivatives of profile_picture")
     
     # Address fields
     street = models.CharField(max_length=255, blank=True)
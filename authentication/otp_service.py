@@ -0,0 +1,347 @@
+"""
+OTP delivery subsystem.
+
+- Sliding-window rate limits per phone and per client IP, kept in Redis
+  (sorted sets) with a process-local cache fallback when Redis is down.
+- A durable job queue (a Redis list) drained by ``manage.py
+  otp_delivery_worker``: SMS sends and OTP audit writes never run in the
+  request. A job stays in the worker's processing list until it is done, so
+  a restarted worker picks up what it was handling.
+- Issued OTP hashes and verify attempt counters are kept in the same Redis,
+  shared by every worker. Redis decides validity: a code is accepted when an
+  atomic compare-and-swap consumes it, and the otps row is marked used from
+  the queue. Only when Redis is unavailable (or holds nothing for the phone)
+  does verification fall back to a conditional UPDATE of the row.
+"""
+
+import hmac
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+OTP_TTL_SECONDS = 300
+OTP_MAX_VERIFY_ATTEMPTS = getattr(settings, 'OTP_MAX_VERIFY_ATTEMPTS', 5)
+
+# (limit, window_seconds) pairs; every pair must pass for a send to go out
+OTP_RATE_LIMITS = getattr(settings, 'OTP_RATE_LIMITS', {
+    'phone': [(1, 30), (5, 900)],
+    'ip': [(20, 3600)],
+})
+
+OTP_DELIVERY_MAX_ATTEMPTS = getattr(settings, 'OTP_DELIVERY_MAX_ATTEMPTS', 3)
+
+_REDIS_RETRY_SECONDS = 30
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an OTP send exceeds a sliding-window limit"""
+
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        self.retry_after = max(1, int(retry_after))
+        super().__init__(f"OTP rate limit exceeded for {scope}, retry after {self.retry_after}s")
+
+
+# ---------------------------------------------------------------------------
+# Sliding-window rate limiting
+# ---------------------------------------------------------------------------
+
+_redis_client = None
+_redis_down_until = 0.0
+_redis_lock = threading.Lock()
+
+
+def _connect_redis(socket_timeout):
+    import redis
+    return redis.Redis.from_url(
+        getattr(settings, 'OTP_REDIS_URL', 'redis://localhost:6379/0'),
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=0.5,
+    )
+
+
+def _get_redis():
+    """Return a shared Redis client, or None while Redis is unavailable"""
+    global _redis_client
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = _connect_redis(socket_timeout=0.5)
+    return _redis_client
+
+
+def _mark_redis_down(error):
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+    logger.warning(f"OTP Redis unavailable, falling back to local cache/database: {error}")
+
+
+class SlidingWindowRateLimiter:
+    """Allow at most ``limit`` hits per ``window`` seconds for an identifier"""
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _key(self, identifier):
+        return f"otp:rl:{self.scope}:{self.window}:{identifier}"
+
+    def hit(self, identifier):
+        """Record a hit; return 0 if allowed, else seconds until retry"""
+        client = _get_redis()
+        if client is not None:
+            try:
+                return self._hit_redis(client, identifier)
+            except Exception as e:
+                _mark_redis_down(e)
+        return self._hit_cache(identifier)
+
+    def _hit_redis(self, client, identifier):
+        key = self._key(identifier)
+        now = time.time()
+        member = f"{now}:{uuid.uuid4().hex[:8]}"
+        pipe = client.pipeline()
+        pipe.zremrangebyscore(key, 0, now - self.window)
+        pipe.zadd(key, {member: now})
+        pipe.zcard(key)
+        pipe.zrange(key, 0, 0, withscores=True)
+        pipe.expire(key, self.window)
+        _, _, count, oldest, _ = pipe.execute()
+        if count <= self.limit:
+            return 0
+        # Rejected attempts do not consume the window
+        client.zrem(key, member)
+        oldest_ts = oldest[0][1] if oldest else now
+        return oldest_ts + self.window - now
+
+    def _hit_cache(self, identifier):
+        key = self._key(identifier)
+        now = time.time()
+        hits = [ts for ts in cache.get(key, []) if ts > now - self.window]
+        if len(hits) >= self.limit:
+            return hits[0] + self.window - now
+        hits.append(now)
+        cache.set(key, hits, self.window)
+        return 0
+
+
+def check_send_rate_limits(phone, ip_address=None):
+    """Raise RateLimitExceeded if this phone/IP may not request another OTP"""
+    identifiers = {'phone': phone, 'ip': ip_address}
+    for scope, limits in OTP_RATE_LIMITS.items():
+        identifier = identifiers.get(scope)
+        if not identifier:
+            continue
+        for limit, window in limits:
+            retry_after = SlidingWindowRateLimiter(scope, limit, window).hit(identifier)
+            if retry_after:
+                raise RateLimitExceeded(scope, retry_after)
+
+
+# ---------------------------------------------------------------------------
+# Shared OTP verification state
+# ---------------------------------------------------------------------------
+
+# Consumes the issued hash only if it is still the one being verified, so a
+# code superseded by a resend can't consume the new one. The key is kept as
+# a tombstone until it expires: without it, a replay would find nothing in
+# Redis and fall back to the row, which the queue may not have marked yet.
+_CONSUME_OTP_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+local ttl = redis.call('pttl', KEYS[1])
+if ttl > 0 then
+    redis.call('set', KEYS[1], ARGV[2], 'PX', ttl)
+else
+    redis.call('del', KEYS[1])
+end
+return 1
+"""
+
+_CONSUMED_MARKER = 'used'
+
+
+def _otp_key(phone, purpose):
+    return f"otp:code:{purpose}:{phone}"
+
+
+def _attempts_key(phone, purpose):
+    return f"otp:attempts:{purpose}:{phone}"
+
+
+def cache_issued_otp(phone, purpose, otp_hash, ttl=OTP_TTL_SECONDS):
+    """Store the hash of a freshly issued OTP in Redis, replacing any previous one"""
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline()
+        pipe.set(_otp_key(phone, purpose), otp_hash, ex=ttl)
+        pipe.delete(_attempts_key(phone, purpose))
+        pipe.execute()
+    except Exception as e:
+        _mark_redis_down(e)
+
+
+def verify_cached_otp(phone, purpose, otp_hash):
+    """
+    Check an OTP hash against the shared Redis state.
+
+    Returns True (matches the latest issued code, now consumed), False
+    (wrong, superseded, already used or too many attempts) or None when
+    Redis has nothing for this phone or is unavailable and the caller should
+    fall back to the database. Attempts are counted across all workers.
+    """
+    client = _get_redis()
+    if client is None:
+        return None
+
+    key = _otp_key(phone, purpose)
+    attempts_key = _attempts_key(phone, purpose)
+    try:
+        pipe = client.pipeline()
+        pipe.get(key)
+        pipe.incr(attempts_key)
+        pipe.expire(attempts_key, OTP_TTL_SECONDS)
+        expected, attempts, _ = pipe.execute()
+        if expected is None:
+            return None
+        if attempts > OTP_MAX_VERIFY_ATTEMPTS:
+            client.delete(key)
+            return False
+        if not hmac.compare_digest(expected.decode('utf-8'), otp_hash):
+            return False
+        # Single use: only the request that actually removes the key wins
+        if not client.eval(_CONSUME_OTP_SCRIPT, 1, key, otp_hash, _CONSUMED_MARKER):
+            return False
+        client.delete(attempts_key)
+        return True
+    except Exception as e:
+        _mark_redis_down(e)
+        return None
+
+
+def mark_otp_used(phone, purpose, otp_hash):
+    """
+    Consume the unexpired OTP row for this code; the fallback when Redis
+    can't decide. The conditional UPDATE returns False when the row was
+    already used, superseded or expired.
+    """
+    from .models import OTP
+
+    return OTP.objects.filter(
+        phone=phone, purpose=purpose, otp=otp_hash, is_used=False, expires_at__gt=timezone.now()
+    ).update(is_used=True) > 0
+
+
+def deliver_otp(phone, otp_code, purpose='login'):
+    """Send an OTP SMS through the pooled provider session"""
+    from .utils import send_otp_sms
+
+    if not send_otp_sms(phone, otp_code, purpose):
+        logger.error(f"OTP delivery to {phone} failed")
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Durable job queue
+# ---------------------------------------------------------------------------
+
+OTP_JOB_QUEUE_KEY = 'otp:jobs'
+
+
+def _processing_key(worker_name):
+    return f"otp:jobs:processing:{worker_name}"
+
+
+def _enqueue(job):
+    """Push a job onto the shared queue; False when Redis is unavailable"""
+    client = _get_redis()
+    if client is None:
+        return False
+    try:
+        client.lpush(OTP_JOB_QUEUE_KEY, json.dumps(job))
+        return True
+    except Exception as e:
+        _mark_redis_down(e)
+        return False
+
+
+def enqueue_otp_delivery(phone, otp_code, purpose='login'):
+    """Queue the OTP SMS; sent inline only when the queue is unreachable"""
+    job = {
+        'type': 'deliver', 'phone': phone, 'otp': otp_code, 'purpose': purpose,
+        'expires_at': time.time() + OTP_TTL_SECONDS, 'attempts': 0,
+    }
+    if not _enqueue(job):
+        deliver_otp(phone, otp_code, purpose)
+
+
+def enqueue_mark_otp_used(phone, purpose, otp_hash):
+    """Queue the audit write for a code Redis has already consumed"""
+    if not _enqueue({'type': 'mark_used', 'phone': phone, 'purpose': purpose, 'otp_hash': otp_hash}):
+        _record_otp_used(phone, purpose, otp_hash)
+
+
+def _record_otp_used(phone, purpose, otp_hash):
+    from .models import OTP
+
+    # No expiry condition: this records a use Redis already accepted
+    OTP.objects.filter(phone=phone, purpose=purpose, otp=otp_hash, is_used=False).update(is_used=True)
+
+
+def run_otp_job(job):
+    """Run one queued job; returns a job to queue again, or None"""
+    if job['type'] == 'mark_used':
+        _record_otp_used(job['phone'], job['purpose'], job['otp_hash'])
+        return None
+    if job['type'] != 'deliver':
+        logger.error(f"Unknown OTP job type {job['type']!r}")
+        return None
+    if job['expires_at'] < time.time():
+        logger.warning(f"Dropping expired OTP delivery to {job['phone']}")
+        return None
+    if deliver_otp(job['phone'], job['otp'], job['purpose']):
+        return None
+    if job['attempts'] + 1 >= OTP_DELIVERY_MAX_ATTEMPTS:
+        return None
+    return dict(job, attempts=job['attempts'] + 1)
+
+
+def process_otp_jobs(worker_name, block_seconds=5, stop=None):
+    """
+    Drain the job queue until ``stop()`` returns true.
+
+    Jobs move atomically into this worker's processing list and are removed
+    once handled, so jobs left there by a crash are requeued on start.
+    """
+    client = _connect_redis(socket_timeout=block_seconds + 5)
+    processing_key = _processing_key(worker_name)
+    while client.rpoplpush(processing_key, OTP_JOB_QUEUE_KEY) is not None:
+        pass
+
+    while not (stop and stop()):
+        raw = client.brpoplpush(OTP_JOB_QUEUE_KEY, processing_key, timeout=block_seconds)
+        if raw is None:
+            continue
+        try:
+            retry = run_otp_job(json.loads(raw))
+            if retry is not None:
+                client.lpush(OTP_JOB_QUEUE_KEY, json.dumps(retry))
+        except Exception as e:
+            logger.error(f"OTP job failed: {e}")
+        finally:
+            client.lrem(processing_key, 1, raw)
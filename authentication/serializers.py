@@ -7,7 +7,9 @@ import string
 import hashlib
 from .models import User, OTP, UserSession
 from django.conf import settings
-from .utils import send_otp_sms
+from .otp_service import (
+    cache_issued_otp, verify_cached_otp, mark_otp_used, enqueue_otp_delivery, enqueue_mark_otp_used
+)
 
 
 class SendOTPSerializer(serializers.Serializer):
@@ -67,6 +69,7 @@ class SendOTPSerializer(serializers.Serializer):
                 purpose=purpose,
                 expires_at=expires_at
             )
+            cache_issued_otp(phone, purpose, otp_hash)
 
             return {
                 'phone': phone,
@@ -94,8 +97,10 @@ class SendOTPSerializer(serializers.Serializer):
                 expires_at=expires_at
             )
 
-            # Send OTP via SMS (production)
-            send_otp_sms(phone, otp_code, purpose)
+            cache_issued_otp(phone, purpose, otp_hash)
+
+            # Send OTP via SMS (production) from the delivery queue
+            enqueue_otp_delivery(phone, otp_code, purpose)
 
             return {
                 'phone': phone,
@@ -166,22 +171,16 @@ class VerifyOTPSerializer(serializers.Serializer):
         # Hash the provided OTP
         otp_hash = hashlib.sha256(otp_code.encode('utf-8')).hexdigest()
 
-        # Find valid OTP (by hash and purpose)
-        try:
-            otp = OTP.objects.get(
-                phone=phone,
-                otp=otp_hash,
-                purpose=purpose,
-                is_used=False,
-                expires_at__gt=timezone.now()
-            )
-        except OTP.DoesNotExist:
+        # Redis decides; the audit row is marked used from the queue
+        cached_result = verify_cached_otp(phone, purpose, otp_hash)
+        if cached_result:
+            enqueue_mark_otp_used(phone, purpose, otp_hash)
+        elif cached_result is None:
+            # Redis unavailable or holds nothing for this phone: the OTP row decides
+            cached_result = mark_otp_used(phone, purpose, otp_hash)
+        if not cached_result:
             raise serializers.ValidationError('Invalid or expired OTP')
 
-        # Mark OTP as used
-        otp.is_used = True
-        otp.save()
-
         # Handle user creation/retrieval based on purpose
         try:
             user = User.objects.get(phone=phone)
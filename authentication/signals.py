@@ -1,11 +1,13 @@
 """
-Signals for automatic file upload to DigitalOcean Spaces
+Signals for automatic file upload to DigitalOcean Spaces and principal cache invalidation
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from .models import User
+from .cache import invalidate_principal
+from utils.image_derivatives import queue_derivatives
 import threading
 import boto3
 import os
@@ -107,4 +109,35 @@ def upload_user_profile_picture_to_spaces(sender, instance, created, **kwargs):
         print(f"🚀 [SIGNAL] Started async upload thread for user {instance.id}")
                     
     except Exception as e:
-        print(f"❌ Error in upload_user_profile_picture_to_spaces signal: {e}") 
\ No newline at end of file
+        print(f"❌ Error in upload_user_profile_picture_to_spaces signal: {e}") 
+
+# Principal cache invalidation (see authentication/cache.py)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, **kwargs):
+    """Drop the cached principal when a user changes"""
+    invalidate_principal(instance.pk)
+
+
+@receiver(post_save, sender='doctors.DoctorProfile')
+@receiver(post_delete, sender='doctors.DoctorProfile')
+@receiver(post_save, sender='patients.PatientProfile')
+@receiver(post_delete, sender='patients.PatientProfile')
+def invalidate_profile_principal(sender, instance, **kwargs):
+    """Drop the cached principal when a doctor/patient profile changes"""
+    invalidate_principal(instance.user_id)
+
+
+@receiver(post_save, sender='eclinic.Clinic')
+@receiver(post_delete, sender='eclinic.Clinic')
+def invalidate_clinic_admin_principal(sender, instance, **kwargs):
+    """Drop the cached principal of the clinic admin when a clinic changes"""
+    invalidate_principal(instance.admin_id)
+
+
+@receiver(post_save, sender=User)
+def queue_profile_picture_derivatives(sender, instance, **kwargs):
+    """Render thumbnail/WebP variants when the profile picture changes"""
+    queue_derivatives(instance, 'profile_picture', 'profile_picture_variants')
@@ -4,7 +4,7 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from .models import OTP, UserSession
-from .utils import generate_otp, send_otp
+from .utils import generate_otp
 
 User = get_user_model()
 
@@ -23,7 +23,8 @@ class UserModelTest(TestCase):
     def test_create_user(self):
         """Test user creation"""
         user = User.objects.create_user(**self.user_data)
-        self.assertEqual(user.phone, self.user_data['phone'])
+        # Ten-digit numbers are saved with the +91 country code
+        self.assertEqual(user.phone, '+911234567890')
         self.assertEqual(user.name, self.user_data['name'])
         self.assertEqual(user.role, self.user_data['role'])
         self.assertTrue(user.is_active)
@@ -46,66 +47,85 @@ class UserModelTest(TestCase):
         self.assertEqual(str(user), f"{user.name} ({user.phone})")
 
 
+def create_otp(phone, code='123456', purpose='login', minutes=5):
+    """Store an OTP row the way SendOTPSerializer does, expiring in `minutes`"""
+    import hashlib
+    from datetime import timedelta
+    from django.utils import timezone
+    return OTP.objects.create(
+        phone=phone,
+        otp=hashlib.sha256(code.encode('utf-8')).hexdigest(),
+        purpose=purpose,
+        expires_at=timezone.now() + timedelta(minutes=minutes)
+    )
+
+
 class OTPModelTest(TestCase):
     """Test cases for OTP model"""
     
     def setUp(self):
-        self.user = User.objects.create_user(
-            phone='+1234567890',
-            name='Test User',
-            role='patient'
-        )
+        self.phone = '+911234567890'
     
     def test_create_otp(self):
         """Test OTP creation"""
-        otp = OTP.objects.create(
-            user=self.user,
-            otp_code='123456',
-            purpose='login'
-        )
-        self.assertEqual(otp.user, self.user)
-        self.assertEqual(otp.otp_code, '123456')
+        import hashlib
+        otp = create_otp(self.phone)
+        self.assertEqual(otp.phone, self.phone)
+        self.assertEqual(otp.otp, hashlib.sha256(b'123456').hexdigest())
         self.assertEqual(otp.purpose, 'login')
-        self.assertFalse(otp.is_verified)
+        self.assertFalse(otp.is_used)
+        self.assertFalse(otp.is_expired)
     
     def test_otp_verification(self):
         """Test OTP verification"""
-        otp = OTP.objects.create(
-            user=self.user,
-            otp_code='123456',
-            purpose='login'
-        )
-        otp.is_verified = True
+        otp = create_otp(self.phone)
+        otp.is_used = True
         otp.save()
-        self.assertTrue(otp.is_verified)
+        self.assertTrue(OTP.objects.get(pk=otp.pk).is_used)
+    
+    def test_otp_expiry(self):
+        """Test OTP expiry"""
+        self.assertTrue(create_otp(self.phone, minutes=-1).is_expired)
 
 
 class AuthenticationAPITest(APITestCase):
     """Test cases for authentication APIs"""
     
     def setUp(self):
-        self.send_otp_url = reverse('authentication:send-otp')
-        self.verify_otp_url = reverse('authentication:verify-otp')
-        self.refresh_url = reverse('authentication:refresh')
+        from unittest import mock
+        from django.core.cache import cache
+        from django.test import override_settings
+        cache.clear()
+        self.send_otp_url = reverse('authentication:send_otp')
+        self.verify_otp_url = reverse('authentication:verify_otp')
+        self.refresh_url = reverse('authentication:token_refresh')
         self.logout_url = reverse('authentication:logout')
         
         self.user_data = {
-            'phone': '+1234567890',
+            'phone': '+911234567890',
             'name': 'Test User',
             'role': 'patient'
         }
+        
+        # No Redis or SMS gateway here: the OTP row decides and nothing is sent
+        settings_override = override_settings(OTP_TEST_MODE=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for target in ('authentication.otp_service._get_redis', 'authentication.serializers.enqueue_otp_delivery'):
+            patcher = mock.patch(target, return_value=None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
     
     def test_send_otp_new_user(self):
-        """Test sending OTP to new user"""
+        """Test sending a registration OTP to a new user"""
         data = {
-            'phone': '+1234567890',
-            'name': 'New User',
-            'role': 'patient'
+            'phone': '1234567890',
+            'purpose': 'registration'
         }
         response = self.client.post(self.send_otp_url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data['success'])
-        self.assertTrue(User.objects.filter(phone=data['phone']).exists())
+        self.assertTrue(OTP.objects.filter(phone='+911234567890', purpose='registration').exists())
     
     def test_send_otp_existing_user(self):
         """Test sending OTP to existing user"""
@@ -120,64 +140,47 @@ class AuthenticationAPITest(APITestCase):
         data = {'phone': 'invalid_phone'}
         response = self.client.post(self.send_otp_url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertFalse(response.data['success'])
+        self.assertFalse(OTP.objects.exists())
     
     def test_verify_otp_success(self):
         """Test successful OTP verification"""
         user = User.objects.create_user(**self.user_data)
-        otp = OTP.objects.create(
-            user=user,
-            otp_code='123456',
-            purpose='login'
-        )
+        create_otp(user.phone)
         
         data = {
             'phone': user.phone,
-            'otp_code': '123456'
+            'otp': '123456'
         }
         response = self.client.post(self.verify_otp_url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data['success'])
-        self.assertIn('access_token', response.data['data'])
-        self.assertIn('refresh_token', response.data['data'])
+        self.assertIn('access', response.data['data'])
+        self.assertIn('refresh', response.data['data'])
     
     def test_verify_otp_invalid_code(self):
         """Test OTP verification with invalid code"""
         user = User.objects.create_user(**self.user_data)
-        OTP.objects.create(
-            user=user,
-            otp_code='123456',
-            purpose='login'
-        )
+        create_otp(user.phone)
         
         data = {
             'phone': user.phone,
-            'otp_code': '654321'
+            'otp': '654321'
         }
         response = self.client.post(self.verify_otp_url, data)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertFalse(response.data['success'])
     
     def test_verify_otp_expired(self):
         """Test OTP verification with expired OTP"""
         user = User.objects.create_user(**self.user_data)
-        otp = OTP.objects.create(
-            user=user,
-            otp_code='123456',
-            purpose='login'
-        )
-        # Manually set expiry to past
-        from django.utils import timezone
-        from datetime import timedelta
-        otp.expires_at = timezone.now() - timedelta(minutes=1)
-        otp.save()
+        create_otp(user.phone, minutes=-1)
         
         data = {
             'phone': user.phone,
-            'otp_code': '123456'
+            'otp': '123456'
         }
         response = self.client.post(self.verify_otp_url, data)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertFalse(response.data['success'])
 
 
@@ -211,19 +214,19 @@ class UserSessionTest(TestCase):
         """Test session creation"""
         session = UserSession.objects.create(
             user=self.user,
-            session_token='test_token_123',
+            refresh_token='test_token_123',
             device_info='Test Device',
             ip_address='127.0.0.1'
         )
         self.assertEqual(session.user, self.user)
-        self.assertEqual(session.session_token, 'test_token_123')
+        self.assertEqual(session.refresh_token, 'test_token_123')
         self.assertTrue(session.is_active)
     
     def test_session_deactivation(self):
         """Test session deactivation"""
         session = UserSession.objects.create(
             user=self.user,
-            session_token='test_token_123',
+            refresh_token='test_token_123',
             device_info='Test Device',
             ip_address='127.0.0.1'
         )
@@ -270,3 +273,152 @@ class PermissionTest(APITestCase):
         # Add specific permission tests for admin role
         pass
 
+
+
+class PrincipalCacheTest(TestCase):
+    """Test cases for the cached JWT principal"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(
+            phone='+1234567890',
+            name='Cached User',
+            role='patient'
+        )
+    
+    def test_principal_served_from_cache(self):
+        """Second lookup should not hit the database"""
+        from .cache import get_principal
+        get_principal(self.user.id)
+        with self.assertNumQueries(0):
+            principal = get_principal(self.user.id)
+            self.assertEqual(principal.id, self.user.id)
+            self.assertFalse(hasattr(principal, 'doctor_profile'))
+    
+    def test_principal_invalidated_on_save(self):
+        """Saving the user should drop the cached principal"""
+        from .cache import get_principal
+        get_principal(self.user.id)
+        self.user.name = 'Renamed User'
+        self.user.save()
+        self.assertEqual(get_principal(self.user.id).name, 'Renamed User')
+    
+    def test_access_token_resolution(self):
+        """A valid access token resolves to the principal, garbage does not"""
+        from rest_framework_simplejwt.tokens import AccessToken
+        from .authentication import get_user_from_access_token
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual(get_user_from_access_token(token).id, self.user.id)
+        self.assertIsNone(get_user_from_access_token('not-a-token'))
+
+
+class OTPServiceTest(TestCase):
+    """Test cases for OTP rate limiting and verification"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def test_sliding_window_limit(self):
+        """Hits beyond the limit are rejected with a retry-after"""
+        from unittest import mock
+        from .otp_service import SlidingWindowRateLimiter
+        limiter = SlidingWindowRateLimiter('phone', 2, 60)
+        with mock.patch('authentication.otp_service._get_redis', return_value=None):
+            self.assertEqual(limiter.hit('+911234567890'), 0)
+            self.assertEqual(limiter.hit('+911234567890'), 0)
+            self.assertGreater(limiter.hit('+911234567890'), 0)
+            self.assertEqual(limiter.hit('+919876543210'), 0)
+    
+    def _issue(self, phone):
+        """Issue a production (non-test-mode) OTP and return the code that was sent"""
+        from unittest import mock
+        from .serializers import SendOTPSerializer
+        with mock.patch('authentication.serializers.enqueue_otp_delivery') as deliver:
+            serializer = SendOTPSerializer(data={'phone': phone, 'purpose': 'login'})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return deliver.call_args.args[1]
+    
+    def _verify(self, phone, code):
+        from .serializers import VerifyOTPSerializer
+        return VerifyOTPSerializer(data={'phone': phone, 'otp': code, 'purpose': 'login'}).is_valid()
+    
+    def test_otp_is_single_use_and_superseded_by_resend(self):
+        """Without Redis the OTP row decides: one use, and only the latest code"""
+        from unittest import mock
+        from django.test import override_settings
+        phone = '+911234567890'
+        User.objects.create_user(phone=phone, name='OTP User', role='patient')
+        with override_settings(OTP_TEST_MODE=False), \
+                mock.patch('authentication.otp_service._get_redis', return_value=None):
+            old_code = self._issue(phone)
+            new_code = self._issue(phone)
+            if old_code != new_code:
+                self.assertFalse(self._verify(phone, old_code))
+            self.assertTrue(self._verify(phone, new_code))
+            self.assertFalse(self._verify(phone, new_code))
+        self.assertFalse(OTP.objects.filter(phone=phone, is_used=False).exists())
+
+    def test_redis_decides_and_audit_write_is_queued(self):
+        """A code Redis accepts is not checked against the row, which is marked used later"""
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from django.test import override_settings
+        from .otp_service import run_otp_job
+        phone = '+911234567891'
+        User.objects.create_user(phone=phone, name='OTP User', role='patient')
+        with override_settings(OTP_TEST_MODE=False), \
+                mock.patch('authentication.otp_service._get_redis', return_value=None):
+            code = self._issue(phone)
+
+        with mock.patch('authentication.serializers.verify_cached_otp', return_value=True), \
+                mock.patch('authentication.serializers.enqueue_mark_otp_used') as enqueue:
+            self.assertTrue(self._verify(phone, code))
+        self.assertTrue(OTP.objects.filter(phone=phone, is_used=False).exists())
+        (job_phone, purpose, otp_hash), _ = enqueue.call_args
+
+        # The queued write lands even after the code has expired
+        OTP.objects.filter(phone=phone).update(expires_at=timezone.now() - timedelta(minutes=1))
+        run_otp_job({'type': 'mark_used', 'phone': job_phone, 'purpose': purpose, 'otp_hash': otp_hash})
+        self.assertFalse(OTP.objects.filter(phone=phone, is_used=False).exists())
+
+        with mock.patch('authentication.serializers.verify_cached_otp', return_value=False):
+            self.assertFalse(self._verify(phone, code))
+
+    def test_ip_limit_ignores_forwarded_for(self):
+        """A fresh X-Forwarded-For per request doesn't get a fresh bucket"""
+        from unittest import mock
+        from rest_framework.test import APIClient
+        client = APIClient()
+        limits = {'ip': [(2, 60)]}
+        with mock.patch('authentication.otp_service.OTP_RATE_LIMITS', limits), \
+                mock.patch('authentication.otp_service._get_redis', return_value=None), \
+                mock.patch('authentication.serializers.enqueue_otp_delivery'):
+            statuses = [
+                client.post('/api/auth/send-otp/', {'phone': f'98765432{n:02d}', 'purpose': 'registration'},
+                            HTTP_X_FORWARDED_FOR=f'10.0.0.{n}').status_code
+                for n in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_delivery_jobs_retry_until_expiry(self):
+        import time
+        from unittest import mock
+        from .otp_service import OTP_DELIVERY_MAX_ATTEMPTS, run_otp_job
+        job = {'type': 'deliver', 'phone': '+911234567892', 'otp': '123456', 'purpose': 'login',
+               'expires_at': time.time() + 60, 'attempts': 0}
+        with mock.patch('authentication.otp_service.deliver_otp', return_value=False) as deliver:
+            self.assertEqual(run_otp_job(job)['attempts'], 1)
+            self.assertIsNone(run_otp_job(dict(job, attempts=OTP_DELIVERY_MAX_ATTEMPTS - 1)))
+            self.assertIsNone(run_otp_job(dict(job, expires_at=time.time() - 1)))
+        self.assertEqual(deliver.call_count, 2)
+
+        # Without Redis there is no queue: the SMS goes out inline
+        from .otp_service import enqueue_otp_delivery
+        with mock.patch('authentication.otp_service._get_redis', return_value=None), \
+                mock.patch('authentication.otp_service.deliver_otp') as deliver:
+            enqueue_otp_delivery('+911234567892', '123456')
+        deliver.assert_called_once_with('+911234567892', '123456', 'login')
@@ -7,7 +7,10 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 import logging
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +20,36 @@ def generate_otp(length=6):
     return ''.join(random.choices(string.digits, k=length))
 
 
-def send_otp_via_msg91(phone, otp, template_id, authkey, otp_length=5, extra_params=None):
-    """Send OTP via MSG91 API"""
-    url = 'https://control.msg91.com/api/v5/otp'
+MSG91_OTP_URL = 'https://control.msg91.com/api/v5/otp'
+
+_provider_session = None
+_provider_session_lock = threading.Lock()
+
+
+def get_provider_session():
+    """
+    Shared requests session for SMS providers.
+
+    Keeps TLS connections to the gateway alive across sends and retries
+    transient 5xx/connection failures with backoff.
+    """
+    global _provider_session
+    if _provider_session is None:
+        with _provider_session_lock:
+            if _provider_session is None:
+                retry = Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(['POST']),
+                )
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry))
+                _provider_session = session
+    return _provider_session
+
+
+def _msg91_payload(phone, otp, template_id, authkey, otp_length, extra_params=None):
     payload = {
         'template_id': template_id,
         'mobile': phone,
@@ -29,9 +59,15 @@ def send_otp_via_msg91(phone, otp, template_id, authkey, otp_length=5, extra_par
     }
     if extra_params:
         payload.update(extra_params)
+    return payload
+
+
+def send_otp_via_msg91(phone, otp, template_id, authkey, otp_length=5, extra_params=None):
+    """Send OTP via MSG91 API"""
+    payload = _msg91_payload(phone, otp, template_id, authkey, otp_length, extra_params)
     headers = {'Content-Type': 'application/JSON'}
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = get_provider_session().post(MSG91_OTP_URL, json=payload, headers=headers, timeout=10)
         response.raise_for_status()
         return True
     except Exception as e:
@@ -39,18 +75,24 @@ def send_otp_via_msg91(phone, otp, template_id, authkey, otp_length=5, extra_par
         return False
 
 
+def _msg91_credentials():
+    template_id = getattr(settings, 'MSG91_TEMPLATE_ID', None)
+    authkey = getattr(settings, 'MSG91_AUTHKEY', None)
+    if not template_id or not authkey:
+        logger.error('MSG91 credentials not set in settings.')
+        return None
+    return template_id, authkey
+
+
 def send_otp_sms(phone, otp, purpose='login'):
     """Send OTP via SMS using MSG91"""
     try:
-        # Format message based on purpose (optional, MSG91 uses template)
-        # Get MSG91 config from settings
-        template_id = getattr(settings, 'MSG91_TEMPLATE_ID', None)
-        authkey = getattr(settings, 'MSG91_AUTHKEY', None)
-        otp_length = len(otp)
-        if not template_id or not authkey:
-            logger.error('MSG91 credentials not set in settings.')
+        # MSG91 formats the message from its template
+        credentials = _msg91_credentials()
+        if not credentials:
             return False
-        return send_otp_via_msg91(phone, otp, template_id, authkey, otp_length)
+        template_id, authkey = credentials
+        return send_otp_via_msg91(phone, otp, template_id, authkey, len(otp))
     except Exception as e:
         logger.error(f"Failed to send OTP via MSG91 to {phone}: {str(e)}")
         return False
@@ -23,9 +23,20 @@ from .serializers import (
     UpdateProfileSerializer, AdminUpdateUserSerializer, RefreshTokenSerializer, LogoutSerializer,
     ChangePasswordSerializer, UserSessionSerializer
 )
+from .otp_service import check_send_rate_limits, RateLimitExceeded
+
+
+def get_client_ip(request):
+    """
+    Client IP for rate limiting: the peer address. X-Forwarded-For is client
+    supplied and would let every request pick a fresh bucket; deployments
+    behind a proxy must have it set REMOTE_ADDR.
+    """
+    return request.META.get('REMOTE_ADDR')
+
 
 class SendOTPView(APIView):
-    """Send OTP to user's phone number"""
+    """Send OTP to user's phone number (rate limited)"""
     permission_classes = [permissions.AllowAny]
     
     @extend_schema(
@@ -36,6 +47,22 @@ class SendOTPView(APIView):
     def post(self, request):
         serializer = SendOTPSerializer(data=request.data)
         if serializer.is_valid():
+            try:
+                check_send_rate_limits(serializer.validated_data['phone'], get_client_ip(request))
+            except RateLimitExceeded as e:
+                response = Response({
+                    'success': False,
+                    'error': {
+                        'code': 'RATE_LIMITED',
+                        'message': 'Too many OTP requests. Please try again later.',
+                        'details': {'scope': e.scope, 'retry_after': e.retry_after}
+                    },
+                    'timestamp': timezone.now().isoformat()
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+                response['Retry-After'] = str(e.retry_after)
+                return response
+            
+            # Creates the OTP row and queues the SMS
             result = serializer.save()
             return Response({
                 'success': True,
@@ -0,0 +1,51 @@
+"""
+Channel-layer groups for consultation events.
+
+ConsultationConsumer joins only the groups its user may see: doctors and
+patients their own, clinic admins their clinic's and superadmins the
+platform-wide one. Publishers send each event to the groups of the
+consultation it concerns, so delivery cost follows the interested sockets
+rather than everyone connected.
+"""
+
+SUPERADMIN_GROUP = 'consultations_all'
+
+
+def doctor_group(doctor_id):
+    return f"consultations_doctor_{doctor_id}"
+
+
+def patient_group(patient_id):
+    return f"consultations_patient_{patient_id}"
+
+
+def clinic_group(clinic_id):
+    return f"consultations_clinic_{clinic_id}"
+
+
+def groups_for(doctor_id, patient_id, clinic_id=None):
+    """Groups interested in a consultation with these foreign keys"""
+    groups = [doctor_group(doctor_id), patient_group(patient_id)]
+    if clinic_id:
+        groups.append(clinic_group(clinic_id))
+    groups.append(SUPERADMIN_GROUP)
+    return groups
+
+
+def consultation_groups(consultation):
+    return groups_for(consultation.doctor_id, consultation.patient_id, consultation.clinic_id)
+
+
+def subscription_groups(user):
+    """Groups a consultation socket of ``user`` joins (may query the administered clinic)"""
+    if user.role == 'superadmin':
+        return [SUPERADMIN_GROUP]
+    if user.role == 'admin':
+        from eclinic.models import Clinic
+        clinic_id = Clinic.objects.filter(admin=user).values_list('id', flat=True).first()
+        return [clinic_group(clinic_id)] if clinic_id else []
+    if user.role == 'doctor':
+        return [doctor_group(user.id)]
+    if user.role == 'patient':
+        return [patient_group(user.id)]
+    return []
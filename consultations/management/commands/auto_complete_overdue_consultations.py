@@ -1,8 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from django.db import transaction
-from datetime import datetime, timedelta
+from datetime import timedelta
 from consultations.models import Consultation
+from consultations.services import ConsultationAutoCompletionService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +29,17 @@ class Command(BaseCommand):
             default='both',
             help='Which status to check for overdue consultations (default: both)',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Consultations updated per transaction; 0 updates all at once (default: 500)',
+        )
+        parser.add_argument(
+            '--no-input',
+            action='store_true',
+            help='Do not ask for confirmation before updating',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
@@ -60,33 +71,14 @@ class Command(BaseCommand):
             )
             return
         
-        # Find overdue consultations
+        # Find overdue consultations (served by the (status, scheduled_at) index)
         overdue_consultations = Consultation.objects.filter(
-            status__in=status_conditions
-        ).select_related('patient', 'doctor')
+            status__in=status_conditions,
+            scheduled_at__lt=cutoff_time
+        ).select_related('patient', 'doctor').order_by('scheduled_at')
         
-        # Filter by scheduled datetime
-        overdue_list = []
-        for consultation in overdue_consultations:
-            # Create scheduled datetime
-            scheduled_datetime = datetime.combine(
-                consultation.scheduled_date,
-                consultation.scheduled_time
-            )
-            
-            # Convert to timezone-aware datetime if needed
-            if timezone.is_naive(scheduled_datetime):
-                scheduled_datetime = timezone.make_aware(scheduled_datetime)
-            
-            # Check if consultation is overdue
-            if scheduled_datetime < cutoff_time:
-                overdue_list.append({
-                    'consultation': consultation,
-                    'scheduled_datetime': scheduled_datetime,
-                    'hours_overdue': (timezone.now() - scheduled_datetime).total_seconds() / 3600
-                })
-        
-        if not overdue_list:
+        overdue_count = overdue_consultations.count()
+        if not overdue_count:
             self.stdout.write(
                 self.style.SUCCESS('No overdue consultations found!')
             )
@@ -95,13 +87,13 @@ class Command(BaseCommand):
         # Display what will be updated
         self.stdout.write(
             self.style.WARNING(
-                f'\nFound {len(overdue_list)} overdue consultation(s):'
+                f'\nFound {overdue_count} overdue consultation(s):'
             )
         )
         
-        for item in overdue_list:
-            consultation = item['consultation']
-            hours_overdue = item['hours_overdue']
+        now = timezone.now()
+        for consultation in overdue_consultations.iterator(chunk_size=1000):
+            hours_overdue = (now - consultation.scheduled_at).total_seconds() / 3600
             
             self.stdout.write(
                 f'  - {consultation.id}: {consultation.patient.name} with Dr. {consultation.doctor.name}'
@@ -112,61 +104,35 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'\nDRY RUN: Would mark {len(overdue_list)} consultation(s) as completed'
+                    f'\nDRY RUN: Would mark {overdue_count} consultation(s) as completed'
                 )
             )
             return
         
         # Confirm before proceeding
-        confirm = input(f'\nProceed to mark {len(overdue_list)} consultation(s) as completed? (y/N): ')
-        if confirm.lower() != 'y':
+        if not options['no_input']:
+            confirm = input(f'\nProceed to mark {overdue_count} consultation(s) as completed? (y/N): ')
+            if confirm.lower() != 'y':
+                self.stdout.write(
+                    self.style.WARNING('Operation cancelled by user')
+                )
+                return
+        
+        # Update consultations in set-based batches
+        result = ConsultationAutoCompletionService.check_and_complete_overdue_consultations(
+            hours_overdue=options['hours_overdue'],
+            status_filter=status_filter,
+            batch_size=options['batch_size'] or None
+        )
+        
+        if not result['success']:
             self.stdout.write(
-                self.style.WARNING('Operation cancelled by user')
+                self.style.ERROR(f'✗ Auto-completion failed: {result["error"]}')
             )
             return
         
-        # Update consultations
-        updated_count = 0
-        with transaction.atomic():
-            for item in overdue_list:
-                consultation = item['consultation']
-                
-                try:
-                    # Update consultation status
-                    consultation.status = 'completed'
-                    
-                    # Set actual end time if not already set
-                    if not consultation.actual_end_time:
-                        consultation.actual_end_time = timezone.now()
-                    
-                    consultation.save()
-                    updated_count += 1
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'✓ Marked {consultation.id} as completed'
-                        )
-                    )
-                    
-                    # Log the action
-                    logger.info(
-                        f'Auto-completed consultation {consultation.id} '
-                        f'(patient: {consultation.patient.name}, doctor: {consultation.doctor.name}) '
-                        f'after {item["hours_overdue"]:.1f} hours overdue'
-                    )
-                    
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'✗ Failed to update {consultation.id}: {str(e)}'
-                        )
-                    )
-                    logger.error(
-                        f'Failed to auto-complete consultation {consultation.id}: {str(e)}'
-                    )
-        
         self.stdout.write(
             self.style.SUCCESS(
-                f'\nSuccessfully marked {updated_count} consultation(s) as completed!'
+                f'\nSuccessfully marked {result["updated_count"]} consultation(s) as completed!'
             )
         )
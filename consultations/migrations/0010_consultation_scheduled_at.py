@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_scheduled_at(apps, schema_editor):
+    """Populate scheduled_at from scheduled_date + scheduled_time in the project timezone"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'UPDATE consultations SET scheduled_at = (scheduled_date + scheduled_time) AT TIME ZONE %s',
+            [settings.TIME_ZONE]
+        )
+        return
+
+    import datetime
+    from django.utils import timezone
+
+    Consultation = apps.get_model('consultations', 'Consultation')
+    batch = []
+    for consultation in Consultation.objects.only('id', 'scheduled_date', 'scheduled_time').iterator(chunk_size=1000):
+        consultation.scheduled_at = timezone.make_aware(
+            datetime.datetime.combine(consultation.scheduled_date, consultation.scheduled_time)
+        )
+        batch.append(consultation)
+        if len(batch) >= 1000:
+            Consultation.objects.bulk_update(batch, ['scheduled_at'])
+            batch = []
+    if batch:
+        Consultation.objects.bulk_update(batch, ['scheduled_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0009_consultation_rescheduled_at'),
+        ('doctors', '0014_update_all_consultation_durations_to_5'),
+        ('eclinic', '0009_globalmedication_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultation',
+            name='scheduled_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_scheduled_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['doctor', 'scheduled_at', 'status'], name='consultatio_doctor__6243eb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['clinic', 'scheduled_at', 'status'], name='consultatio_clinic__b0f5f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['patient', 'scheduled_at'], name='consultatio_patient_1f6bf3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['status', 'scheduled_at'], name='consultatio_status_d0eef3_idx'),
+        ),
+    ]
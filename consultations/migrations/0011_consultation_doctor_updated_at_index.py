@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0010_consultation_scheduled_at'),
+        ('doctors', '0015_doctorsignature_variants'),
+        ('eclinic', '0012_clinic_location_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['doctor', 'updated_at'], name='consultatio_doctor__876a94_idx'),
+        ),
+    ]
@@ -9,6 +9,28 @@ import datetime
 from django.core.exceptions import ValidationError
 
 
+def local_day_start(day):
+    """Timezone-aware start of ``day`` in the project timezone"""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def scheduled_between(date_from=None, date_to=None):
+    """
+    Q filter for consultations scheduled on local dates date_from..date_to
+    (inclusive), expressed as a range on the indexed scheduled_at column
+    """
+    if isinstance(date_from, str):
+        date_from = datetime.date.fromisoformat(date_from)
+    if isinstance(date_to, str):
+        date_to = datetime.date.fromisoformat(date_to)
+    condition = models.Q()
+    if date_from:
+        condition &= models.Q(scheduled_at__gte=local_day_start(date_from))
+    if date_to:
+        condition &= models.Q(scheduled_at__lt=local_day_start(date_to + timedelta(days=1)))
+    return condition
+
+
 class Consultation(models.Model):
     """Main consultation model"""
     
@@ -50,6 +72,8 @@ class Consultation(models.Model):
     # Scheduling Information
     scheduled_date = models.DateField()
     scheduled_time = models.TimeField()
+    # scheduled_date + scheduled_time as an aware datetime, maintained in save()
+    scheduled_at = models.DateTimeField(null=True, blank=True, editable=False)
     duration = models.PositiveIntegerField(default=30, help_text="Duration in minutes")
     consultation_type = models.CharField(max_length=20, choices=CONSULTATION_TYPES, default='video_call')
     
@@ -165,8 +189,25 @@ class Consultation(models.Model):
         verbose_name = 'Consultation'
         verbose_name_plural = 'Consultations'
         ordering = ['-scheduled_date', '-scheduled_time']
+        indexes = [
+            models.Index(fields=['doctor', 'scheduled_at', 'status']),
+            models.Index(fields=['clinic', 'scheduled_at', 'status']),
+            models.Index(fields=['patient', 'scheduled_at']),
+            models.Index(fields=['status', 'scheduled_at']),
+            # since=<cursor> catch-up on the doctor dashboard
+            models.Index(fields=['doctor', 'updated_at']),
+        ]
     
     def save(self, *args, **kwargs):
+        if self.scheduled_date and self.scheduled_time:
+            # Accept ISO strings as the field would when saving
+            self.scheduled_date = self._meta.get_field('scheduled_date').to_python(self.scheduled_date)
+            self.scheduled_time = self._meta.get_field('scheduled_time').to_python(self.scheduled_time)
+            self.scheduled_at = self.scheduled_datetime
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'scheduled_date', 'scheduled_time'} & set(update_fields):
+                kwargs['update_fields'] = set(update_fields) | {'scheduled_at'}
+        
         if not self.id:
             # Generate consultation ID
             last_consultation = Consultation.objects.order_by('id').last()
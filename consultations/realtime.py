@@ -0,0 +1,119 @@
+"""
+Doctor dashboard feed: one snapshot, then deltas.
+
+The dashboard loads ``doctor_snapshot`` once (REST or the consultations
+websocket), then applies the consultation events pushed to its socket.
+After a reconnect it catches up with ``doctor_changes(since=cursor)``,
+which only returns rows after the cursor.
+
+Cursors are an ``(updated_at, id)`` keyset position, ``<iso>|<id>``, so
+rows sharing the boundary timestamp are neither skipped nor repeated. A
+bare ``<iso>`` cursor means "from this instant on, inclusive". A cursor
+never advances past ``now - LOOKBACK``: rows stamped inside that window may
+still be joined by transactions that commit late, so they are read again
+on the next call. Clients apply changes as idempotent upserts by id.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Consultation, scheduled_between
+from .serializers import ConsultationListSerializer
+
+# Upper bound on rows returned by one ``since`` request
+MAX_CHANGES = 200
+
+# Rows updated this recently are re-read by the next ``since`` request
+LOOKBACK = timedelta(seconds=5)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_cursor(cursor):
+    """(updated_at, id) from a cursor; id is None for a bare timestamp"""
+    timestamp, _, pk = (cursor or '').partition('|')
+    parsed = parse_datetime(timestamp)
+    if parsed is None:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed, pk or None
+
+
+def settled_cursor(updated_at, pk, now=None):
+    """Cursor just past row ``(updated_at, pk)``, held back to ``now - LOOKBACK``"""
+    settled = (now or timezone.now()) - LOOKBACK
+    if updated_at > settled:
+        return settled.isoformat()
+    return f"{updated_at.isoformat()}|{pk}"
+
+
+def _doctor_consultations(doctor):
+    return Consultation.objects.filter(doctor=doctor).select_related(
+        'patient', 'doctor__doctor_profile', 'clinic'
+    )
+
+
+def _serialize(consultations):
+    return ConsultationListSerializer(consultations, many=True).data
+
+
+def doctor_snapshot(doctor):
+    """Same payload as the polled real-time-updates endpoint, plus a cursor"""
+    now = timezone.now()
+    today = timezone.localdate()
+    consultations = _doctor_consultations(doctor)
+    latest = consultations.order_by('-updated_at', '-id').values_list('updated_at', 'id').first()
+    cursor = settled_cursor(*latest, now=now) if latest else settled_cursor(now, None, now=now)
+
+    recent = consultations.filter(
+        scheduled_between(date_from=today - timedelta(days=7))
+    ).order_by('-scheduled_date', '-scheduled_time')[:10]
+    today_consultations = consultations.filter(scheduled_between(today, today)).order_by('scheduled_at')
+    upcoming = consultations.filter(
+        scheduled_between(today, today + timedelta(days=3)), status='scheduled'
+    ).order_by('scheduled_at')
+
+    return {
+        'recent_updates': _serialize(recent),
+        'today_consultations': _serialize(today_consultations),
+        'upcoming_consultations': _serialize(upcoming),
+        'last_updated': now.isoformat(),
+        'cursor': cursor
+    }
+
+
+def doctor_changes(doctor, since):
+    """Consultations of ``doctor`` changed after cursor ``since``, oldest change first"""
+    since_at, since_id = parse_cursor(since)
+    if since_id is None:
+        after = Q(updated_at__gte=since_at)
+    else:
+        after = Q(updated_at__gt=since_at) | Q(updated_at=since_at, id__gt=since_id)
+    changed = list(_doctor_consultations(doctor).filter(after).order_by('updated_at', 'id')[:MAX_CHANGES])
+
+    cursor = since
+    if changed:
+        cursor = settled_cursor(changed[-1].updated_at, changed[-1].id)
+    return {
+        'changes': _serialize(changed),
+        'cursor': cursor,
+        # More rows are waiting: call again with the new cursor. Not while the
+        # cursor is held back, the same rows would come back
+        'has_more': len(changed) == MAX_CHANGES and '|' in cursor,
+        'last_updated': timezone.now().isoformat()
+    }
+
+
+def consultation_delta(consultation):
+    """List row and cursor pushed with consultation events"""
+    consultation = _doctor_consultations(consultation.doctor_id).get(pk=consultation.pk)
+    return {
+        'consultation': ConsultationListSerializer(consultation).data,
+        'cursor': settled_cursor(consultation.updated_at, consultation.pk)
+    }
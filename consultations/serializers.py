@@ -3,6 +3,7 @@ from django.utils import timezone
 from authentication.models import User
 from patients.models import PatientProfile
 from doctors.models import DoctorProfile
+from utils.direct_uploads import DirectUploadFileField
 from .models import (
     Consultation, ConsultationSymptom, ConsultationDiagnosis,
     ConsultationVitalSigns, ConsultationAttachment, ConsultationNote,
@@ -459,6 +460,7 @@ class ConsultationAttachmentSerializer(serializers.ModelSerializer):
 
 class ConsultationAttachmentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating consultation attachments"""
+    file = DirectUploadFileField('consultation_attachment')
     
     class Meta:
         model = ConsultationAttachment
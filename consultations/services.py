@@ -8,16 +8,40 @@ from django.core.exceptions import ValidationError
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import logging
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
+from collections import defaultdict
+from utils import event_bus
+from .groups import groups_for
 
-from .models import Consultation, ConsultationNote, ConsultationVitalSigns, ConsultationDiagnosis
+from .models import Consultation, ConsultationNote, ConsultationVitalSigns, ConsultationDiagnosis, scheduled_between
 from doctors.models import DoctorSlot
 from authentication.models import User
 
 logger = logging.getLogger(__name__)
 
+
+def notify_consultation_batch(rows, event):
+    """
+    Send ``event`` once per group subscribed to any of the (id, patient_id,
+    doctor_id, clinic_id) ``rows``, with the ids of that group's consultations
+    """
+    recipients = defaultdict(list)
+    for consultation_id, patient_id, doctor_id, clinic_id in rows:
+        for group in groups_for(doctor_id, patient_id, clinic_id):
+            recipients[group].append(consultation_id)
+    
+    event_bus.send([
+        ([group], event_bus.group_message(
+            'consultation_notification', dict(event, consultation_ids=consultation_ids), 'consultation_update'
+        ))
+        for group, consultation_ids in recipients.items()
+    ])
+
+
 class WhatsAppNotificationService:
     """Service for sending WhatsApp notifications via MSG91 API"""
     
@@ -366,11 +390,8 @@ class ConsultationService:
         if status:
             queryset = queryset.filter(status=status)
         
-        if date_from:
-            queryset = queryset.filter(scheduled_date__gte=date_from)
-        
-        if date_to:
-            queryset = queryset.filter(scheduled_date__lte=date_to)
+        if date_from or date_to:
+            queryset = queryset.filter(scheduled_between(date_from, date_to))
         
         if search:
             queryset = queryset.filter(
@@ -400,11 +421,8 @@ class ConsultationService:
         if status:
             queryset = queryset.filter(status=status)
         
-        if date_from:
-            queryset = queryset.filter(scheduled_date__gte=date_from)
-        
-        if date_to:
-            queryset = queryset.filter(scheduled_date__lte=date_to)
+        if date_from or date_to:
+            queryset = queryset.filter(scheduled_between(date_from, date_to))
         
         return queryset.order_by('-scheduled_date', '-scheduled_time')
     
@@ -459,6 +477,119 @@ class ConsultationService:
         logger.info(f"Cancelled consultation {consultation.id} by {cancelled_by.name}")
         return True
     
+    # Bulk transitions: target status, allowed source states, the timestamp
+    # field set to now and the per-id messages (same as the single-row methods)
+    BULK_TRANSITIONS = {
+        'start': {
+            'status': 'in_progress',
+            'from': ['scheduled'],
+            'timestamp': 'actual_start_time',
+            'success': 'Consultation started',
+            'error': 'Only scheduled consultations can be started',
+        },
+        'complete': {
+            'status': 'completed',
+            'from': ['in_progress'],
+            'timestamp': 'actual_end_time',
+            'success': 'Consultation completed',
+            'error': 'Only in-progress consultations can be completed',
+        },
+        'cancel': {
+            'status': 'cancelled',
+            'from': [code for code, _ in Consultation.STATUS_CHOICES if code not in ('completed', 'cancelled')],
+            'timestamp': 'cancelled_at',
+            'success': 'Consultation cancelled',
+            'error': 'Cannot cancel completed or already cancelled consultations',
+        },
+    }
+    
+    @staticmethod
+    def _bulk_update(doctor, consultation_ids, transition, fields, now):
+        """
+        Move the doctor's consultations in ``consultation_ids`` that are in an
+        allowed source state to the target state, in one UPDATE
+        
+        Returns:
+            list: (id, patient_id, doctor_id, clinic_id) tuples of the updated rows
+        """
+        values = dict(fields, status=transition['status'], updated_at=now)
+        values[transition['timestamp']] = now
+        
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                columns = [(Consultation._meta.get_field(name).column, value) for name, value in values.items()]
+                sql = (
+                    f"UPDATE {Consultation._meta.db_table} "
+                    f"SET {', '.join(f'{column} = %s' for column, _ in columns)} "
+                    "WHERE doctor_id = %s AND id = ANY(%s) AND status = ANY(%s) "
+                    "RETURNING id, patient_id, doctor_id, clinic_id"
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, [value for _, value in columns] + [
+                        doctor.id, list(consultation_ids), transition['from']
+                    ])
+                    return cursor.fetchall()
+            
+            # Other backends: lock and read the matching rows, then one UPDATE
+            rows = list(Consultation.objects.select_for_update().filter(
+                doctor=doctor, id__in=consultation_ids, status__in=transition['from']
+            ).order_by('id').values_list('id', 'patient_id', 'doctor_id', 'clinic_id'))
+            Consultation.objects.filter(id__in=[row[0] for row in rows]).update(**values)
+            return rows
+    
+    @staticmethod
+    def bulk_transition(
+        doctor: User,
+        consultation_ids: List[str],
+        action: str,
+        reason: str = ''
+    ) -> List[Dict]:
+        """
+        Start, complete or cancel many of a doctor's consultations at once
+        
+        One guarded UPDATE moves every eligible consultation; the rest are
+        reported from a single status lookup. Connected sockets get one
+        consolidated event per group after commit instead of one per row.
+        
+        Returns:
+            list: {'consultation_id', 'status', 'message'} per requested id, in request order
+        """
+        transition = ConsultationService.BULK_TRANSITIONS.get(action)
+        if transition is None:
+            raise ValidationError(f"Invalid action type: {action}")
+        
+        consultation_ids = list(dict.fromkeys(str(consultation_id) for consultation_id in consultation_ids))
+        fields = {}
+        if action == 'cancel':
+            fields = {'cancelled_by_id': doctor.id, 'cancellation_reason': reason}
+        
+        now = timezone.now()
+        rows = ConsultationService._bulk_update(doctor, consultation_ids, transition, fields, now)
+        updated = {row[0] for row in rows}
+        
+        skipped = [consultation_id for consultation_id in consultation_ids if consultation_id not in updated]
+        found = set(Consultation.objects.filter(doctor=doctor, id__in=skipped).order_by().values_list('id', flat=True))
+        
+        results = []
+        for consultation_id in consultation_ids:
+            if consultation_id in updated:
+                results.append({'consultation_id': consultation_id, 'status': 'success', 'message': transition['success']})
+            else:
+                message = transition['error'] if consultation_id in found else 'Consultation not found'
+                results.append({'consultation_id': consultation_id, 'status': 'error', 'message': message})
+        
+        if rows:
+            event = {
+                'type': 'consultations_bulk_updated',
+                'action': action,
+                'status': transition['status'],
+                'timestamp': now.isoformat()
+            }
+            transaction.on_commit(lambda: notify_consultation_batch(rows, event))
+        
+        logger.info(f"Bulk {action}: {len(rows)} of {len(consultation_ids)} consultation(s) updated by {doctor.name}")
+        return results
+    
     @staticmethod
     def reschedule_consultation(
         consultation: Consultation,
@@ -518,11 +649,8 @@ class ConsultationService:
         if doctor:
             queryset = queryset.filter(doctor=doctor)
         
-        if date_from:
-            queryset = queryset.filter(scheduled_date__gte=date_from)
-        
-        if date_to:
-            queryset = queryset.filter(scheduled_date__lte=date_to)
+        if date_from or date_to:
+            queryset = queryset.filter(scheduled_between(date_from, date_to))
         
         stats = {
             'total_consultations': queryset.count(),
@@ -544,27 +672,26 @@ class ConsultationService:
         """
         Get upcoming consultations for a doctor
         """
-        today = timezone.now().date()
+        today = timezone.localdate()
         end_date = today + timedelta(days=days)
         
         return Consultation.objects.filter(
+            scheduled_between(today, end_date),
             doctor=doctor,
-            scheduled_date__gte=today,
-            scheduled_date__lte=end_date,
             status='scheduled'
-        ).order_by('scheduled_date', 'scheduled_time')
+        ).order_by('scheduled_at')
     
     @staticmethod
     def get_today_consultations(doctor: User) -> List[Consultation]:
         """
         Get today's consultations for a doctor
         """
-        today = timezone.now().date()
+        today = timezone.localdate()
         
         return Consultation.objects.filter(
-            doctor=doctor,
-            scheduled_date=today
-        ).order_by('scheduled_time')
+            scheduled_between(today, today),
+            doctor=doctor
+        ).order_by('scheduled_at')
     
     @staticmethod
     def add_consultation_note(
@@ -752,21 +879,78 @@ class ConsultationAnalyticsService:
 class ConsultationAutoCompletionService:
     """Service for automatically completing overdue consultations"""
     
+    # Auto-completion UPDATE for PostgreSQL: picks the overdue rows through the
+    # (status, scheduled_at) index, skips rows locked by live requests and
+    # returns what it changed. LIMIT NULL means "no limit".
+    COMPLETE_OVERDUE_SQL = """
+        UPDATE consultations
+        SET status = 'completed',
+            actual_end_time = COALESCE(actual_end_time, %(now)s),
+            updated_at = %(now)s
+        WHERE id IN (
+            SELECT id FROM consultations
+            WHERE status = ANY(%(statuses)s) AND scheduled_at < %(cutoff)s
+            ORDER BY scheduled_at
+            LIMIT %(limit)s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, patient_id, doctor_id, clinic_id
+    """
+    
     @staticmethod
-    def check_and_complete_overdue_consultations(hours_overdue=1, status_filter='both'):
+    def _complete_overdue_batch(status_conditions, cutoff_time, now, limit=None):
+        """
+        Mark one batch of overdue consultations completed in a single statement
+        
+        Returns:
+            list: (id, patient_id, doctor_id, clinic_id) tuples of the updated rows
+        """
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(ConsultationAutoCompletionService.COMPLETE_OVERDUE_SQL, {
+                        'now': now,
+                        'statuses': list(status_conditions),
+                        'cutoff': cutoff_time,
+                        'limit': limit,
+                    })
+                    return cursor.fetchall()
+            
+            # Other backends have no UPDATE ... RETURNING through the ORM:
+            # select the batch ids, then update them in one statement
+            overdue = Consultation.objects.select_for_update().filter(
+                status__in=status_conditions,
+                scheduled_at__lt=cutoff_time
+            ).order_by('scheduled_at').values_list('id', 'patient_id', 'doctor_id', 'clinic_id')
+            rows = list(overdue[:limit] if limit else overdue)
+            Consultation.objects.filter(id__in=[row[0] for row in rows]).update(
+                status='completed',
+                actual_end_time=Coalesce('actual_end_time', Value(now)),
+                updated_at=now
+            )
+            return rows
+    
+    @staticmethod
+    def check_and_complete_overdue_consultations(hours_overdue=1, status_filter='both', batch_size=None):
         """
         Check for overdue consultations and mark them as completed
         
+        The update is set-based: one UPDATE per batch instead of a save() per
+        row, followed by a single websocket notification per affected doctor
+        and patient.
+        
         Args:
             hours_overdue (int): Number of hours after scheduled time to consider overdue
             status_filter (str): Which status to check ('scheduled', 'in_progress', 'both')
+            batch_size (int): Rows per UPDATE/transaction; None updates everything at once
         
         Returns:
             dict: Summary of the operation
         """
         try:
             # Calculate the cutoff time
-            cutoff_time = timezone.now() - timedelta(hours=hours_overdue)
+            now = timezone.now()
+            cutoff_time = now - timedelta(hours=float(hours_overdue))
             
             # Build the query
             status_conditions = []
@@ -782,33 +966,17 @@ class ConsultationAutoCompletionService:
                     'updated_count': 0
                 }
             
-            # Find overdue consultations
-            overdue_consultations = Consultation.objects.filter(
-                status__in=status_conditions
-            ).select_related('patient', 'doctor')
-            
-            # Filter by scheduled datetime
-            overdue_list = []
-            for consultation in overdue_consultations:
-                # Create scheduled datetime
-                scheduled_datetime = datetime.combine(
-                    consultation.scheduled_date,
-                    consultation.scheduled_time
+            # Update in batches so each transaction only locks batch_size rows
+            updated_rows = []
+            while True:
+                rows = ConsultationAutoCompletionService._complete_overdue_batch(
+                    status_conditions, cutoff_time, now, batch_size
                 )
-                
-                # Convert to timezone-aware datetime if needed
-                if timezone.is_naive(scheduled_datetime):
-                    scheduled_datetime = timezone.make_aware(scheduled_datetime)
-                
-                # Check if consultation is overdue
-                if scheduled_datetime < cutoff_time:
-                    overdue_list.append({
-                        'consultation': consultation,
-                        'scheduled_datetime': scheduled_datetime,
-                        'hours_overdue': (timezone.now() - scheduled_datetime).total_seconds() / 3600
-                    })
+                updated_rows.extend(rows)
+                if not batch_size or len(rows) < batch_size:
+                    break
             
-            if not overdue_list:
+            if not updated_rows:
                 return {
                     'success': True,
                     'message': 'No overdue consultations found',
@@ -816,50 +984,30 @@ class ConsultationAutoCompletionService:
                     'overdue_consultations': []
                 }
             
-            # Update consultations
-            updated_count = 0
-            updated_consultations = []
-            
-            with transaction.atomic():
-                for item in overdue_list:
-                    consultation = item['consultation']
-                    
-                    try:
-                        # Update consultation status
-                        consultation.status = 'completed'
-                        
-                        # Set actual end time if not already set
-                        if not consultation.actual_end_time:
-                            consultation.actual_end_time = timezone.now()
-                        
-                        consultation.save()
-                        updated_count += 1
-                        
-                        updated_consultations.append({
-                            'id': consultation.id,
-                            'patient_name': consultation.patient.name,
-                            'doctor_name': consultation.doctor.name,
-                            'scheduled_date': consultation.scheduled_date,
-                            'scheduled_time': consultation.scheduled_time,
-                            'hours_overdue': item['hours_overdue']
-                        })
-                        
-                        # Log the action
-                        logger.info(
-                            f'Auto-completed consultation {consultation.id} '
-                            f'(patient: {consultation.patient.name}, doctor: {consultation.doctor.name}) '
-                            f'after {item["hours_overdue"]:.1f} hours overdue'
-                        )
-                        
-                    except Exception as e:
-                        logger.error(
-                            f'Failed to auto-complete consultation {consultation.id}: {str(e)}'
-                        )
+            updated_ids = [row[0] for row in updated_rows]
+            updated_consultations = [{
+                'id': consultation['id'],
+                'patient_name': consultation['patient__name'],
+                'doctor_name': consultation['doctor__name'],
+                'scheduled_date': consultation['scheduled_date'],
+                'scheduled_time': consultation['scheduled_time'],
+                'hours_overdue': (now - consultation['scheduled_at']).total_seconds() / 3600
+            } for consultation in Consultation.objects.filter(id__in=updated_ids).values(
+                'id', 'patient__name', 'doctor__name', 'scheduled_date', 'scheduled_time', 'scheduled_at'
+            ).order_by('scheduled_at')]
+            
+            transaction.on_commit(
+                lambda: ConsultationAutoCompletionService._notify_completed(updated_rows, now)
+            )
+            
+            logger.info(
+                f'Auto-completed {len(updated_rows)} consultation(s) scheduled before {cutoff_time.isoformat()}'
+            )
             
             return {
                 'success': True,
-                'message': f'Successfully marked {updated_count} consultation(s) as completed',
-                'updated_count': updated_count,
+                'message': f'Successfully marked {len(updated_rows)} consultation(s) as completed',
+                'updated_count': len(updated_rows),
                 'overdue_consultations': updated_consultations
             }
             
@@ -871,6 +1019,15 @@ class ConsultationAutoCompletionService:
                 'updated_count': 0
             }
     
+    @staticmethod
+    def _notify_completed(rows, completed_at):
+        """Send one consultation_notification per subscribed group, as one batch"""
+        notify_consultation_batch(rows, {
+            'type': 'consultations_auto_completed',
+            'status': 'completed',
+            'timestamp': completed_at.isoformat()
+        })
+    
     @staticmethod
     def get_overdue_consultations(hours_overdue=0, status_filter='scheduled'):
         """
@@ -885,7 +1042,6 @@ class ConsultationAutoCompletionService:
         """
         try:
             from django.utils import timezone
-            from django.db.models import Q
             
             # Get current time
             now = timezone.now()
@@ -894,46 +1050,21 @@ class ConsultationAutoCompletionService:
             cutoff_time = now - timedelta(hours=hours_overdue)
             
             # Find scheduled consultations that have passed their scheduled time
-            # Handle timezone properly - convert to local timezone for comparison
-            import pytz
-            local_tz = pytz.timezone('Asia/Kolkata')  # IST timezone
-            local_now = now.astimezone(local_tz)
-            
             overdue_consultations = Consultation.objects.filter(
-                status='scheduled'  # Only scheduled consultations can be overdue
-            ).filter(
-                Q(scheduled_date__lt=local_now.date()) |  # Past dates
-                Q(scheduled_date=local_now.date(), scheduled_time__lt=local_now.time())  # Today but past time
-            ).select_related('patient', 'doctor')
-            
-            print(f'🔍 ConsultationService.get_overdue_consultations: Found {overdue_consultations.count()} overdue consultations')
+                status=status_filter,
+                scheduled_at__lt=cutoff_time
+            ).select_related('patient', 'doctor').order_by('scheduled_at')
             
             # Build the response list
-            overdue_list = []
-            for consultation in overdue_consultations:
-                # Create scheduled datetime
-                scheduled_datetime = datetime.combine(
-                    consultation.scheduled_date,
-                    consultation.scheduled_time
-                )
-                
-                # Convert to timezone-aware datetime if needed
-                if timezone.is_naive(scheduled_datetime):
-                    scheduled_datetime = timezone.make_aware(scheduled_datetime)
-                
-                # Check if consultation is overdue
-                if scheduled_datetime < cutoff_time:
-                    overdue_list.append({
-                        'id': consultation.id,
-                        'patient_name': consultation.patient.name,
-                        'doctor_name': consultation.doctor.name,
-                        'scheduled_date': consultation.scheduled_date,
-                        'scheduled_time': consultation.scheduled_time,
-                        'status': consultation.status,
-                        'hours_overdue': (timezone.now() - scheduled_datetime).total_seconds() / 3600
-                    })
-            
-            return overdue_list
+            return [{
+                'id': consultation.id,
+                'patient_name': consultation.patient.name,
+                'doctor_name': consultation.doctor.name,
+                'scheduled_date': consultation.scheduled_date,
+                'scheduled_time': consultation.scheduled_time,
+                'status': consultation.status,
+                'hours_overdue': (now - consultation.scheduled_at).total_seconds() / 3600
+            } for consultation in overdue_consultations]
             
         except Exception as e:
             logger.error(f'Error in get_overdue_consultations: {str(e)}')
@@ -1,156 +1,117 @@
 """
-Signals for automatic file upload to DigitalOcean Spaces
+Real-time consultation notifications.
+
+Events go through utils.event_bus: they are sent after the transaction
+commits, deduplicated per consultation and batched per request. Target
+groups (see groups.py) are derived from the foreign key ids; names are only
+loaded when the event is actually sent.
 """
 
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-import json
+from utils import event_bus
+from .groups import consultation_groups, doctor_group
 from .models import Consultation, ConsultationNote, ConsultationVitalSigns, ConsultationDiagnosis
+from .realtime import consultation_delta
+
+
+def notification(data):
+    # Forwarded by ConsultationConsumer.consultation_notification
+    return event_bus.group_message('consultation_notification', data, 'consultation_update')
 
-channel_layer = get_channel_layer()
 
 @receiver(post_save, sender=Consultation)
 def consultation_status_change_notification(sender, instance, created, **kwargs):
     """Send real-time notification when consultation status changes"""
-    if created:
-        # New consultation created
+    timestamp = timezone.now().isoformat()
+
+    def build():
         notification_data = {
-            'type': 'consultation_created',
+            'type': 'consultation_created' if created else 'consultation_updated',
             'consultation_id': instance.id,
             'patient_name': instance.patient.name,
             'doctor_name': instance.doctor.name,
-            'scheduled_date': instance.scheduled_date.isoformat(),
-            'scheduled_time': instance.scheduled_time.isoformat(),
-            'status': instance.status,
-            'timestamp': timezone.now().isoformat()
         }
-    else:
-        # Consultation updated
-        notification_data = {
-            'type': 'consultation_updated',
-            'consultation_id': instance.id,
-            'patient_name': instance.patient.name,
-            'doctor_name': instance.doctor.name,
+        if created:
+            notification_data.update({
+                'scheduled_date': instance.scheduled_date.isoformat(),
+                'scheduled_time': instance.scheduled_time.isoformat(),
+            })
+        notification_data.update({
             'status': instance.status,
-            'timestamp': timezone.now().isoformat()
-        }
-    
-    # Send to doctor's personal channel
-    doctor_channel = f"doctor_{instance.doctor.id}"
-    async_to_sync(channel_layer.group_send)(
-        doctor_channel,
-        {
-            'type': 'consultation_notification',
-            'message': notification_data
-        }
-    )
-    
-    # Send to patient's personal channel
-    patient_channel = f"patient_{instance.patient.id}"
-    async_to_sync(channel_layer.group_send)(
-        patient_channel,
-        {
-            'type': 'consultation_notification',
-            'message': notification_data
-        }
-    )
+            'timestamp': timestamp
+        })
+        # Full list row and cursor, so dashboards can apply the delta without polling
+        try:
+            notification_data.update(consultation_delta(instance))
+        except Consultation.DoesNotExist:
+            pass
+        return notification(notification_data)
+
+    # Repeated updates of one consultation in a request collapse to one event
+    key = ('consultation', instance.id, 'created' if created else 'updated')
+    event_bus.publish(consultation_groups(instance), build, key=key)
 
 @receiver(post_save, sender=ConsultationNote)
 def consultation_note_notification(sender, instance, created, **kwargs):
     """Send notification when consultation notes are added"""
     if created:
-        notification_data = {
-            'type': 'consultation_note_added',
-            'consultation_id': instance.consultation.id,
-            'note_type': instance.note_type,
-            'created_by': instance.created_by.name,
-            'timestamp': timezone.now().isoformat()
-        }
-        
-        # Send to doctor
-        doctor_channel = f"doctor_{instance.consultation.doctor.id}"
-        async_to_sync(channel_layer.group_send)(
-            doctor_channel,
-            {
-                'type': 'consultation_notification',
-                'message': notification_data
-            }
+        timestamp = timezone.now().isoformat()
+        event_bus.publish(
+            doctor_group(instance.consultation.doctor_id),
+            lambda: notification({
+                'type': 'consultation_note_added',
+                'consultation_id': instance.consultation_id,
+                'note_type': instance.note_type,
+                'created_by': instance.created_by.name,
+                'timestamp': timestamp
+            })
         )
 
 @receiver(post_save, sender=ConsultationVitalSigns)
 def vital_signs_notification(sender, instance, created, **kwargs):
     """Send notification when vital signs are recorded"""
     if created:
-        notification_data = {
-            'type': 'vital_signs_recorded',
-            'consultation_id': instance.consultation.id,
-            'patient_name': instance.consultation.patient.name,
-            'recorded_by': instance.recorded_by.name if instance.recorded_by else 'System',
-            'timestamp': timezone.now().isoformat()
-        }
-        
-        # Send to doctor
-        doctor_channel = f"doctor_{instance.consultation.doctor.id}"
-        async_to_sync(channel_layer.group_send)(
-            doctor_channel,
-            {
-                'type': 'consultation_notification',
-                'message': notification_data
-            }
+        timestamp = timezone.now().isoformat()
+        event_bus.publish(
+            doctor_group(instance.consultation.doctor_id),
+            lambda: notification({
+                'type': 'vital_signs_recorded',
+                'consultation_id': instance.consultation_id,
+                'patient_name': instance.consultation.patient.name,
+                'recorded_by': instance.recorded_by.name if instance.recorded_by else 'System',
+                'timestamp': timestamp
+            })
         )
 
 @receiver(post_save, sender=ConsultationDiagnosis)
 def diagnosis_notification(sender, instance, created, **kwargs):
     """Send notification when diagnosis is added"""
     if created:
-        notification_data = {
-            'type': 'diagnosis_added',
-            'consultation_id': instance.consultation.id,
-            'diagnosis': instance.diagnosis,
-            'diagnosis_type': instance.diagnosis_type,
-            'timestamp': timezone.now().isoformat()
-        }
-        
-        # Send to doctor
-        doctor_channel = f"doctor_{instance.consultation.doctor.id}"
-        async_to_sync(channel_layer.group_send)(
-            doctor_channel,
-            {
-                'type': 'consultation_notification',
-                'message': notification_data
-            }
+        event_bus.publish(
+            doctor_group(instance.consultation.doctor_id),
+            notification({
+                'type': 'diagnosis_added',
+                'consultation_id': instance.consultation_id,
+                'diagnosis': instance.diagnosis,
+                'diagnosis_type': instance.diagnosis_type,
+                'timestamp': timezone.now().isoformat()
+            })
         )
 
 @receiver(post_delete, sender=Consultation)
 def consultation_deleted_notification(sender, instance, **kwargs):
     """Send notification when consultation is deleted"""
-    notification_data = {
-        'type': 'consultation_deleted',
-        'consultation_id': instance.id,
-        'patient_name': instance.patient.name,
-        'doctor_name': instance.doctor.name,
-        'timestamp': timezone.now().isoformat()
-    }
-    
-    # Send to doctor's personal channel
-    doctor_channel = f"doctor_{instance.doctor.id}"
-    async_to_sync(channel_layer.group_send)(
-        doctor_channel,
-        {
-            'type': 'consultation_notification',
-            'message': notification_data
-        }
+    # Built now: related rows may be gone once the transaction commits
+    event_bus.publish(
+        consultation_groups(instance),
+        notification({
+            'type': 'consultation_deleted',
+            'consultation_id': instance.id,
+            'patient_name': instance.patient.name,
+            'doctor_name': instance.doctor.name,
+            'timestamp': timezone.now().isoformat()
+        }),
+        key=('consultation', instance.id, 'deleted')
     )
-    
-    # Send to patient's personal channel
-    patient_channel = f"patient_{instance.patient.id}"
-    async_to_sync(channel_layer.group_send)(
-        patient_channel,
-        {
-            'type': 'consultation_notification',
-            'message': notification_data
-        }
-    ) 
\ No newline at end of file
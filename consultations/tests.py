@@ -1,3 +1,390 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from utils import fast_json
+from .models import Consultation, scheduled_between
+
+User = get_user_model()
+
+
+class ConsultationScheduledAtTest(TestCase):
+    """Test cases for the denormalized scheduled_at column"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(phone='+911000000001', name='Doctor', role='doctor')
+        self.patient = User.objects.create_user(phone='+911000000002', name='Patient', role='patient')
+
+    def _create(self, scheduled_date, scheduled_time):
+        return Consultation.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            scheduled_date=scheduled_date,
+            scheduled_time=scheduled_time,
+            chief_complaint='Fever',
+            consultation_fee=500
+        )
+
+    def test_scheduled_at_maintained_on_save(self):
+        """scheduled_at follows scheduled_date/scheduled_time in local time"""
+        consultation = self._create('2025-01-10', '09:30:00')
+        self.assertEqual(consultation.scheduled_at, consultation.scheduled_datetime)
+
+        consultation.scheduled_time = datetime.time(11, 0)
+        consultation.save(update_fields=['scheduled_time'])
+        consultation.refresh_from_db()
+        self.assertEqual(timezone.localtime(consultation.scheduled_at).time(), datetime.time(11, 0))
+
+    def test_scheduled_between_uses_local_days(self):
+        """Date range filters include the whole local day"""
+        self._create(datetime.date(2025, 1, 10), datetime.time(0, 15))
+        self._create(datetime.date(2025, 1, 10), datetime.time(23, 45))
+        self._create(datetime.date(2025, 1, 11), datetime.time(0, 5))
+
+        day = Consultation.objects.filter(scheduled_between('2025-01-10', '2025-01-10'))
+        self.assertEqual(day.count(), 2)
+        self.assertEqual(Consultation.objects.filter(scheduled_between(date_from=datetime.date(2025, 1, 11))).count(), 1)
+
+
+class OverdueAutoCompletionTest(TestCase):
+    """Test cases for set-based overdue auto-completion"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(phone='+911000000003', name='Doctor', role='doctor')
+        self.patient = User.objects.create_user(phone='+911000000004', name='Patient', role='patient')
+        now = timezone.localtime()
+        for hours in (-5, -4, -3, 3):
+            scheduled = now + datetime.timedelta(hours=hours)
+            Consultation.objects.create(
+                patient=self.patient,
+                doctor=self.doctor,
+                scheduled_date=scheduled.date(),
+                scheduled_time=scheduled.time().replace(microsecond=0),
+                chief_complaint='Fever',
+                consultation_fee=500
+            )
+
+    def test_completes_overdue_in_batches(self):
+        """Only overdue consultations are completed, across several batches"""
+        from unittest import mock
+        from .services import ConsultationAutoCompletionService
+
+        with mock.patch.object(ConsultationAutoCompletionService, '_notify_completed') as notify, \
+                self.captureOnCommitCallbacks(execute=True):
+            result = ConsultationAutoCompletionService.check_and_complete_overdue_consultations(
+                hours_overdue=1, batch_size=2
+            )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['updated_count'], 3)
+        self.assertEqual(Consultation.objects.filter(status='completed', actual_end_time__isnull=False).count(), 3)
+        self.assertEqual(Consultation.objects.filter(status='scheduled').count(), 1)
+        notify.assert_called_once()
+
+
+class ConsultationKeysetPaginationTest(TestCase):
+    """Test cases for cursor pagination over consultations"""
+
+    def setUp(self):
+        doctor = User.objects.create_user(phone='+911000000005', name='Doctor', role='doctor')
+        patient = User.objects.create_user(phone='+911000000006', name='Patient', role='patient')
+        for day, hour in [(10, 9), (10, 9), (10, 11), (11, 9), (12, 9), (12, 9), (12, 10)]:
+            Consultation.objects.create(
+                patient=patient,
+                doctor=doctor,
+                scheduled_date=datetime.date(2025, 1, day),
+                scheduled_time=datetime.time(hour, 0),
+                chief_complaint='Fever',
+                consultation_fee=500
+            )
+
+    def test_walks_all_pages_in_order(self):
+        """Following next and previous cursors visits every row once"""
+        from utils.pagination import KeysetPaginator
+
+        ordering = ('-scheduled_date', '-scheduled_time', 'id')
+        expected = list(Consultation.objects.order_by(*ordering).values_list('id', flat=True))
+        paginator = KeysetPaginator(ordering, page_size=3)
+
+        pages, cursor = [], None
+        while True:
+            rows, cursor, previous = paginator.paginate(Consultation.objects.all(), cursor)
+            pages.append([row.id for row in rows])
+            if cursor is None:
+                break
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+        rows, _, _ = paginator.paginate(Consultation.objects.all(), previous)
+        self.assertEqual([row.id for row in rows], pages[-2])
+
+
+class ConsultationEventBusTest(TestCase):
+    """Test cases for transaction-batched consultation websocket events"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(phone='+911000000007', name='Doctor', role='doctor')
+        self.patient = User.objects.create_user(phone='+911000000008', name='Patient', role='patient')
+
+    def _create(self):
+        return Consultation.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            scheduled_date='2025-01-10',
+            scheduled_time='09:30:00',
+            chief_complaint='Fever',
+            consultation_fee=500
+        )
+
+    def test_events_batched_and_deduplicated(self):
+        """Saves in one request produce one send with one event per consultation and kind"""
+        from unittest import mock
+        from utils import event_bus
+
+        with mock.patch.object(event_bus, 'send') as send, event_bus.batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                consultation = self._create()
+                for status in ('in_progress', 'completed'):
+                    consultation.status = status
+                    consultation.save()
+            send.assert_not_called()
+
+        send.assert_called_once()
+        events = send.call_args.args[0]
+        self.assertEqual(len(events), 2)
+        groups, build = events[-1]
+        self.assertEqual(groups, (
+            f'consultations_doctor_{self.doctor.id}', f'consultations_patient_{self.patient.id}', 'consultations_all'
+        ))
+        frame = fast_json.loads(build()['text'])
+        self.assertEqual(frame['type'], 'consultation_update')
+        self.assertEqual(frame['data']['type'], 'consultation_updated')
+        self.assertEqual(frame['data']['status'], 'completed')
+
+    def test_rolled_back_events_not_sent(self):
+        from unittest import mock
+        from django.db import transaction
+        from utils import event_bus
+
+        with mock.patch.object(event_bus, 'send') as send, event_bus.batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        self._create()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        send.assert_not_called()
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_batch_delivers_over_channel_layer(self):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from utils import event_bus
+
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f'consultations_patient_{self.patient.id}', channel)
+
+        with event_bus.batch(), self.captureOnCommitCallbacks(execute=True):
+            self._create()
+        message = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(message['type'], 'consultation_notification')
+        self.assertEqual(fast_json.loads(message['text'])['data']['type'], 'consultation_created')
+
+
+class ConsultationSubscriptionTest(TestCase):
+    """Test cases for role-scoped consultation socket subscriptions"""
+
+    def setUp(self):
+        from eclinic.models import Clinic
+        self.doctor = User.objects.create_user(phone='+911000000009', name='Doctor', role='doctor')
+        self.patient = User.objects.create_user(phone='+911000000010', name='Patient', role='patient')
+        self.admin = User.objects.create_user(phone='+911000000011', name='Admin', role='admin')
+        self.clinic = Clinic.objects.create(name='Clinic', clinic_type='virtual_clinic', admin=self.admin,
+                                            registration_number='SUB1')
+
+    def test_subscription_groups_by_role(self):
+        from .groups import subscription_groups
+        self.assertEqual(subscription_groups(self.doctor), [f'consultations_doctor_{self.doctor.id}'])
+        self.assertEqual(subscription_groups(self.patient), [f'consultations_patient_{self.patient.id}'])
+        self.assertEqual(subscription_groups(self.admin), [f'consultations_clinic_{self.clinic.id}'])
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_consumer_receives_only_its_consultations(self):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from channels.testing import WebsocketCommunicator
+        from websockets.consumers import ConsultationConsumer
+        from utils import event_bus
+        other_patient = User.objects.create_user(phone='+911000000012', name='Other', role='patient')
+
+        def create_consultations():
+            with event_bus.batch(), self.captureOnCommitCallbacks(execute=True):
+                for patient, clinic in ((other_patient, None), (self.patient, self.clinic)):
+                    Consultation.objects.create(
+                        patient=patient, doctor=self.doctor, clinic=clinic, scheduled_date='2025-01-10',
+                        scheduled_time='09:30:00', chief_complaint='Fever', consultation_fee=500
+                    )
+
+        async def scenario():
+            communicator = WebsocketCommunicator(ConsultationConsumer.as_asgi(), '/ws/consultations/')
+            communicator.scope['user'] = self.admin
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await sync_to_async(create_consultations)()
+            message = await communicator.receive_json_from()
+            self.assertTrue(await communicator.receive_nothing())
+            await communicator.disconnect()
+            return message
+
+        message = async_to_sync(scenario)()
+        self.assertEqual(message['type'], 'consultation_update')
+        self.assertEqual(message['data']['patient_name'], 'Patient')
+
+
+class DoctorRealtimeFeedTest(TestCase):
+    """Test cases for the doctor dashboard snapshot and since=<cursor> deltas"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.doctor = User.objects.create_user(phone='+911000000013', name='Doctor', role='doctor')
+        self.patient = User.objects.create_user(phone='+911000000014', name='Patient', role='patient')
+        today = timezone.localdate()
+        self.consultations = [Consultation.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            scheduled_date=today + datetime.timedelta(days=days),
+            scheduled_time=datetime.time(10, 0),
+            chief_complaint='Fever',
+            consultation_fee=500
+        ) for days in (0, 1)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor)
+        self.url = reverse('consultations:doctor-consultation-real-time-updates')
+
+    def _settle(self):
+        """Age every row past the lookback window"""
+        from consultations.realtime import LOOKBACK
+        Consultation.objects.update(updated_at=timezone.now() - LOOKBACK * 2)
+
+    def test_snapshot_then_changes_since_cursor(self):
+        self._settle()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(len(data['today_consultations']), 1)
+        self.assertEqual(len(data['upcoming_consultations']), 2)
+
+        response = self.client.get(self.url, {'since': data['cursor']})
+        self.assertEqual(response.json()['data']['changes'], [])
+
+        consultation = self.consultations[1]
+        consultation.status = 'cancelled'
+        consultation.save()
+        changes = self.client.get(self.url, {'since': data['cursor']}).json()['data']
+        self.assertEqual([row['id'] for row in changes['changes']], [consultation.id])
+        self.assertEqual(changes['changes'][0]['status'], 'cancelled')
+        # Recent rows are read again until they settle
+        again = self.client.get(self.url, {'since': changes['cursor']}).json()['data']
+        self.assertEqual([row['id'] for row in again['changes']], [consultation.id])
+        self._settle()
+        settled = self.client.get(self.url, {'since': changes['cursor']}).json()['data']
+        self.assertEqual(self.client.get(self.url, {'since': settled['cursor']}).json()['data']['changes'], [])
+
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+    def test_changes_page_through_equal_timestamps(self):
+        from unittest import mock
+        from consultations import realtime
+        self._settle()
+        cursor = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        seen = []
+        with mock.patch.object(realtime, 'MAX_CHANGES', 1):
+            for _ in range(3):
+                data = self.client.get(self.url, {'since': cursor}).json()['data']
+                seen.extend(row['id'] for row in data['changes'])
+                cursor = data['cursor']
+        self.assertEqual(sorted(seen), sorted(c.id for c in self.consultations))
+
+    def test_update_events_carry_delta(self):
+        from unittest import mock
+        from utils import event_bus
+
+        consultation = self.consultations[0]
+        with mock.patch.object(event_bus, 'send') as send, event_bus.batch():
+            with self.captureOnCommitCallbacks(execute=True):
+                consultation.status = 'in_progress'
+                consultation.save()
+        _, build = send.call_args.args[0][0]
+        message = fast_json.loads(build()['text'])['data']
+        self.assertEqual(message['consultation']['status'], 'in_progress')
+        # Held back so transactions committing late are still picked up
+        updated_at = Consultation.objects.get(id=consultation.id).updated_at
+        self.assertLess(parse_datetime(message['cursor']), updated_at)
+
+
+class ConsultationBulkTransitionTest(TestCase):
+    """Test cases for set-based bulk consultation actions"""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(phone='+911000000014', name='Doctor', role='doctor')
+        self.other_doctor = User.objects.create_user(phone='+911000000015', name='Other', role='doctor')
+        self.patient = User.objects.create_user(phone='+911000000016', name='Patient', role='patient')
+        self.consultations = [self._create(self.doctor, f'{9 + hour:02d}:00:00') for hour in range(3)]
+        self.foreign = self._create(self.other_doctor, '09:00:00')
+
+    def _create(self, doctor, scheduled_time):
+        return Consultation.objects.create(
+            patient=self.patient,
+            doctor=doctor,
+            scheduled_date='2025-01-10',
+            scheduled_time=scheduled_time,
+            chief_complaint='Fever',
+            consultation_fee=500
+        )
+
+    def test_start_guards_source_state_and_reports_per_id(self):
+        from unittest import mock
+        from utils import event_bus
+        from .services import ConsultationService
+
+        first, second, third = self.consultations
+        Consultation.objects.filter(id=third.id).update(status='completed')
+        ids = [first.id, second.id, third.id, self.foreign.id, 'CON999999']
+
+        with mock.patch.object(event_bus, 'send') as send, self.captureOnCommitCallbacks(execute=True):
+            # Select + UPDATE inside a savepoint, then one status lookup
+            with self.assertNumQueries(5):
+                results = ConsultationService.bulk_transition(self.doctor, ids, 'start')
+
+        self.assertEqual([result['status'] for result in results], ['success', 'success', 'error', 'error', 'error'])
+        self.assertEqual(results[2]['message'], 'Only scheduled consultations can be started')
+        self.assertEqual(results[3]['message'], 'Consultation not found')
+        statuses = dict(Consultation.objects.values_list('id', 'status'))
+        self.assertEqual([statuses[first.id], statuses[second.id]], ['in_progress', 'in_progress'])
+        self.assertEqual(statuses[self.foreign.id], 'scheduled')
+        self.assertIsNotNone(Consultation.objects.get(id=first.id).actual_start_time)
+
+        # One consolidated event per group instead of one per consultation
+        send.assert_called_once()
+        events = dict(
+            (groups[0], fast_json.loads(message['text'])['data']) for groups, message in send.call_args.args[0]
+        )
+        self.assertEqual(events[f'consultations_doctor_{self.doctor.id}']['consultation_ids'], [first.id, second.id])
+        self.assertEqual(events['consultations_all']['type'], 'consultations_bulk_updated')
+
+    def test_cancel_sets_reason_and_skips_finished(self):
+        from .services import ConsultationService
+
+        first, second, _ = self.consultations
+        Consultation.objects.filter(id=second.id).update(status='cancelled')
+        results = ConsultationService.bulk_transition(self.doctor, [first.id, second.id], 'cancel', reason='Leave')
+
+        self.assertEqual([result['status'] for result in results], ['success', 'error'])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.cancellation_reason, first.cancelled_by_id),
+                         ('cancelled', 'Leave', self.doctor.id))
+        self.assertIsNotNone(first.cancelled_at)
@@ -3,8 +3,9 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import BasePermission
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from django.utils import timezone
 from django.db.models import Q, Count, Avg, Sum
 from django.shortcuts import get_object_or_404
@@ -18,7 +19,7 @@ from authentication.models import User
 from .models import (
     Consultation, ConsultationSymptom, ConsultationDiagnosis, 
     ConsultationVitalSigns, ConsultationAttachment, ConsultationNote,
-    ConsultationReschedule, ConsultationReceipt
+    ConsultationReschedule, ConsultationReceipt, local_day_start, scheduled_between
 )
 from .serializers import (
     ConsultationSerializer, ConsultationCreateSerializer, ConsultationUpdateSerializer,
@@ -35,13 +36,19 @@ from .serializers import (
 )
 from doctors.serializers import DoctorSlotSerializer
 from .services import WhatsAppNotificationService, ConsultationService, ConsultationAnalyticsService, ConsultationAutoCompletionService
+from .realtime import InvalidCursor, doctor_changes, doctor_snapshot
+from utils.pagination import (
+    KeysetPageNumberPagination, KeysetPaginator, approximate_count,
+    wants_cursor_pagination, wants_approximate_count
+)
 
 
-class ConsultationPagination(PageNumberPagination):
-    """Custom pagination for consultation lists"""
+class ConsultationPagination(KeysetPageNumberPagination):
+    """Custom pagination for consultation lists (?pagination=cursor for keyset paging)"""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_ordering = ('-scheduled_date', '-scheduled_time', 'id')
 
 
 class IsAdminOrSuperAdmin(BasePermission):
@@ -117,7 +124,7 @@ class PatientConsultationView(APIView):
                 from datetime import datetime
                 start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
                 print(f"🔍 Start date object: {start_date_obj}")
-                queryset = queryset.filter(scheduled_date__gte=start_date_obj)
+                queryset = queryset.filter(scheduled_between(date_from=start_date_obj))
                 print(f"🔍 After start date filter, queryset count: {queryset.count()}")
             except ValueError:
                 return Response({
@@ -134,7 +141,7 @@ class PatientConsultationView(APIView):
                 from datetime import datetime
                 end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
                 print(f"🔍 End date object: {end_date_obj}")
-                queryset = queryset.filter(scheduled_date__lte=end_date_obj)
+                queryset = queryset.filter(scheduled_between(date_to=end_date_obj))
                 print(f"🔍 After end date filter, queryset count: {queryset.count()}")
             except ValueError:
                 return Response({
@@ -359,7 +366,7 @@ class ConsultationViewSet(ModelViewSet):
             try:
                 from datetime import datetime
                 start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-                queryset = queryset.filter(scheduled_date__gte=start_date_obj)
+                queryset = queryset.filter(scheduled_between(date_from=start_date_obj))
             except ValueError:
                 pass  # Invalid date format, ignore filter
         
@@ -367,44 +374,25 @@ class ConsultationViewSet(ModelViewSet):
             try:
                 from datetime import datetime
                 end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-                queryset = queryset.filter(scheduled_date__lte=end_date_obj)
+                queryset = queryset.filter(scheduled_between(date_to=end_date_obj))
             except ValueError:
                 pass  # Invalid date format, ignore filter
         
         # Filter upcoming consultations
         upcoming_only = request.query_params.get('upcoming', '').lower() == 'true'
         if upcoming_only:
-            from datetime import datetime, timedelta
-            now = timezone.now()
-            # Get consultations scheduled for today and future dates
-            queryset = queryset.filter(
-                scheduled_date__gte=now.date()
-            ).filter(
-                # For today's consultations, check if time hasn't passed
-                Q(scheduled_date__gt=now.date()) |
-                Q(scheduled_date=now.date(), scheduled_time__gte=now.time())
-            )
+            # Consultations whose scheduled time has not passed yet
+            queryset = queryset.filter(scheduled_at__gte=timezone.now())
         
         # Filter by status
         status_filter = request.query_params.get('status')
         if status_filter:
             if status_filter == 'overdue':
-                # For overdue filter, find consultations that are past their scheduled time
-                # regardless of their static status
-                from datetime import datetime
-                now = timezone.now()
-                
-                # Get scheduled consultations that have passed their scheduled time (overdue)
-                # Need to handle timezone properly - convert to local timezone for comparison
-                import pytz
-                local_tz = pytz.timezone('Asia/Kolkata')  # IST timezone
-                local_now = now.astimezone(local_tz)
-                
+                # For overdue filter, find scheduled consultations that are past
+                # their scheduled time regardless of their static status
                 queryset = queryset.filter(
-                    status='scheduled'  # Only scheduled consultations can be overdue
-                ).filter(
-                    Q(scheduled_date__lt=local_now.date()) |
-                    Q(scheduled_date=local_now.date(), scheduled_time__lt=local_now.time())
+                    status='scheduled',  # Only scheduled consultations can be overdue
+                    scheduled_at__lt=timezone.now()
                 )
             else:
                 queryset = queryset.filter(status=status_filter)
@@ -525,7 +513,7 @@ class ConsultationViewSet(ModelViewSet):
         # Apply date filter if provided
         date_filter = request.query_params.get('date')
         if date_filter:
-            consultations = consultations.filter(scheduled_date=date_filter)
+            consultations = consultations.filter(scheduled_between(date_filter, date_filter))
         
         serializer = ConsultationListSerializer(consultations, many=True)
         
@@ -1173,7 +1161,7 @@ class SuperAdminConsultationManagementView(APIView):
             if start_date:
                 try:
                     start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-                    queryset = queryset.filter(scheduled_date__gte=start_date_obj)
+                    queryset = queryset.filter(scheduled_between(date_from=start_date_obj))
                 except ValueError:
                     return Response({
                         'success': False,
@@ -1187,7 +1175,7 @@ class SuperAdminConsultationManagementView(APIView):
             if end_date:
                 try:
                     end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-                    queryset = queryset.filter(scheduled_date__lte=end_date_obj)
+                    queryset = queryset.filter(scheduled_between(date_to=end_date_obj))
                 except ValueError:
                     return Response({
                         'success': False,
@@ -1215,13 +1203,57 @@ class SuperAdminConsultationManagementView(APIView):
                             },
                             'timestamp': timezone.now().isoformat()
                         }, status=status.HTTP_400_BAD_REQUEST)
-                
-                queryset = queryset.order_by(*ordering_fields)
             else:
-                queryset = queryset.order_by('-scheduled_date', '-scheduled_time')
+                ordering_fields = ['-scheduled_date', '-scheduled_time']
+            
+            # Keyset pagination (?pagination=cursor): cost does not grow with depth
+            # and COUNT(*) only runs when asked for with ?count=exact|approximate
+            if wants_cursor_pagination(request):
+                keyset_ordering = ordering_fields + ([] if {'id', '-id'} & set(ordering_fields) else ['id'])
+                paginator = KeysetPaginator(keyset_ordering, page_size)
+                try:
+                    consultations, next_cursor, previous_cursor = paginator.paginate(
+                        queryset, request.query_params.get('cursor')
+                    )
+                except NotFound:
+                    return Response({
+                        'success': False,
+                        'error': {
+                            'code': 'INVALID_CURSOR',
+                            'message': 'Invalid pagination cursor'
+                        },
+                        'timestamp': timezone.now().isoformat()
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                count_mode = request.query_params.get('count')
+                total_count = None
+                if count_mode == 'approximate':
+                    total_count = approximate_count(queryset)
+                elif count_mode == 'exact':
+                    total_count = queryset.count()
+                
+                serializer = ConsultationDetailSerializer(consultations, many=True)
+                current_path = remove_query_param(request.get_full_path(), 'page')
+                
+                return Response({
+                    'success': True,
+                    'results': serializer.data,
+                    'count': total_count,
+                    'page_size': page_size,
+                    'has_next': next_cursor is not None,
+                    'has_previous': previous_cursor is not None,
+                    'next': replace_query_param(current_path, 'cursor', next_cursor) if next_cursor else None,
+                    'previous': replace_query_param(current_path, 'cursor', previous_cursor) if previous_cursor else None,
+                    'message': 'Consultations retrieved successfully',
+                    'timestamp': timezone.now().isoformat()
+                }, status=status.HTTP_200_OK)
+            
+            queryset = queryset.order_by(*ordering_fields)
             
             # Calculate pagination
-            total_count = queryset.count()
+            if wants_approximate_count(request):
+                total_count = approximate_count(queryset)
+            else:
+                total_count = queryset.count()
             start_index = (page - 1) * page_size
             end_index = start_index + page_size
             
@@ -1439,11 +1471,8 @@ class ConsultationSearchView(APIView):
         if search_data.get('payment_status'):
             queryset = queryset.filter(payment_status=search_data['payment_status'])
         
-        if search_data.get('date_from'):
-            queryset = queryset.filter(scheduled_at__date__gte=search_data['date_from'])
-        
-        if search_data.get('date_to'):
-            queryset = queryset.filter(scheduled_at__date__lte=search_data['date_to'])
+        if search_data.get('date_from') or search_data.get('date_to'):
+            queryset = queryset.filter(scheduled_between(search_data.get('date_from'), search_data.get('date_to')))
         
         # Paginate results
         paginator = ConsultationPagination()
@@ -1478,16 +1507,9 @@ class OverdueConsultationsView(APIView):
             now = timezone.now()
             
             # Base query for overdue consultations (scheduled consultations that have passed their time)
-            # Handle timezone properly - convert to local timezone for comparison
-            import pytz
-            local_tz = pytz.timezone('Asia/Kolkata')  # IST timezone
-            local_now = now.astimezone(local_tz)
-            
             overdue_queryset = Consultation.objects.filter(
-                status='scheduled'  # Only scheduled consultations can be overdue
-            ).filter(
-                Q(scheduled_date__lt=local_now.date()) |
-                Q(scheduled_date=local_now.date(), scheduled_time__lt=local_now.time())
+                status='scheduled',  # Only scheduled consultations can be overdue
+                scheduled_at__lt=now
             ).select_related('patient', 'doctor', 'clinic')
             
             print(f'🔍 Checking for overdue consultations at {now} (date: {now.date()}, time: {now.time()})')
@@ -2073,13 +2095,7 @@ def test_consultation_list(request):
         # Filter upcoming consultations if requested
         upcoming_only = request.query_params.get('upcoming', '').lower() == 'true'
         if upcoming_only:
-            consultations = consultations.filter(
-                scheduled_date__gte=now.date()
-            ).filter(
-                # For today's consultations, check if time hasn't passed
-                Q(scheduled_date__gt=now.date()) |
-                Q(scheduled_date=now.date(), scheduled_time__gte=now.time())
-            )
+            consultations = consultations.filter(scheduled_at__gte=now)
         
         # Filter by status
         status_filter = request.query_params.get('status')
@@ -2548,8 +2564,8 @@ class DoctorConsultationViewSet(ModelViewSet):
         """Get upcoming consultations for the logged-in doctor"""
         upcoming_consultations = self.get_queryset().filter(
             status='scheduled',
-            scheduled_date__gte=timezone.now().date()
-        ).order_by('scheduled_date', 'scheduled_time')
+            scheduled_at__gte=local_day_start(timezone.localdate())
+        ).order_by('scheduled_at')
         
         page = self.paginate_queryset(upcoming_consultations)
         if page is not None:
@@ -2572,28 +2588,28 @@ class DoctorConsultationViewSet(ModelViewSet):
         serializer = self.get_serializer(completed_consultations, many=True)
         return Response(serializer.data)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('since', OpenApiTypes.STR, description='Cursor from a previous response; only consultations changed after it are returned'),
+        ],
+        description="Dashboard snapshot, or with since=<cursor> only the consultations changed after the cursor. "
+                    "Live changes are pushed on ws/consultations/ (send {\"type\": \"snapshot\"} for the snapshot)."
+    )
     @action(detail=False, methods=['get'], url_path='real-time-updates')
     def real_time_updates(self, request):
         """Get real-time consultation updates for the logged-in doctor"""
         try:
-            # Get recent consultations with updates
-            recent_consultations = ConsultationService.get_doctor_consultations(
-                doctor=request.user,
-                date_from=timezone.now().date() - timedelta(days=7)
-            )
-            
-            # Get today's consultations
-            today_consultations = ConsultationService.get_today_consultations(request.user)
-            
-            # Get upcoming consultations
-            upcoming_consultations = ConsultationService.get_upcoming_consultations(request.user, days=3)
-            
-            response_data = {
-                'recent_updates': ConsultationListSerializer(recent_consultations[:10], many=True).data,
-                'today_consultations': ConsultationListSerializer(today_consultations, many=True).data,
-                'upcoming_consultations': ConsultationListSerializer(upcoming_consultations, many=True).data,
-                'last_updated': timezone.now().isoformat()
-            }
+            since = request.query_params.get('since')
+            if since:
+                try:
+                    response_data = doctor_changes(request.user, since)
+                except InvalidCursor as e:
+                    return Response({
+                        'success': False,
+                        'error': str(e)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                response_data = doctor_snapshot(request.user)
             
             return Response({
                 'success': True,
@@ -2725,72 +2741,26 @@ class DoctorConsultationViewSet(ModelViewSet):
                     'error': 'Action type and consultation IDs are required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            consultations = Consultation.objects.filter(
-                id__in=consultation_ids,
-                doctor=request.user
-            )
-            
-            results = []
-            
-            if action_type == 'start':
-                for consultation in consultations:
-                    try:
-                        ConsultationService.start_consultation(consultation)
-                        results.append({
-                            'consultation_id': consultation.id,
-                            'status': 'success',
-                            'message': 'Consultation started'
-                        })
-                    except Exception as e:
-                        results.append({
-                            'consultation_id': consultation.id,
-                            'status': 'error',
-                            'message': str(e)
-                        })
-            
-            elif action_type == 'complete':
-                for consultation in consultations:
-                    try:
-                        ConsultationService.complete_consultation(consultation)
-                        results.append({
-                            'consultation_id': consultation.id,
-                            'status': 'success',
-                            'message': 'Consultation completed'
-                        })
-                    except Exception as e:
-                        results.append({
-                            'consultation_id': consultation.id,
-                            'status': 'error',
-                            'message': str(e)
-                        })
-            
-            elif action_type == 'cancel':
-                reason = request.data.get('reason', '')
-                for consultation in consultations:
-                    try:
-                        ConsultationService.cancel_consultation(
-                            consultation=consultation,
-                            cancelled_by=request.user,
-                            reason=reason
-                        )
-                        results.append({
-                            'consultation_id': consultation.id,
-                            'status': 'success',
-                            'message': 'Consultation cancelled'
-                        })
-                    except Exception as e:
-                        results.append({
-                            'consultation_id': consultation.id,
-                            'status': 'error',
-                            'message': str(e)
-                        })
-            
-            else:
+            if action_type not in ConsultationService.BULK_TRANSITIONS:
                 return Response({
                     'success': False,
                     'error': 'Invalid action type'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
+            if not isinstance(consultation_ids, list):
+                return Response({
+                    'success': False,
+                    'error': 'consultation_ids must be a list'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # One guarded UPDATE for the whole selection, one event per socket group
+            results = ConsultationService.bulk_transition(
+                doctor=request.user,
+                consultation_ids=consultation_ids,
+                action=action_type,
+                reason=request.data.get('reason', '')
+            )
+            
             return Response({
                 'success': True,
                 'data': {
@@ -3227,7 +3197,7 @@ class ConsultationManagementView(APIView):
             if date_filter:
                 try:
                     filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-                    queryset = queryset.filter(scheduled_date=filter_date)
+                    queryset = queryset.filter(scheduled_between(filter_date, filter_date))
                 except ValueError:
                     return Response({
                         'success': False,
@@ -69,13 +69,19 @@ fi
 # Stop any existing gunicorn processes
 print_status "Stopping any existing gunicorn processes..."
 pkill -f gunicorn || true
+pkill -f otp_delivery_worker || true
 
 # Wait a moment for processes to stop
 sleep 2
 
 # Start gunicorn server
-print_status "Starting gunicorn server..."
-gunicorn --config gunicorn.conf.py myproject.wsgi:application &
+# SERVER_MODE=asgi switches to uvicorn workers (see gunicorn.conf.py)
+print_status "Starting gunicorn server (${SERVER_MODE:-wsgi} mode)..."
+gunicorn --config gunicorn.conf.py &
+
+# OTP SMS and OTP audit writes are queued in Redis and handled by this worker
+print_status "Starting OTP delivery worker..."
+nohup python manage.py otp_delivery_worker > logs/otp_delivery_worker.log 2>&1 &
 
 # Wait for server to start
 sleep 3
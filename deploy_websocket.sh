@@ -50,6 +50,7 @@ echo ""
 echo "📋 Next steps:"
 echo "1. Start the server with: python manage.py runserver"
 echo "2. For production, use Daphne: daphne -b 0.0.0.0 -p 8000 myproject.asgi:application"
+echo "   or gunicorn with uvicorn workers: SERVER_MODE=asgi gunicorn --config gunicorn.conf.py"
 echo "3. Test WebSocket connection at: ws://localhost:8000/ws/doctor-status/"
 echo ""
 echo "🔗 WebSocket endpoints:"
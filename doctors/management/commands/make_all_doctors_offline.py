@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from doctors.models import DoctorStatus
+from doctors.status_stats import invalidate_doctor_status_stats
 from django.utils import timezone
 import logging
 
@@ -29,6 +30,8 @@ class Command(BaseCommand):
                 status_updated_at=current_time,
                 status_note='Marked offline by admin command'
             )
+            # update() skips post_save
+            invalidate_doctor_status_stats()
             
             self.stdout.write(
                 self.style.SUCCESS(
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from doctors.slot_materializer import DEFAULT_HORIZON_WEEKS, materialize_all_slots, materialize_doctor_slots
+
+
+# Cron (nightly at 01:00):
+# 0 1 * * * cd /path/to/project && python manage.py materialize_doctor_slots
+class Command(BaseCommand):
+    help = 'Create/remove schedule slots so every doctor has slots for the next N weeks (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--weeks',
+            type=int,
+            default=DEFAULT_HORIZON_WEEKS,
+            help=f'Horizon in weeks from today (default: {DEFAULT_HORIZON_WEEKS})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Parallel workers, each with its own DB connection (default: 4)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50,
+            help='Doctors per worker task (default: 50)'
+        )
+        parser.add_argument(
+            '--doctor',
+            type=int,
+            help='Only materialize this doctor (user ID)'
+        )
+
+    def handle(self, *args, **options):
+        if options['doctor']:
+            result = materialize_doctor_slots(options['doctor'], weeks=options['weeks'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Doctor {options['doctor']}: {result['created']} slots created, {result['deleted']} removed"
+            ))
+            return
+
+        totals = materialize_all_slots(
+            weeks=options['weeks'],
+            workers=max(1, options['workers']),
+            chunk_size=max(1, options['chunk_size'])
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['doctors']} doctors: {totals['created']} slots created, "
+            f"{totals['deleted']} removed, {totals['failed']} failed"
+        ))
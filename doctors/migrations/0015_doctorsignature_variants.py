@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0014_update_all_consultation_durations_to_5'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorsignature',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP derivatives of the signature image'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0015_doctorsignature_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorslot',
+            name='source',
+            field=models.CharField(choices=[('manual', 'Manual'), ('schedule', 'Weekly schedule')], default='manual', editable=False, help_text='Whether the slot was added by hand or materialized from the weekly schedule', max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name='doctorslot',
+            constraint=models.UniqueConstraint(condition=models.Q(('clinic__isnull', True), ('source', 'schedule')), fields=('doctor', 'date', 'start_time', 'end_time'), name='unique_schedule_slot'),
+        ),
+    ]
@@ -162,6 +162,12 @@ class DoctorSchedule(models.Model):
 
 class DoctorSlot(models.Model):
     """Specific time slots for doctor availability (supports multiple slots per day, calendar/month view)"""
+
+    SOURCES = [
+        ('manual', 'Manual'),
+        ('schedule', 'Weekly schedule'),
+    ]
+
     doctor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -187,6 +193,13 @@ class DoctorSlot(models.Model):
         blank=True,
         related_name='booked_slots'
     )
+    source = models.CharField(
+        max_length=10,
+        choices=SOURCES,
+        default='manual',
+        editable=False,
+        help_text="Whether the slot was added by hand or materialized from the weekly schedule"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -195,6 +208,14 @@ class DoctorSlot(models.Model):
         verbose_name = 'Doctor Slot'
         verbose_name_plural = 'Doctor Slots'
         unique_together = ['doctor', 'clinic', 'date', 'start_time', 'end_time']
+        constraints = [
+            # unique_together doesn't cover clinic NULL rows
+            models.UniqueConstraint(
+                fields=['doctor', 'date', 'start_time', 'end_time'],
+                condition=models.Q(clinic__isnull=True, source='schedule'),
+                name='unique_schedule_slot'
+            ),
+        ]
         ordering = ['date', 'start_time']
 
     def __str__(self):
@@ -214,43 +235,31 @@ class DoctorSlot(models.Model):
             end_time: End time of availability (time object)
         
         Returns:
-            List of created DoctorSlot objects
+            List of DoctorSlot objects in the window (existing ones included)
         """
-        from datetime import datetime, timedelta
+        from .slot_materializer import slot_windows
         
-        # Get clinic consultation duration
-        consultation_duration = clinic.consultation_duration  # in minutes
-        
-        # Convert times to datetime for easier manipulation
-        start_datetime = datetime.combine(date, start_time)
-        end_datetime = datetime.combine(date, end_time)
-        
-        slots = []
-        current_time = start_datetime
-        
-        while current_time < end_datetime:
-            slot_end_time = current_time + timedelta(minutes=consultation_duration)
-            
-            # Don't create slot if it would exceed the end time
-            if slot_end_time > end_datetime:
-                break
-            
-            # Create slot
-            slot = cls.objects.create(
+        # Slots that already exist are skipped, so repeated calls are safe
+        cls.objects.bulk_create([
+            cls(
                 doctor=doctor,
                 clinic=clinic,
                 date=date,
-                start_time=current_time.time(),
-                end_time=slot_end_time.time(),
+                start_time=slot_start,
+                end_time=slot_end,
                 is_available=True,
                 is_booked=False
             )
-            slots.append(slot)
-            
-            # Move to next slot
-            current_time = slot_end_time
+            for slot_start, slot_end in slot_windows(start_time, end_time, clinic.consultation_duration)
+        ], ignore_conflicts=True)
         
-        return slots
+        return list(cls.objects.filter(
+            doctor=doctor,
+            clinic=clinic,
+            date=date,
+            start_time__gte=start_time,
+            end_time__lte=end_time
+        ))
 
 
 class DoctorEducation(models.Model):
@@ -549,6 +558,7 @@ class DoctorSignature(models.Model):
     file_path = models.CharField(max_length=500, help_text="Path to the signature file in storage")
     file_name = models.CharField(max_length=200, help_text="Original filename of the signature")
     file_size = models.PositiveIntegerField(help_text="Size of the signature file in bytes")
+    variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP derivatives of the signature image")
     
     # Upload information
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -581,3 +591,8 @@ class DoctorSignature(models.Model):
             print(f"Error getting signed URL: {e}")
             return self.signature_url
 
+    def variant_url(self, size):
+        """Signed URL of a resized WebP variant (the original until it exists)"""
+        from utils.image_derivatives import variant_url
+        return variant_url(self.file_path, self.variants, size)
+
@@ -8,6 +8,8 @@ from .models import (
 )
 from eclinic.models import Clinic
 from utils.signed_urls import get_signed_media_url
+from utils.direct_uploads import DirectUploadFileField
+from utils.image_derivatives import variant_url, variant_urls
 from .models import DoctorStatus
 
 
@@ -19,6 +21,7 @@ class DoctorProfileSerializer(serializers.ModelSerializer):
     experience_years = serializers.ReadOnlyField()
     meeting_link = serializers.SerializerMethodField(read_only=True)
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_urls = serializers.SerializerMethodField()
     signature_url = serializers.SerializerMethodField()
     signature = serializers.FileField(read_only=True)
     # Note: Using 'rating' field from model instead of 'average_rating'
@@ -27,7 +30,7 @@ class DoctorProfileSerializer(serializers.ModelSerializer):
         model = DoctorProfile
         fields = [
             'id', 'user', 'user_name', 'user_phone', 'user_email',
-            'profile_picture', 'signature_url', 'signature',
+            'profile_picture', 'profile_picture_urls', 'signature_url', 'signature',
             'license_number', 'qualification', 'specialization', 'sub_specialization',
             'experience_years', 'consultation_fee', 'online_consultation_fee',
             'languages_spoken', 'bio', 'achievements',
@@ -47,6 +50,10 @@ class DoctorProfileSerializer(serializers.ModelSerializer):
         if obj.user.profile_picture:
             return get_signed_media_url(str(obj.user.profile_picture))
         return None
+
+    def get_profile_picture_urls(self, obj):
+        """Signed URLs for the original and each resized variant"""
+        return variant_urls(obj.user.profile_picture, obj.user.profile_picture_variants)
     
     def get_signature_url(self, obj):
         """Generate signed URL for signature"""
@@ -180,6 +187,7 @@ class DoctorDocumentSerializer(serializers.ModelSerializer):
     """Serializer for doctor documents"""
     doctor_name = serializers.CharField(source='doctor.name', read_only=True)
     verified_by_name = serializers.CharField(source='verified_by.name', read_only=True)
+    file = DirectUploadFileField('doctor_document')
     
     class Meta:
         model = DoctorDocument
@@ -226,12 +234,13 @@ class DoctorListSerializer(serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
     experience_years = serializers.ReadOnlyField()
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_urls = serializers.SerializerMethodField()
     
     class Meta:
         model = DoctorProfile
         fields = [
             'id', 'user', 'user_name', 'user_phone', 'user_email',
-            'profile_picture',
+            'profile_picture', 'profile_picture_urls',
             'license_number', 'qualification', 'specialization', 'sub_specialization',
             'experience_years', 'consultation_fee', 'online_consultation_fee',
             'languages_spoken', 'bio', 'achievements',
@@ -248,18 +257,23 @@ class DoctorListSerializer(serializers.ModelSerializer):
             return get_signed_media_url(str(obj.user.profile_picture))
         return None
 
+    def get_profile_picture_urls(self, obj):
+        """Signed URLs for the original and each resized variant"""
+        return variant_urls(obj.user.profile_picture, obj.user.profile_picture_variants)
+
 
 class PublicDoctorListSerializer(serializers.ModelSerializer):
     """Serializer for public doctor listing (no sensitive information)"""
     name = serializers.CharField(source='user.name', read_only=True)
     experience_years = serializers.ReadOnlyField()
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_urls = serializers.SerializerMethodField()
     consultation_types = serializers.SerializerMethodField()
     
     class Meta:
         model = DoctorProfile
         fields = [
-            'id', 'name', 'profile_picture', 'specialization', 'sub_specialization',
+            'id', 'name', 'profile_picture', 'profile_picture_urls', 'specialization', 'sub_specialization',
             'experience_years', 'consultation_fee', 'online_consultation_fee',
             'languages_spoken', 'bio', 'rating', 'total_reviews', 
             'clinic_name', 'clinic_address', 'consultation_types',
@@ -271,6 +285,10 @@ class PublicDoctorListSerializer(serializers.ModelSerializer):
         if obj.user.profile_picture:
             return get_signed_media_url(str(obj.user.profile_picture))
         return None
+
+    def get_profile_picture_urls(self, obj):
+        """Signed URLs for the original and each resized variant"""
+        return variant_urls(obj.user.profile_picture, obj.user.profile_picture_variants)
     
     def get_consultation_types(self, obj):
         """Get available consultation types"""
@@ -487,6 +505,7 @@ class DoctorStatusSerializer(serializers.ModelSerializer):
     doctor_email = serializers.CharField(source='doctor.user.email', read_only=True)
     doctor_specialization = serializers.CharField(source='doctor.specialization', read_only=True)
     doctor_profile_picture = serializers.CharField(source='doctor.user.profile_picture', read_only=True)
+    doctor_profile_picture_thumb = serializers.SerializerMethodField()
     status_display = serializers.CharField(read_only=True)
     is_active = serializers.BooleanField(read_only=True)
     last_activity_formatted = serializers.SerializerMethodField()
@@ -497,7 +516,7 @@ class DoctorStatusSerializer(serializers.ModelSerializer):
         model = DoctorStatus
         fields = [
             'id', 'doctor', 'doctor_name', 'doctor_email', 'doctor_specialization', 
-            'doctor_profile_picture', 'is_online', 'is_logged_in', 'is_available',
+            'doctor_profile_picture', 'doctor_profile_picture_thumb', 'is_online', 'is_logged_in', 'is_available',
             'current_status', 'status_display', 'is_active', 'last_activity',
             'last_activity_formatted', 'last_login', 'last_login_formatted',
             'current_consultation', 'current_consultation_info', 'status_updated_at',
@@ -505,6 +524,11 @@ class DoctorStatusSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'doctor', 'last_activity', 'last_login', 'status_updated_at']
     
+    def get_doctor_profile_picture_thumb(self, obj):
+        """Signed URL of the thumbnail variant (original until it exists)"""
+        user = obj.doctor.user
+        return variant_url(user.profile_picture, user.profile_picture_variants, 'thumb')
+
     def get_last_activity_formatted(self, obj):
         """Format last activity time"""
         if obj.last_activity:
@@ -574,6 +598,7 @@ class DoctorStatusListSerializer(serializers.ModelSerializer):
     doctor_name = serializers.CharField(source='doctor.user.name', read_only=True)
     doctor_specialization = serializers.CharField(source='doctor.specialization', read_only=True)
     doctor_profile_picture = serializers.CharField(source='doctor.user.profile_picture', read_only=True)
+    doctor_profile_picture_thumb = serializers.SerializerMethodField()
     status_display = serializers.CharField(read_only=True)
     last_activity_formatted = serializers.SerializerMethodField()
     
@@ -581,10 +606,15 @@ class DoctorStatusListSerializer(serializers.ModelSerializer):
         model = DoctorStatus
         fields = [
             'id', 'doctor', 'doctor_name', 'doctor_specialization', 
-            'doctor_profile_picture', 'is_online', 'is_available',
+            'doctor_profile_picture', 'doctor_profile_picture_thumb', 'is_online', 'is_available',
             'current_status', 'status_display', 'last_activity_formatted'
         ]
     
+    def get_doctor_profile_picture_thumb(self, obj):
+        """Signed URL of the thumbnail variant (original until it exists)"""
+        user = obj.doctor.user
+        return variant_url(user.profile_picture, user.profile_picture_variants, 'thumb')
+
     def get_last_activity_formatted(self, obj):
         """Format last activity time"""
         if obj.last_activity:
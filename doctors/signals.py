@@ -2,11 +2,16 @@
 Signals for automatic file upload to DigitalOcean Spaces
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.conf import settings
 from django.utils import timezone
-from .models import DoctorProfile, DoctorDocument, DoctorEducation, DoctorStatus
+from .models import DoctorProfile, DoctorDocument, DoctorEducation, DoctorSchedule, DoctorStatus, DoctorSignature
+from utils import event_bus
+from utils.image_derivatives import queue_derivatives
+from .status_stats import counted_state, invalidate_doctor_status_stats
+from .slot_materializer import materialize_doctor_slots
+from django.db import close_old_connections, transaction
 import threading
 import boto3
 import os
@@ -18,6 +23,9 @@ from .models import DoctorStatus, DoctorProfile
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def upload_doctor_education_async(education_id):
@@ -451,13 +459,10 @@ def broadcast_doctor_status_update(doctor_status):
             'auto_away_threshold': doctor_status.auto_away_threshold,
         }
         
-        # Send to doctor status group
+        # Encoded once here; every connected socket receives the same frame
         async_to_sync(channel_layer.group_send)(
             "doctor_status_updates",
-            {
-                'type': 'status_update',
-                'data': status_data
-            }
+            event_bus.group_message('status_update', status_data)
         )
         
     except Exception as e:
@@ -470,4 +475,54 @@ def broadcast_status_change(sender, instance, created, **kwargs):
     """
     Broadcast status changes to WebSocket clients
     """
-    broadcast_doctor_status_update(instance) 
\ No newline at end of file
+    broadcast_doctor_status_update(instance) 
+
+
+@receiver(post_init, sender=DoctorStatus)
+def remember_counted_state(sender, instance, **kwargs):
+    """Keep the counted fields as loaded, to spot changes on save"""
+    instance._counted_state = counted_state(instance)
+
+
+@receiver(post_save, sender=DoctorStatus)
+def invalidate_status_stats_on_change(sender, instance, created, **kwargs):
+    """Drop cached status statistics when a counted field changed"""
+    state = counted_state(instance)
+    if created or state != getattr(instance, '_counted_state', None):
+        invalidate_doctor_status_stats()
+    instance._counted_state = state
+
+
+@receiver(post_delete, sender=DoctorStatus)
+def invalidate_status_stats_on_delete(sender, instance, **kwargs):
+    invalidate_doctor_status_stats()
+
+@receiver(post_save, sender=DoctorSignature)
+def queue_signature_derivatives(sender, instance, **kwargs):
+    """Render thumbnail/WebP variants when the signature image changes"""
+    queue_derivatives(instance, 'file_path', 'variants')
+
+
+def materialize_slots_async(doctor_id):
+    """Re-materialize a doctor's schedule slots in a background thread"""
+    def run():
+        close_old_connections()
+        try:
+            result = materialize_doctor_slots(doctor_id)
+            logger.info(f"Doctor {doctor_id}: {result['created']} slots created, {result['deleted']} removed")
+        except Exception as e:
+            logger.error(f"Error materializing slots for doctor {doctor_id}: {e}")
+        finally:
+            close_old_connections()
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+
+
+@receiver(post_save, sender=DoctorSchedule)
+@receiver(post_delete, sender=DoctorSchedule)
+def rematerialize_schedule_slots(sender, instance, **kwargs):
+    """Apply schedule edits to upcoming slots without waiting for the nightly job"""
+    doctor_id = instance.doctor_id
+    transaction.on_commit(lambda: materialize_slots_async(doctor_id))
@@ -0,0 +1,167 @@
+"""
+Materialize DoctorSlot rows from each doctor's weekly DoctorSchedule.
+
+For every doctor the schedule is expanded over a rolling horizon (today +
+N weeks), diffed against the slots already stored, and the difference is
+applied in bulk: missing slots are inserted with one bulk_create and stale
+slots (no longer in the schedule, never booked) are removed with one
+delete. Materialized slots are the doctor's own (clinic NULL) and marked
+``source='schedule'``; only those are ever deleted. Manually added global
+availability and slots generated for a clinic through
+DoctorSlotViewSet.generate_slots are never touched.
+
+Runs for the same doctor are serialized by a row lock on their
+DoctorProfile, so concurrent schedule edits and the nightly job can't
+insert the same slot twice.
+
+Run nightly through ``manage.py materialize_doctor_slots``; schedule edits
+re-materialize the affected doctor straight away (see signals).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import DoctorProfile, DoctorSchedule, DoctorSlot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZON_WEEKS = getattr(settings, 'DOCTOR_SLOT_HORIZON_WEEKS', 4)
+DEFAULT_SLOT_MINUTES = 15
+
+# Index matches date.weekday()
+WEEKDAYS = [day for day, _ in DoctorSchedule.DAYS_OF_WEEK]
+
+
+def slot_windows(start_time, end_time, duration, break_start=None, break_end=None):
+    """
+    (start, end) times of back-to-back ``duration`` minute slots between
+    ``start_time`` and ``end_time``. Slots never overlap the break and
+    restart at its end.
+    """
+    ranges = [(start_time, end_time)]
+    if break_start and break_end and start_time < break_start < break_end < end_time:
+        ranges = [(start_time, break_start), (break_end, end_time)]
+
+    step = timedelta(minutes=duration)
+    anchor = datetime.min.date()
+    windows = []
+    for range_start, range_end in ranges:
+        current = datetime.combine(anchor, range_start)
+        end = datetime.combine(anchor, range_end)
+        while current + step <= end:
+            windows.append((current.time(), (current + step).time()))
+            current += step
+    return windows
+
+
+def expected_slots(schedules, start_date, end_date, duration):
+    """{(date, start_time, end_time)} the schedules produce in [start_date, end_date]"""
+    windows_by_day = {
+        schedule.day_of_week: slot_windows(
+            schedule.start_time, schedule.end_time, duration,
+            schedule.break_start_time, schedule.break_end_time
+        )
+        for schedule in schedules if schedule.is_available
+    }
+    expected = set()
+    day = start_date
+    while day <= end_date:
+        for start, end in windows_by_day.get(WEEKDAYS[day.weekday()], ()):
+            expected.add((day, start, end))
+        day += timedelta(days=1)
+    return expected
+
+
+def _consultation_duration(doctor_id):
+    duration = DoctorProfile.objects.filter(user_id=doctor_id).values_list('consultation_duration', flat=True).first()
+    return duration or DEFAULT_SLOT_MINUTES
+
+
+def materialize_doctor_slots(doctor_id, weeks=DEFAULT_HORIZON_WEEKS, start_date=None, duration=None):
+    """
+    Bring the doctor's schedule slots in [start_date, start_date + weeks) in
+    line with their DoctorSchedule. Returns {'created': n, 'deleted': n}.
+    """
+    start_date = start_date or timezone.localdate()
+    end_date = start_date + timedelta(weeks=weeks) - timedelta(days=1)
+    duration = duration or _consultation_duration(doctor_id)
+
+    with transaction.atomic():
+        # Serialize runs for this doctor; the schedule is read under the lock
+        list(DoctorProfile.objects.select_for_update().filter(user_id=doctor_id).values_list('pk', flat=True))
+
+        schedules = list(DoctorSchedule.objects.filter(doctor_id=doctor_id))
+        expected = expected_slots(schedules, start_date, end_date, duration)
+
+        existing = {}
+        covered = set()
+        for pk, day, start, end, source, is_booked, consultation_id in DoctorSlot.objects.filter(
+            doctor_id=doctor_id, clinic__isnull=True, date__gte=start_date, date__lte=end_date
+        ).values_list('id', 'date', 'start_time', 'end_time', 'source', 'is_booked', 'booked_consultation_id'):
+            covered.add((day, start, end))
+            if source == 'schedule':
+                existing[(day, start, end)] = (pk, is_booked or consultation_id is not None)
+
+        # Times the doctor already opened by hand are not duplicated
+        missing = expected - covered
+        DoctorSlot.objects.bulk_create([
+            DoctorSlot(doctor_id=doctor_id, date=day, start_time=start, end_time=end, source='schedule')
+            for day, start, end in sorted(missing)
+        ], ignore_conflicts=True)
+
+        stale = [pk for key, (pk, booked) in existing.items() if key not in expected and not booked]
+        if stale:
+            DoctorSlot.objects.filter(id__in=stale, is_booked=False, booked_consultation__isnull=True).delete()
+
+    return {'created': len(missing), 'deleted': len(stale)}
+
+
+def _materialize_chunk(doctor_ids, weeks, start_date, durations):
+    close_old_connections()
+    totals = {'created': 0, 'deleted': 0, 'failed': 0}
+    try:
+        for doctor_id in doctor_ids:
+            try:
+                result = materialize_doctor_slots(
+                    doctor_id, weeks=weeks, start_date=start_date,
+                    duration=durations.get(doctor_id) or DEFAULT_SLOT_MINUTES
+                )
+            except Exception as e:
+                totals['failed'] += 1
+                logger.error(f"Error materializing slots for doctor {doctor_id}: {e}")
+                continue
+            totals['created'] += result['created']
+            totals['deleted'] += result['deleted']
+    finally:
+        close_old_connections()
+    return totals
+
+
+def materialize_all_slots(weeks=DEFAULT_HORIZON_WEEKS, workers=4, chunk_size=50, start_date=None):
+    """Materialize every doctor with a schedule, ``chunk_size`` doctors per worker task"""
+    start_date = start_date or timezone.localdate()
+    doctor_ids = list(DoctorSchedule.objects.order_by('doctor_id').values_list('doctor_id', flat=True).distinct())
+    durations = dict(
+        DoctorProfile.objects.filter(user_id__in=doctor_ids).values_list('user_id', 'consultation_duration')
+    )
+    chunks = [doctor_ids[i:i + chunk_size] for i in range(0, len(doctor_ids), chunk_size)]
+
+    def run(chunk):
+        return _materialize_chunk(chunk, weeks, start_date, durations)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='slot-materializer') as executor:
+            results = list(executor.map(run, chunks))
+    else:
+        results = [run(chunk) for chunk in chunks]
+
+    totals = {'doctors': len(doctor_ids), 'created': 0, 'deleted': 0, 'failed': 0}
+    for result in results:
+        for key in ('created', 'deleted', 'failed'):
+            totals[key] += result[key]
+    return totals
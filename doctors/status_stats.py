@@ -0,0 +1,70 @@
+"""
+Cached doctor status statistics for DoctorStatusStatsView.
+
+The snapshot is built from one grouped query on current_status and one
+conditional aggregate. It is kept in the shared cache, so dashboard polls
+don't touch the database. The DoctorStatus post_save/post_delete receivers
+drop it when a counted field (is_online, is_available, current_status)
+changes. Activity-only saves keep it, and the TTL bounds the drift of the
+24h activity count.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import DoctorStatus
+
+DOCTOR_STATUS_STATS_CACHE_KEY = 'doctors:status_stats'
+DOCTOR_STATUS_STATS_CACHE_TTL = getattr(settings, 'DOCTOR_STATUS_STATS_CACHE_TTL', 60)
+
+# Fields the statistics are grouped on
+COUNTED_FIELDS = ('is_online', 'is_available', 'current_status')
+
+
+def counted_state(doctor_status):
+    """Values of COUNTED_FIELDS without loading deferred fields"""
+    return tuple(doctor_status.__dict__.get(field) for field in COUNTED_FIELDS)
+
+
+def build_doctor_status_stats():
+    status_breakdown = {choice: 0 for choice, _ in DoctorStatus.STATUS_CHOICES}
+    for row in DoctorStatus.objects.values('current_status').annotate(count=Count('id')).order_by():
+        status_breakdown[row['current_status']] = row['count']
+
+    totals = DoctorStatus.objects.aggregate(
+        total=Count('id'),
+        online=Count('id', filter=Q(is_online=True)),
+        available=Count('id', filter=Q(is_available=True)),
+        recent=Count('id', filter=Q(last_activity__gte=timezone.now() - timedelta(days=1))),
+    )
+    total_doctors = totals['total']
+
+    return {
+        'total_doctors': total_doctors,
+        'online_doctors': totals['online'],
+        'available_doctors': totals['available'],
+        'consulting_doctors': status_breakdown.get('consulting', 0),
+        'away_doctors': status_breakdown.get('away', 0),
+        'offline_doctors': status_breakdown.get('offline', 0),
+        'recent_activity': totals['recent'],
+        'status_breakdown': status_breakdown,
+        'online_percentage': round((totals['online'] / total_doctors * 100) if total_doctors > 0 else 0, 1),
+        'available_percentage': round((totals['available'] / total_doctors * 100) if total_doctors > 0 else 0, 1)
+    }
+
+
+def get_doctor_status_stats():
+    """Cached build_doctor_status_stats()"""
+    stats = cache.get(DOCTOR_STATUS_STATS_CACHE_KEY)
+    if stats is None:
+        stats = build_doctor_status_stats()
+        cache.set(DOCTOR_STATUS_STATS_CACHE_KEY, stats, DOCTOR_STATUS_STATS_CACHE_TTL)
+    return stats
+
+
+def invalidate_doctor_status_stats():
+    cache.delete(DOCTOR_STATUS_STATS_CACHE_KEY)
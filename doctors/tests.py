@@ -1,3 +1,155 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from .models import DoctorProfile, DoctorStatus
+
+User = get_user_model()
+
+
+class DoctorStatusStatsTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.statuses = []
+        for index, current_status in enumerate(['available', 'consulting', 'offline']):
+            user = User.objects.create_user(phone=f'+91400000000{index}', name=f'Doctor {index}', role='doctor')
+            doctor = DoctorProfile.objects.create(
+                user=user, license_number=f'LIC{index}', qualification='MBBS',
+                specialization='General Medicine', experience_years=5, consultation_fee=500
+            )
+            status = DoctorStatus.objects.get(doctor=doctor)
+            status.current_status = current_status
+            status.is_online = current_status != 'offline'
+            status.save()
+            self.statuses.append(status)
+
+    def test_grouped_counts(self):
+        from .status_stats import get_doctor_status_stats
+        with self.assertNumQueries(2):
+            stats = get_doctor_status_stats()
+        self.assertEqual(stats['total_doctors'], 3)
+        self.assertEqual(stats['online_doctors'], 2)
+        self.assertEqual(stats['consulting_doctors'], 1)
+        self.assertEqual(stats['status_breakdown']['busy'], 0)
+        self.assertEqual(stats['online_percentage'], 66.7)
+
+    def test_cache_dropped_only_on_counted_change(self):
+        from .status_stats import get_doctor_status_stats
+        get_doctor_status_stats()
+
+        # Activity-only saves keep the cached snapshot
+        self.statuses[0].update_activity()
+        with self.assertNumQueries(0):
+            get_doctor_status_stats()
+
+        self.statuses[0].mark_offline()
+        stats = get_doctor_status_stats()
+        self.assertEqual(stats['offline_doctors'], 2)
+        self.assertEqual(stats['online_doctors'], 1)
+
+
+class SlotMaterializerTest(TestCase):
+    def setUp(self):
+        from datetime import date
+        self.doctor = User.objects.create_user(phone='+914100000001', name='Doctor', role='doctor')
+        DoctorProfile.objects.create(
+            user=self.doctor, license_number='LICS', qualification='MBBS',
+            specialization='General Medicine', experience_years=5, consultation_fee=500,
+            consultation_duration=15
+        )
+        # Monday
+        self.start = date(2030, 1, 7)
+
+    def _schedule(self, day, start, end, **kwargs):
+        from datetime import time
+        from .models import DoctorSchedule
+        return DoctorSchedule.objects.create(
+            doctor=self.doctor, day_of_week=day, start_time=time(*start), end_time=time(*end), **kwargs
+        )
+
+    def test_slot_windows_skip_break(self):
+        from datetime import time
+        from .slot_materializer import slot_windows
+        windows = slot_windows(time(9), time(11), 30, time(9, 45), time(10, 15))
+        self.assertEqual(windows, [(time(9), time(9, 30)), (time(10, 15), time(10, 45))])
+
+    def test_materialize_diffs_existing_slots(self):
+        from datetime import time
+        from .models import DoctorSlot
+        from .slot_materializer import materialize_all_slots, materialize_doctor_slots
+        monday = self._schedule('monday', (9,), (10,))
+        self._schedule('wednesday', (14,), (15,), is_available=False)
+
+        result = materialize_all_slots(weeks=2, workers=1, start_date=self.start)
+        self.assertEqual((result['created'], result['deleted']), (8, 0))
+        self.assertEqual(
+            DoctorSlot.objects.filter(doctor=self.doctor, date=self.start).count(), 4
+        )
+
+        # Re-running is a no-op
+        self.assertEqual(materialize_doctor_slots(self.doctor.id, weeks=2, start_date=self.start),
+                         {'created': 0, 'deleted': 0})
+
+        # Shorter hours: stale unbooked slots go, booked ones stay
+        DoctorSlot.objects.filter(date=self.start, start_time=time(9, 45)).update(is_booked=True)
+        monday.end_time = time(9, 30)
+        monday.save()
+        result = materialize_doctor_slots(self.doctor.id, weeks=2, start_date=self.start)
+        self.assertEqual(result, {'created': 0, 'deleted': 3})
+        self.assertEqual(
+            list(DoctorSlot.objects.filter(date=self.start).values_list('start_time', flat=True)),
+            [time(9), time(9, 15), time(9, 45)]
+        )
+
+    def test_manual_global_slots_are_kept(self):
+        from datetime import time
+        from .models import DoctorSlot
+        from .slot_materializer import materialize_doctor_slots
+        self._schedule('monday', (9,), (9, 30))
+        DoctorSlot.objects.create(doctor=self.doctor, date=self.start, start_time=time(9), end_time=time(9, 15))
+        DoctorSlot.objects.create(doctor=self.doctor, date=self.start, start_time=time(18), end_time=time(18, 15))
+
+        result = materialize_doctor_slots(self.doctor.id, weeks=1, start_date=self.start)
+        self.assertEqual(result, {'created': 1, 'deleted': 0})
+        self.assertEqual(
+            list(DoctorSlot.objects.filter(date=self.start).values_list('start_time', 'source')),
+            [(time(9), 'manual'), (time(9, 15), 'schedule'), (time(18), 'manual')]
+        )
+
+    def test_generate_slots_for_availability_is_idempotent(self):
+        from datetime import time
+        from eclinic.models import Clinic
+        from .models import DoctorSlot
+        admin = User.objects.create_user(phone='+914100000002', name='Admin', role='admin')
+        clinic = Clinic.objects.create(name='Slot Clinic', clinic_type='virtual_clinic', admin=admin,
+                                       registration_number='SLOT1', consultation_duration=20)
+        first = DoctorSlot.generate_slots_for_availability(self.doctor, clinic, self.start, time(9), time(10))
+        second = DoctorSlot.generate_slots_for_availability(self.doctor, clinic, self.start, time(9), time(10))
+        self.assertEqual(len(first), 3)
+        self.assertEqual([slot.id for slot in first], [slot.id for slot in second])
+
+
+class PublicDoctorListCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.user = User.objects.create_user(phone='+914200000001', name='Listed Doctor', role='doctor')
+        DoctorProfile.objects.create(
+            user=self.user, license_number='LICP', qualification='MBBS', specialization='General Medicine',
+            experience_years=5, consultation_fee=500, is_verified=True, is_active=True
+        )
+        self.client = APIClient()
+        self.url = '/api/doctors/public/'
+
+    def test_user_changes_invalidate_the_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Listed Doctor', response.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.name = 'Renamed Doctor'
+            self.user.save()
+        fresh = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn(b'Renamed Doctor', fresh.content)
@@ -30,6 +30,9 @@ from .serializers import (
     DoctorSlotGenerationSerializer, DoctorStatusSerializer, DoctorStatusUpdateSerializer, DoctorStatusListSerializer,
     PublicDoctorListSerializer
 )
+from .status_stats import get_doctor_status_stats
+from utils import event_bus
+from utils.response_cache import cache_response
 
 
 class DoctorPagination(PageNumberPagination):
@@ -1256,18 +1259,19 @@ class DoctorStatusListView(APIView):
                 statuses = statuses.filter(is_available=is_available)
             
             # Order by last activity (most recent first)
-            statuses = statuses.order_by('-last_activity')
+            statuses = list(statuses.order_by('-last_activity'))
             
             serializer = DoctorStatusListSerializer(statuses, many=True)
             
+            # Counts from the rows already loaded
             return Response({
                 'status': 'success',
                 'message': 'Doctor statuses retrieved successfully',
                 'data': serializer.data,
-                'count': len(serializer.data),
-                'online_count': statuses.filter(is_online=True).count(),
-                'available_count': statuses.filter(is_available=True).count(),
-                'consulting_count': statuses.filter(current_status='consulting').count()
+                'count': len(statuses),
+                'online_count': sum(1 for item in statuses if item.is_online),
+                'available_count': sum(1 for item in statuses if item.is_available),
+                'consulting_count': sum(1 for item in statuses if item.current_status == 'consulting')
             })
             
         except Exception as e:
@@ -1385,39 +1389,7 @@ class DoctorStatusStatsView(APIView):
     )
     def get(self, request):
         try:
-            total_doctors = DoctorStatus.objects.count()
-            online_doctors = DoctorStatus.objects.filter(is_online=True).count()
-            available_doctors = DoctorStatus.objects.filter(is_available=True).count()
-            consulting_doctors = DoctorStatus.objects.filter(current_status='consulting').count()
-            away_doctors = DoctorStatus.objects.filter(current_status='away').count()
-            offline_doctors = DoctorStatus.objects.filter(current_status='offline').count()
-            
-            # Status breakdown
-            status_breakdown = {}
-            for status_choice in DoctorStatus.STATUS_CHOICES:
-                status_breakdown[status_choice[0]] = DoctorStatus.objects.filter(
-                    current_status=status_choice[0]
-                ).count()
-            
-            # Recent activity (doctors active in last 24 hours)
-            from datetime import timedelta
-            yesterday = timezone.now() - timedelta(days=1)
-            recent_activity = DoctorStatus.objects.filter(
-                last_activity__gte=yesterday
-            ).count()
-            
-            stats = {
-                'total_doctors': total_doctors,
-                'online_doctors': online_doctors,
-                'available_doctors': available_doctors,
-                'consulting_doctors': consulting_doctors,
-                'away_doctors': away_doctors,
-                'offline_doctors': offline_doctors,
-                'recent_activity': recent_activity,
-                'status_breakdown': status_breakdown,
-                'online_percentage': round((online_doctors / total_doctors * 100) if total_doctors > 0 else 0, 1),
-                'available_percentage': round((available_doctors / total_doctors * 100) if total_doctors > 0 else 0, 1)
-            }
+            stats = get_doctor_status_stats()
             
             return Response({
                 'status': 'success',
@@ -1482,10 +1454,7 @@ def broadcast_doctor_status_update(status_data):
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
         "doctor_status_updates",
-        {
-            "type": "status_update",
-            "data": status_data
-        }
+        event_bus.group_message("status_update", status_data)
     )
 
 def broadcast_notification(user_id, notification_data):
@@ -1493,21 +1462,15 @@ def broadcast_notification(user_id, notification_data):
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
         f"notifications_{user_id}",
-        {
-            "type": "notification_message",
-            "data": notification_data
-        }
+        event_bus.group_message("notification_message", notification_data, "notification")
     )
 
-def broadcast_consultation_update(consultation_data):
-    """Broadcast consultation update to all connected clients"""
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        "consultation_updates",
-        {
-            "type": "consultation_update",
-            "data": consultation_data
-        }
+def broadcast_consultation_update(consultation, consultation_data):
+    """Send a consultation update to the sockets subscribed to that consultation"""
+    from consultations.groups import consultation_groups
+    event_bus.publish(
+        consultation_groups(consultation),
+        event_bus.group_message("consultation_update", consultation_data)
     )
 
 
@@ -1601,6 +1564,7 @@ class PublicDoctorListView(APIView):
         responses={200: PublicDoctorListSerializer(many=True)},
         description="Public endpoint to list verified and active doctors with filtering"
     )
+    @cache_response([DoctorProfile, User])
     def get(self, request):
         """List public doctors with filtering and pagination"""
         try:
@@ -1,11 +1,10 @@
-import csv
-import zipfile
 import os
+import time
 import requests
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from django.utils import timezone
-from eclinic.models import GlobalMedication
+from django.db import DatabaseError
+from eclinic.services.medication_import import DEFAULT_BATCH_SIZE, MedicationBulkImporter, medication_key
+from eclinic.services.rxnorm import iter_rxnorm_medications
 from datetime import datetime, timedelta
 
 
@@ -31,8 +30,20 @@ class Command(BaseCommand):
         parser.add_argument(
             '--limit',
             type=int,
-            default=1000,
-            help='Limit number of medications to import (default: 1000)'
+            default=None,
+            help='Limit number of medications to import (default: no limit)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows per bulk insert (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes used to parse the RRF file (default: 1)'
         )
         parser.add_argument(
             '--dry-run',
@@ -59,7 +70,9 @@ class Command(BaseCommand):
             file_path,
             update_existing=options['update_existing'],
             limit=options['limit'],
-            dry_run=options['dry_run']
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            workers=options['workers']
         )
     
     def download_rxnorm_data(self):
@@ -115,211 +128,56 @@ class Command(BaseCommand):
             except requests.RequestException as e2:
                 raise CommandError(f'Failed to download RxNorm data: {e2}')
     
-    def process_rxnorm_data(self, file_path, update_existing=False, limit=1000, dry_run=False):
-        """Process RxNorm data file"""
+    def process_rxnorm_data(self, file_path, update_existing=False, limit=None, dry_run=False,
+                            batch_size=DEFAULT_BATCH_SIZE, workers=1):
+        """Stream RXNCONSO rows from the file and bulk import them"""
         self.stdout.write(f'Processing RxNorm data from {file_path}...')
-        
-        # Extract if it's a zip file
-        if file_path.endswith('.zip'):
-            extract_dir = file_path.replace('.zip', '_extracted')
-            os.makedirs(extract_dir, exist_ok=True)
-            
-            with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-            
-            # Find the main RxNorm files
-            rxnorm_files = []
-            for root, dirs, files in os.walk(extract_dir):
-                for file in files:
-                    if file.startswith('RXNCONSO') or file.startswith('RXNST'):
-                        rxnorm_files.append(os.path.join(root, file))
-            
-            if not rxnorm_files:
-                raise CommandError('No RxNorm data files found in zip archive')
-            
-            # Use the first file found
-            data_file = rxnorm_files[0]
-        else:
-            data_file = file_path
-        
-        # Process the data
-        medications_processed = 0
-        medications_created = 0
-        medications_updated = 0
-        errors = []
-        
+
+        importer = MedicationBulkImporter(batch_size=batch_size, update_existing=update_existing)
+        seen = set()
+        started = time.monotonic()
+        next_report = batch_size * 10
+
         try:
-            with open(data_file, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile, delimiter='|')
-                
-                for row in reader:
-                    if medications_processed >= limit:
+            for medication_data in iter_rxnorm_medications(file_path, workers=workers):
+                if dry_run:
+                    key = medication_key(medication_data['name'])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if len(seen) <= 20:
+                        self.stdout.write(f'Would import: {medication_data["name"]}')
+                    if limit and len(seen) >= limit:
                         break
-                    
-                    try:
-                        medication_data = self.parse_rxnorm_row(row)
-                        if medication_data:
-                            if dry_run:
-                                self.stdout.write(f'Would import: {medication_data["name"]}')
-                                medications_created += 1
-                            else:
-                                result = self.import_medication(
-                                    medication_data, 
-                                    update_existing=update_existing
-                                )
-                                if result == 'created':
-                                    medications_created += 1
-                                elif result == 'updated':
-                                    medications_updated += 1
-                        
-                        medications_processed += 1
-                        
-                        if medications_processed % 100 == 0:
-                            self.stdout.write(
-                                f'Processed {medications_processed} medications...'
-                            )
-                    
-                    except Exception as e:
-                        errors.append({
-                            'row': row,
-                            'error': str(e)
-                        })
-                        if len(errors) > 10:  # Limit error reporting
-                            break
-        
-        except Exception as e:
+                    continue
+
+                importer.add(medication_data)
+                processed = importer.stats['processed']
+                if processed >= next_report:
+                    self.stdout.write(f'Processed {processed} medications...')
+                    next_report += batch_size * 10
+                if limit and processed >= limit:
+                    break
+
+            stats = importer.finish()
+        except (OSError, ValueError, DatabaseError) as e:
             raise CommandError(f'Error processing RxNorm data: {e}')
-        
-        # Summary
+
+        elapsed = time.monotonic() - started
+        if dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(f'\nDry run: {len(seen)} medications would be imported ({elapsed:.1f}s)')
+            )
+            return
+
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nImport Summary:\n'
-                f'Total processed: {medications_processed}\n'
-                f'Created: {medications_created}\n'
-                f'Updated: {medications_updated}\n'
-                f'Errors: {len(errors)}'
+                f'Total processed: {stats["processed"]}\n'
+                f'Created: {stats["created"]}\n'
+                f'Updated: {stats["updated"]}\n'
+                f'Skipped (existing): {stats["skipped"]}\n'
+                f'Duplicates in file: {stats["duplicates"]}\n'
+                f'Time: {elapsed:.1f}s'
             )
         )
-        
-        if errors:
-            self.stdout.write(
-                self.style.WARNING(f'\nFirst few errors:\n')
-            )
-            for error in errors[:5]:
-                self.stdout.write(f'Error: {error["error"]}')
-    
-    def parse_rxnorm_row(self, row):
-        """Parse a row from RxNorm data file"""
-        if len(row) < 16:
-            return None
-        
-        # RxNorm CONSO.RRF format
-        # Fields: RXCUI|LAT|TS|LUI|STT|SUI|ISPREF|RXAUI|SAUI|SCUI|SDUI|SAB|TTY|CODE|STR|SRL|SUPPRESS|CVF
-        rxcui, lat, ts, lui, stt, sui, ispref, rxaui, saui, scui, sdui, sab, tty, code, str_name, srl, suppress, cvf = row[:17]
-        
-        # Only process English terms (LAT = ENG)
-        if lat != 'ENG':
-            return None
-        
-        # Only process preferred terms (ISPREF = Y)
-        if ispref != 'Y':
-            return None
-        
-        # Only process certain term types (TTY)
-        # IN = Ingredient, PIN = Precise Ingredient, BN = Brand Name, SBD = Semantic Branded Drug, etc.
-        valid_ttys = ['IN', 'PIN', 'BN', 'SBD', 'SCD', 'GPCK', 'BPCK']
-        if tty not in valid_ttys:
-            return None
-        
-        # Determine medication type
-        if tty in ['IN', 'PIN']:
-            medication_type = 'generic'
-        elif tty in ['BN', 'SBD']:
-            medication_type = 'branded'
-        else:
-            medication_type = 'combination'
-        
-        # Clean and standardize name
-        name = str_name.strip()
-        if not name or len(name) < 2:
-            return None
-        
-        # Extract strength and form from name if possible
-        strength = ''
-        dosage_form = 'tablet'  # default
-        
-        # Common dosage forms
-        forms = {
-            'tablet': ['tablet', 'tab', 'tabs'],
-            'capsule': ['capsule', 'cap', 'caps'],
-            'syrup': ['syrup', 'suspension', 'liquid'],
-            'injection': ['injection', 'injectable', 'vial'],
-            'cream': ['cream', 'ointment', 'gel'],
-            'drops': ['drops', 'eye drops', 'ear drops'],
-            'inhaler': ['inhaler', 'inhalation'],
-        }
-        
-        name_lower = name.lower()
-        for form, keywords in forms.items():
-            if any(keyword in name_lower for keyword in keywords):
-                dosage_form = form
-                break
-        
-        # Extract strength (common patterns: 500mg, 10mg/ml, etc.)
-        import re
-        strength_match = re.search(r'(\d+(?:\.\d+)?)\s*(mg|mcg|g|ml|mcg/ml|mg/ml|g/ml)', name, re.IGNORECASE)
-        if strength_match:
-            strength = f"{strength_match.group(1)}{strength_match.group(2)}"
-        
-        return {
-            'name': name,
-            'generic_name': name if medication_type == 'generic' else '',
-            'brand_name': name if medication_type == 'branded' else '',
-            'composition': '',
-            'dosage_form': dosage_form,
-            'strength': strength,
-            'medication_type': medication_type,
-            'therapeutic_class': '',
-            'indication': '',
-            'contraindications': '',
-            'side_effects': '',
-            'dosage_instructions': '',
-            'frequency_options': ['once_daily', 'twice_daily', 'thrice_daily'],
-            'timing_options': ['before_breakfast', 'after_breakfast', 'before_lunch', 'after_lunch', 'before_dinner', 'after_dinner', 'at_bedtime'],
-            'manufacturer': '',
-            'license_number': '',
-            'is_prescription_required': True,
-            'is_active': True,
-            'is_verified': False,
-            'rxcui': rxcui,
-            'tty': tty,
-            'sab': sab
-        }
-    
-    @transaction.atomic
-    def import_medication(self, medication_data, update_existing=False):
-        """Import a single medication"""
-        # Check if medication already exists
-        existing = GlobalMedication.objects.filter(
-            name__iexact=medication_data['name']
-        ).first()
-        
-        if existing:
-            if update_existing:
-                # Update existing medication
-                for field, value in medication_data.items():
-                    if field not in ['rxcui', 'tty', 'sab']:  # Skip RxNorm-specific fields
-                        setattr(existing, field, value)
-                existing.updated_at = timezone.now()
-                existing.save()
-                return 'updated'
-            else:
-                return 'skipped'
-        else:
-            # Create new medication
-            # Remove RxNorm-specific fields
-            for field in ['rxcui', 'tty', 'sab']:
-                medication_data.pop(field, None)
-            
-            GlobalMedication.objects.create(**medication_data)
-            return 'created'
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+# Columns searched by the medication typeahead (eclinic/services/medication_search.py)
+SEARCH_COLUMNS = ['name', 'generic_name', 'brand_name', 'composition', 'therapeutic_class']
+PREFIX_COLUMNS = ['name', 'generic_name', 'brand_name']
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    pg_trgm GIN indexes let Postgres answer the icontains (ILIKE '%q%')
+    predicates from an index instead of a sequential scan; text_pattern_ops
+    expression indexes serve istartswith (UPPER(col) LIKE 'Q%') for short
+    prefixes. Other databases keep the plain btree indexes.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS global_med_{column}_trgm '
+            f'ON global_medications USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+    for column in PREFIX_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS global_med_{column}_prefix '
+            f'ON global_medications (UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS global_med_{column}_trgm')
+    for column in PREFIX_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS global_med_{column}_prefix')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eclinic', '0008_globalmedication_clinicinventory_global_medication_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
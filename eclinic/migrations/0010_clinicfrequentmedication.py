@@ -0,0 +1,108 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def create_inventory_search_index(apps, schema_editor):
+    """Trigram index for clinic inventory item_name icontains searches (Postgres only)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS clinic_inventory_item_name_trgm '
+        'ON clinic_inventory USING gin (UPPER("item_name"::text) gin_trgm_ops)'
+    )
+
+
+def drop_inventory_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS clinic_inventory_item_name_trgm')
+
+
+def backfill_frequent_medications(apps, schema_editor):
+    """Seed the per-clinic tallies from already finalized prescriptions"""
+    PrescriptionMedication = apps.get_model('prescriptions', 'PrescriptionMedication')
+    ClinicFrequentMedication = apps.get_model('eclinic', 'ClinicFrequentMedication')
+
+    tallies = {}
+    rows = PrescriptionMedication.objects.filter(
+        prescription__is_finalized=True,
+        prescription__consultation__clinic__isnull=False
+    ).values(
+        'prescription__consultation__clinic_id', 'medicine_name', 'composition', 'dosage_form'
+    ).annotate(
+        prescriptions=Count('prescription', distinct=True),
+        last_prescribed_at=Max('prescription__updated_at')
+    )
+    for row in rows.iterator():
+        name_key = ' '.join((row['medicine_name'] or '').lower().split())[:200]
+        if not name_key:
+            continue
+        key = (row['prescription__consultation__clinic_id'], name_key)
+        tally = tallies.get(key)
+        if tally is None:
+            tallies[key] = ClinicFrequentMedication(
+                clinic_id=key[0],
+                name_key=name_key,
+                medicine_name=row['medicine_name'][:200],
+                composition=row['composition'] or '',
+                dosage_form=row['dosage_form'] or '',
+                prescription_count=row['prescriptions'],
+                last_prescribed_at=row['last_prescribed_at'],
+            )
+        else:
+            tally.prescription_count += row['prescriptions']
+            tally.last_prescribed_at = max(tally.last_prescribed_at, row['last_prescribed_at'])
+    ClinicFrequentMedication.objects.bulk_create(tallies.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eclinic', '0009_globalmedication_search_indexes'),
+        ('prescriptions', '0011_prescriptionmedication_timing_display_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClinicFrequentMedication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_key', models.CharField(help_text='Normalized medicine name (lower case)', max_length=200)),
+                ('medicine_name', models.CharField(max_length=200)),
+                ('composition', models.CharField(blank=True, max_length=500)),
+                ('dosage_form', models.CharField(blank=True, max_length=100)),
+                ('prescription_count', models.PositiveIntegerField(default=0)),
+                ('last_prescribed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Clinic Frequent Medication',
+                'verbose_name_plural': 'Clinic Frequent Medications',
+                'db_table': 'clinic_frequent_medications',
+                'ordering': ['-prescription_count'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='clinicinventory',
+            index=models.Index(fields=['clinic', 'category', 'is_active'], name='clinic_inve_clinic__c562c7_idx'),
+        ),
+        migrations.AddField(
+            model_name='clinicfrequentmedication',
+            name='clinic',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequent_medications', to='eclinic.clinic'),
+        ),
+        migrations.AddIndex(
+            model_name='clinicfrequentmedication',
+            index=models.Index(fields=['clinic', '-prescription_count'], name='clinic_freq_clinic__0a9932_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='clinicfrequentmedication',
+            unique_together={('clinic', 'name_key')},
+        ),
+        migrations.RunPython(create_inventory_search_index, drop_inventory_search_index),
+        migrations.RunPython(backfill_frequent_medications, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eclinic', '0010_clinicfrequentmedication'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clinic',
+            name='cover_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP derivatives of cover_image'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_specialties_index(apps, schema_editor):
+    """
+    Trigram GIN index serving NearbyClinicView's specialties__icontains
+    filter (UPPER(specialties::text) LIKE UPPER('%q%')) on Postgres.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS clinic_specialties_trgm '
+        'ON clinics USING gin (UPPER("specialties"::text) gin_trgm_ops)'
+    )
+
+
+def drop_specialties_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS clinic_specialties_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eclinic', '0011_clinic_cover_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_verified', True)), fields=['latitude', 'longitude'], name='clinic_listed_location_idx'),
+        ),
+        migrations.RunPython(create_specialties_index, drop_specialties_index),
+    ]
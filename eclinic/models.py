@@ -49,6 +49,7 @@ class Clinic(models.Model):
 
     # Images and Media
     cover_image = models.ImageField(upload_to='clinic_covers/', blank=True, null=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP derivatives of cover_image")
     gallery_images = models.JSONField(default=list, help_text="List of gallery image URLs")
 
     # Status and Settings
@@ -79,6 +80,14 @@ class Clinic(models.Model):
         verbose_name = 'Clinic'
         verbose_name_plural = 'Clinics'
         ordering = ['name']
+        indexes = [
+            # Bounding-box prefilter for nearby clinic search
+            models.Index(
+                fields=['latitude', 'longitude'],
+                name='clinic_listed_location_idx',
+                condition=models.Q(is_active=True, is_verified=True),
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.id:
@@ -476,6 +485,9 @@ class ClinicInventory(models.Model):
         verbose_name = 'Clinic Inventory'
         verbose_name_plural = 'Clinic Inventory'
         unique_together = ['clinic', 'global_medication', 'batch_number']
+        indexes = [
+            models.Index(fields=['clinic', 'category', 'is_active']),
+        ]
     
     def __str__(self):
         if self.global_medication:
@@ -502,6 +514,38 @@ class ClinicInventory(models.Model):
 
 
 
+class ClinicFrequentMedication(models.Model):
+    """
+    Per-clinic tally of prescribed medicines, maintained incrementally when
+    prescriptions are finalized (see eclinic.services.clinic_medications)
+    """
+    
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='frequent_medications'
+    )
+    name_key = models.CharField(max_length=200, help_text="Normalized medicine name (lower case)")
+    medicine_name = models.CharField(max_length=200)
+    composition = models.CharField(max_length=500, blank=True)
+    dosage_form = models.CharField(max_length=100, blank=True)
+    prescription_count = models.PositiveIntegerField(default=0)
+    last_prescribed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'clinic_frequent_medications'
+        verbose_name = 'Clinic Frequent Medication'
+        verbose_name_plural = 'Clinic Frequent Medications'
+        ordering = ['-prescription_count']
+        unique_together = ['clinic', 'name_key']
+        indexes = [
+            models.Index(fields=['clinic', '-prescription_count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.medicine_name} x{self.prescription_count} ({self.clinic.name})"
+
+
 class ClinicAppointment(models.Model):
     """Appointments for clinics"""
     
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.utils import timezone
 from django.db import models
 from django.core.exceptions import ValidationError
@@ -8,6 +9,7 @@ from .models import (
     ClinicAppointment, ClinicDocument, GlobalMedication
 )
 from utils.signed_urls import get_signed_media_url
+from utils.image_derivatives import variant_urls
 
 
 class FlexibleImageField(serializers.ImageField):
@@ -56,6 +58,7 @@ class ClinicSerializer(serializers.ModelSerializer):
     admin_name = serializers.CharField(source='admin.name', read_only=True)
     admin_phone = serializers.CharField(source='admin.phone', read_only=True)
     cover_image = serializers.SerializerMethodField()
+    cover_image_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = Clinic
@@ -66,7 +69,7 @@ class ClinicSerializer(serializers.ModelSerializer):
             'latitude', 'longitude', 'operating_hours',
             'specialties', 'services', 'facilities',
             'registration_number', 'license_number', 'accreditation',
-            'cover_image', 'gallery_images',
+            'cover_image', 'cover_image_urls', 'gallery_images',
             'is_active', 'is_verified', 'accepts_online_consultations',
             'consultation_duration', 'admin', 'admin_name', 'admin_phone', 'created_at', 'updated_at'
         ]
@@ -91,6 +94,10 @@ class ClinicSerializer(serializers.ModelSerializer):
             return get_signed_media_url(str(obj.cover_image))
         return None
 
+    def get_cover_image_urls(self, obj):
+        """Signed URLs for the original and each resized variant"""
+        return variant_urls(obj.cover_image, obj.cover_image_variants)
+
 class ClinicCreateSerializer(serializers.ModelSerializer):
     admin = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(role='admin'), required=True)
     cover_image = FlexibleImageField(validators=[validate_image_file], required=False, allow_null=True)
@@ -215,8 +222,21 @@ class GlobalMedicationCreateSerializer(serializers.ModelSerializer):
             'is_active', 'is_verified'
         ]
     
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('bulk_import'):
+            # Bulk imports check all names in a single query
+            fields['name'].validators = [
+                validator for validator in fields['name'].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
     def validate_name(self, value):
         """Check if medication name already exists"""
+        if self.context.get('bulk_import'):
+            # Bulk imports check all names in a single query
+            return value
         if GlobalMedication.objects.filter(name__iexact=value).exists():
             raise serializers.ValidationError("A medication with this name already exists.")
         return value
@@ -0,0 +1,153 @@
+"""
+SuperAdmin clinic analytics built from grouped aggregates.
+
+Headline and growth counts come from one conditional-aggregate query,
+monthly growth from one TruncMonth query and specialty tallies from one
+jsonb_array_elements_text query (Python fallback off Postgres). The result
+is cached and dropped whenever a clinic is saved or deleted.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from eclinic.models import Clinic
+
+CLINIC_ANALYTICS_CACHE_KEY = 'eclinic:clinic_analytics'
+CLINIC_ANALYTICS_CACHE_TTL = getattr(settings, 'CLINIC_ANALYTICS_CACHE_TTL', 60 * 5)
+
+
+def _rate(part, total):
+    return round((part / total * 100) if total > 0 else 0, 1)
+
+
+def _month_starts(now, months=12):
+    """First day of each of the last ``months`` calendar months, oldest first"""
+    # Local time, matching the buckets TruncMonth produces
+    now = timezone.localtime(now)
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(months):
+        starts.append(now.replace(year=year, month=month, day=1, hour=0, minute=0, second=0, microsecond=0))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    starts.reverse()
+    return starts
+
+
+def specialty_counts():
+    """{specialty: number of clinics listing it}"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT specialty, COUNT(*) FROM clinics "
+                "CROSS JOIN LATERAL jsonb_array_elements_text("
+                "CASE WHEN jsonb_typeof(specialties) = 'array' THEN specialties ELSE '[]'::jsonb END"
+                ") AS specialty GROUP BY specialty"
+            )
+            return dict(cursor.fetchall())
+
+    counts = Counter()
+    for specialties in Clinic.objects.values_list('specialties', flat=True).iterator():
+        if isinstance(specialties, list):
+            counts.update(specialties)
+    return dict(counts)
+
+
+def build_clinic_analytics():
+    now = timezone.now()
+
+    totals = Clinic.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        verified=Count('id', filter=Q(is_verified=True)),
+        online=Count('id', filter=Q(accepts_online_consultations=True)),
+        new_7d=Count('id', filter=Q(created_at__gte=now - timedelta(days=7))),
+        new_30d=Count('id', filter=Q(created_at__gte=now - timedelta(days=30))),
+        new_90d=Count('id', filter=Q(created_at__gte=now - timedelta(days=90))),
+    )
+    total_clinics = totals['total']
+
+    city_distribution = Clinic.objects.values('city').annotate(count=Count('id')).order_by('-count')[:10]
+    state_distribution = Clinic.objects.values('state').annotate(count=Count('id')).order_by('-count')[:10]
+
+    specialties = specialty_counts()
+    top_specialties = sorted(specialties.items(), key=lambda item: item[1], reverse=True)[:10]
+
+    month_starts = _month_starts(now)
+    monthly_counts = {
+        (row['month'].year, row['month'].month): row['count']
+        for row in Clinic.objects.filter(created_at__gte=month_starts[0])
+        .annotate(month=TruncMonth('created_at'))
+        .values('month')
+        .annotate(count=Count('id'))
+        .order_by()
+    }
+    monthly_trends = [{
+        'month': month_start.strftime('%B %Y'),
+        'count': monthly_counts.get((month_start.year, month_start.month), 0),
+        'period': month_start.strftime('%Y-%m')
+    } for month_start in month_starts]
+
+    recent_activity = [{
+        'id': clinic['id'],
+        'name': clinic['name'],
+        'city': clinic['city'],
+        'state': clinic['state'],
+        'created_at': clinic['created_at'].strftime('%Y-%m-%d'),
+        'is_verified': clinic['is_verified'],
+        'is_active': clinic['is_active']
+    } for clinic in Clinic.objects.order_by('-created_at').values(
+        'id', 'name', 'city', 'state', 'created_at', 'is_verified', 'is_active'
+    )[:5]]
+
+    return {
+        'overview': {
+            'total_clinics': total_clinics,
+            'active_clinics': totals['active'],
+            'verified_clinics': totals['verified'],
+            'online_clinics': totals['online'],
+            'verification_rate': _rate(totals['verified'], total_clinics),
+            'activation_rate': _rate(totals['active'], total_clinics),
+            'online_rate': _rate(totals['online'], total_clinics)
+        },
+        'growth': {
+            'new_clinics_7d': totals['new_7d'],
+            'new_clinics_30d': totals['new_30d'],
+            'new_clinics_90d': totals['new_90d'],
+            'growth_rate_7d': _rate(totals['new_7d'], total_clinics),
+            'growth_rate_30d': _rate(totals['new_30d'], total_clinics),
+            'growth_rate_90d': _rate(totals['new_90d'], total_clinics)
+        },
+        'geographic': {
+            'cities': [{'city': item['city'], 'count': item['count']} for item in city_distribution],
+            'states': [{'state': item['state'], 'count': item['count']} for item in state_distribution]
+        },
+        'specializations': {
+            'top_specialties': [{'specialty': item[0], 'count': item[1]} for item in top_specialties],
+            'total_specialties': len(specialties)
+        },
+        'trends': {
+            'monthly_growth': monthly_trends,
+            'last_updated': now.strftime('%Y-%m-%d %H:%M:%S')
+        },
+        'recent_activity': recent_activity
+    }
+
+
+def get_clinic_analytics():
+    """Cached build_clinic_analytics()"""
+    analytics = cache.get(CLINIC_ANALYTICS_CACHE_KEY)
+    if analytics is None:
+        analytics = build_clinic_analytics()
+        cache.set(CLINIC_ANALYTICS_CACHE_KEY, analytics, CLINIC_ANALYTICS_CACHE_TTL)
+    return analytics
+
+
+def invalidate_clinic_analytics():
+    cache.delete(CLINIC_ANALYTICS_CACHE_KEY)
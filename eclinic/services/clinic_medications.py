@@ -0,0 +1,174 @@
+"""
+Clinic-scoped medication search for the prescription editor.
+
+One pipeline, a fixed number of queries regardless of hit count:
+1. ranked GlobalMedication search (medication_search.search_global_medications)
+2. stock for all of those hits in a single ClinicInventory query
+3. clinic-only inventory items (clinic/category index + item_name trigram index)
+4. the clinic's frequently prescribed medicines (ClinicFrequentMedication),
+   which replaces scanning every PrescriptionMedication ever written
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from eclinic.models import ClinicFrequentMedication, ClinicInventory
+from .medication_search import search_global_medications
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_medicine_name(name):
+    return ' '.join((name or '').lower().split())[:200]
+
+
+def _global_result(med, inventory):
+    return {
+        'id': f"global_{med.id}",
+        'name': med.display_name,
+        'strength': med.strength or '',
+        'form': med.get_dosage_form_display(),
+        'source': 'global_catalog',
+        'stock': inventory.current_stock if inventory else 0,
+        'unit': inventory.unit if inventory else 'units',
+        'is_low_stock': inventory.is_low_stock if inventory else True,
+        'expiry_date': inventory.expiry_date if inventory else None,
+        'supplier': inventory.supplier_name if inventory else None,
+        'global_medication_id': med.id,
+        'composition': med.composition,
+        'therapeutic_class': med.therapeutic_class,
+        'frequency_options': med.frequency_options,
+        'timing_options': med.timing_options
+    }
+
+
+def _inventory_result(item):
+    return {
+        'id': f"inventory_{item.id}",
+        'name': item.item_name,
+        'strength': item.description or '',
+        'form': item.brand or 'Tablet',
+        'source': 'clinic_inventory',
+        'stock': item.current_stock,
+        'unit': item.unit,
+        'is_low_stock': item.is_low_stock,
+        'expiry_date': item.expiry_date,
+        'supplier': item.supplier_name,
+        'global_medication_id': None,
+        'composition': item.description,
+        'therapeutic_class': '',
+        'frequency_options': [],
+        'timing_options': []
+    }
+
+
+def _prescribed_result(med):
+    return {
+        'id': f"prescribed_{med.medicine_name}",
+        'name': med.medicine_name,
+        'strength': med.composition or '',
+        'form': med.dosage_form or 'Tablet',
+        'source': 'previously_prescribed',
+        'stock': None,
+        'unit': None,
+        'is_low_stock': None,
+        'expiry_date': None,
+        'supplier': None,
+        'global_medication_id': None,
+        'composition': med.composition,
+        'therapeutic_class': '',
+        'frequency_options': [],
+        'timing_options': [],
+        'prescription_count': med.prescription_count
+    }
+
+
+def search_clinic_medications(clinic_id, query, limit=10):
+    """
+    Search the global catalog, clinic inventory and the clinic's frequently
+    prescribed medicines; results are ordered catalog > inventory > prescribed.
+
+    Returns:
+        (results, total_found) where results holds at most ``limit`` entries
+    """
+    results = []
+
+    # 1 + 2. Catalog hits and their clinic stock (one inventory query for all hits)
+    global_medications = list(search_global_medications(query, limit))
+    stock = {}
+    inventory_for_hits = ClinicInventory.objects.filter(
+        clinic_id=clinic_id,
+        global_medication_id__in=[med.id for med in global_medications],
+        is_active=True
+    ).order_by('-current_stock')
+    for item in inventory_for_hits:
+        stock.setdefault(item.global_medication_id, item)
+    results.extend(_global_result(med, stock.get(med.id)) for med in global_medications)
+
+    # 3. Clinic-specific inventory items
+    inventory_medications = ClinicInventory.objects.filter(
+        clinic_id=clinic_id,
+        category='medicine',
+        is_active=True,
+        global_medication__isnull=True
+    ).filter(
+        Q(item_name__icontains=query) |
+        Q(description__icontains=query) |
+        Q(brand__icontains=query)
+    ).order_by('item_name')[:limit]
+    results.extend(_inventory_result(item) for item in inventory_medications)
+
+    # 4. Frequently prescribed in this clinic (skips names already listed)
+    frequent = ClinicFrequentMedication.objects.filter(clinic_id=clinic_id).filter(
+        Q(name_key__contains=normalize_medicine_name(query)) |
+        Q(composition__icontains=query) |
+        Q(dosage_form__icontains=query)
+    ).order_by('-prescription_count', 'medicine_name')[:limit]
+    existing_names = {result['name'] for result in results}
+    for med in frequent:
+        if med.medicine_name not in existing_names:
+            results.append(_prescribed_result(med))
+            existing_names.add(med.medicine_name)
+
+    return results[:limit], len(results)
+
+
+def record_prescribed_medications(prescription):
+    """
+    Add a newly finalized prescription's medicines to its clinic's
+    ClinicFrequentMedication tally. Call once per prescription, when it
+    becomes finalized.
+    """
+    consultation = prescription.consultation
+    clinic_id = consultation.clinic_id if consultation else None
+    if not clinic_id:
+        return
+
+    medications = {}
+    for med in prescription.medications.all().only('medicine_name', 'composition', 'dosage_form'):
+        name_key = normalize_medicine_name(med.medicine_name)
+        if name_key:
+            medications.setdefault(name_key, med)
+
+    now = timezone.now()
+    for name_key, med in medications.items():
+        defaults = {
+            'medicine_name': med.medicine_name[:200],
+            'composition': med.composition or '',
+            'dosage_form': med.dosage_form or '',
+            'last_prescribed_at': now,
+        }
+        tally = ClinicFrequentMedication.objects.filter(clinic_id=clinic_id, name_key=name_key)
+        if tally.update(prescription_count=F('prescription_count') + 1, **defaults):
+            continue
+        try:
+            with transaction.atomic():
+                ClinicFrequentMedication.objects.create(
+                    clinic_id=clinic_id, name_key=name_key, prescription_count=1, **defaults
+                )
+        except IntegrityError:
+            # Created concurrently by another finalize; count this one too
+            tally.update(prescription_count=F('prescription_count') + 1, **defaults)
@@ -1,11 +1,40 @@
 import requests
+import hashlib
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from django.conf import settings
+from django.core.cache import cache
 import logging
 
+from utils.singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
+# Search responses are cached by normalized query. Empty results are cached
+# for a shorter time (negative caching); upstream errors are not cached.
+FDA_CACHE_TTL = getattr(settings, 'FDA_CACHE_TTL', 60 * 60 * 24)
+FDA_NEGATIVE_CACHE_TTL = getattr(settings, 'FDA_NEGATIVE_CACHE_TTL', 60 * 10)
+FDA_REQUEST_TIMEOUT = getattr(settings, 'FDA_REQUEST_TIMEOUT', 5)
+# Upstream page size; smaller ``limit`` values are served from the same entry
+FDA_SEARCH_FETCH_LIMIT = getattr(settings, 'FDA_SEARCH_FETCH_LIMIT', 20)
+# How long a combined local+FDA search waits for FDA before answering with
+# local results only (the lookup keeps running and fills the cache)
+FDA_LATENCY_BUDGET = getattr(settings, 'FDA_LATENCY_BUDGET_MS', 800) / 1000
+
+_search_flight = SingleFlight()
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case and collapse whitespace so equivalent queries share a cache entry"""
+    return ' '.join((query or '').lower().split())
+
+
+def _search_cache_key(normalized_query: str, fetch_limit: int) -> str:
+    digest = hashlib.sha1(normalized_query.encode('utf-8')).hexdigest()
+    return f"fda:search:{fetch_limit}:{digest}"
+
 
 class FDADrugAPI:
     """Service class for interacting with OpenFDA Drug API"""
@@ -22,6 +51,9 @@ class FDADrugAPI:
         """
         Search for drugs using OpenFDA API
         
+        Results are cached by normalized query and concurrent identical
+        searches share a single upstream request.
+        
         Args:
             query: Search query (drug name, generic name, etc.)
             limit: Maximum number of results to return
@@ -29,29 +61,26 @@ class FDADrugAPI:
         Returns:
             List of drug information dictionaries
         """
+        normalized = normalize_query(query)
+        if not normalized:
+            return []
+        
+        fetch_limit = max(limit, FDA_SEARCH_FETCH_LIMIT)
+        cache_key = _search_cache_key(normalized, fetch_limit)
+        results = cache.get(cache_key)
+        if results is None:
+            results = _search_flight.do(cache_key, self._fetch_and_cache, normalized, fetch_limit, cache_key)
+        return results[:limit]
+    
+    def _fetch_and_cache(self, query: str, limit: int, cache_key: str) -> List[Dict]:
+        """Query openFDA and cache the parsed results (errors are not cached)"""
         try:
-            # Search in multiple fields - use simpler search syntax
-            search_params = {
-                'search': query,
-                'limit': limit
-            }
-            
             response = self.session.get(
                 f"{self.BASE_URL}/label.json",
-                params=search_params,
-                timeout=10
+                params={'search': query, 'limit': limit},
+                timeout=FDA_REQUEST_TIMEOUT
             )
-            response.raise_for_status()
-            
-            data = response.json()
-            results = []
-            
-            for drug in data.get('results', []):
-                drug_info = self._parse_drug_label(drug)
-                if drug_info:
-                    results.append(drug_info)
-            
-            return results
+            results = self._parse_search_response(response)
             
         except requests.RequestException as e:
             logger.error(f"FDA API request failed: {e}")
@@ -59,6 +88,22 @@ class FDADrugAPI:
         except Exception as e:
             logger.error(f"Error processing FDA API response: {e}")
             return []
+        
+        cache.set(cache_key, results, FDA_CACHE_TTL if results else FDA_NEGATIVE_CACHE_TTL)
+        return results
+    
+    def _parse_search_response(self, response) -> List[Dict]:
+        """Parse a label.json search response; openFDA answers 404 when nothing matches"""
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        
+        data = response.json()
+        return [
+            drug_info for drug_info in
+            (self._parse_drug_label(drug) for drug in data.get('results', []))
+            if drug_info
+        ]
     
     def get_drug_details(self, drug_name: str) -> Optional[Dict]:
         """
@@ -279,6 +324,19 @@ class FDADrugAPI:
 # Global instance
 fda_api = FDADrugAPI()
 
+FDA_SEARCH_WORKERS = getattr(settings, 'FDA_SEARCH_WORKERS', 4)
+# Lookups allowed to wait for a free worker; further lookups are skipped
+FDA_SEARCH_QUEUE_SIZE = getattr(settings, 'FDA_SEARCH_QUEUE_SIZE', 16)
+
+# Runs FDA lookups alongside the local search in the medication search views.
+# Worker threads outlive the request (and its event loop under async_to_sync),
+# so a lookup that misses the latency budget still completes and fills the cache.
+fda_search_executor = ThreadPoolExecutor(
+    max_workers=FDA_SEARCH_WORKERS,
+    thread_name_prefix='fda-search'
+)
+_fda_search_slots = threading.BoundedSemaphore(FDA_SEARCH_WORKERS + FDA_SEARCH_QUEUE_SIZE)
+
 
 def search_fda_medications(query: str, limit: int = 10) -> List[Dict]:
     """
@@ -294,6 +352,30 @@ def search_fda_medications(query: str, limit: int = 10) -> List[Dict]:
     return fda_api.search_drugs(query, limit)
 
 
+def submit_fda_search(query: str, limit: int = 10):
+    """
+    Start an FDA search in the background executor
+    
+    Args:
+        query: Search query
+        limit: Maximum number of results
+        
+    Returns:
+        concurrent.futures.Future resolving to a list of medication
+        dictionaries, or None when the executor is saturated
+    """
+    if not _fda_search_slots.acquire(blocking=False):
+        logger.warning(f"FDA search executor saturated, skipping lookup for '{query}'")
+        return None
+    try:
+        future = fda_search_executor.submit(search_fda_medications, query, limit)
+    except BaseException:
+        _fda_search_slots.release()
+        raise
+    future.add_done_callback(lambda _: _fda_search_slots.release())
+    return future
+
+
 def get_fda_medication_details(drug_name: str) -> Optional[Dict]:
     """
     Convenience function to get FDA medication details
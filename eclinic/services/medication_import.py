@@ -0,0 +1,117 @@
+"""
+Bulk ingest engine for the GlobalMedication catalog.
+
+Shared by the RxNorm import command and the bulk-create API. Rows are
+de-duplicated in memory by case-insensitive name and written in chunks:
+one lookup of already existing names plus one bulk INSERT per chunk,
+instead of two queries per row.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.functions import Upper
+
+from eclinic.models import GlobalMedication
+from utils.response_cache import bump_model_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Fields overwritten when an import updates an existing medication
+UPDATE_FIELDS = [
+    'generic_name', 'brand_name', 'composition', 'dosage_form', 'strength',
+    'medication_type', 'therapeutic_class', 'indication', 'contraindications',
+    'side_effects', 'dosage_instructions', 'frequency_options', 'timing_options',
+    'manufacturer', 'license_number', 'is_prescription_required', 'is_active',
+    'is_verified', 'updated_at'
+]
+
+
+def medication_key(name):
+    return (name or '').strip().upper()
+
+
+class MedicationBulkImporter:
+    """
+    Buffer medication dicts and write them with bulk_create.
+
+    Usage:
+        importer = MedicationBulkImporter(update_existing=True)
+        for data in rows:
+            importer.add(data)
+        stats = importer.finish()
+
+    Existing medications (matched case-insensitively on name) are skipped,
+    or updated in place when ``update_existing`` is set.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, update_existing=False, created_by=None):
+        self.batch_size = batch_size
+        self.update_existing = update_existing
+        self.created_by = created_by
+        self._seen = set()
+        self._buffer = {}
+        self.stats = {'processed': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'duplicates': 0}
+
+    def add(self, data):
+        """Queue one medication; returns False if its name was already queued"""
+        key = medication_key(data.get('name'))
+        if not key or key in self._seen:
+            self.stats['duplicates'] += 1
+            return False
+        self._seen.add(key)
+        self._buffer[key] = data
+        self.stats['processed'] += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        if not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, {}
+
+        existing = dict(
+            GlobalMedication.objects.annotate(name_key=Upper('name'))
+            .filter(name_key__in=list(buffer))
+            .values_list('name_key', 'name')
+        )
+
+        objects = []
+        for key, data in buffer.items():
+            if key in existing:
+                if not self.update_existing:
+                    self.stats['skipped'] += 1
+                    continue
+                # Conflict on the stored spelling so the row is updated in place
+                data = {**data, 'name': existing[key]}
+            objects.append(GlobalMedication(created_by=self.created_by, **data))
+
+        if not objects:
+            return
+
+        with transaction.atomic():
+            if self.update_existing:
+                GlobalMedication.objects.bulk_create(
+                    objects,
+                    update_conflicts=True,
+                    unique_fields=['name'],
+                    update_fields=UPDATE_FIELDS
+                )
+            else:
+                # ignore_conflicts covers rows inserted concurrently since the lookup
+                GlobalMedication.objects.bulk_create(objects, ignore_conflicts=True)
+            # bulk_create sends no signals
+            transaction.on_commit(lambda: bump_model_version(GlobalMedication))
+
+        updated = sum(1 for key in buffer if key in existing) if self.update_existing else 0
+        self.stats['updated'] += updated
+        self.stats['created'] += len(objects) - updated
+        logger.debug(f"Medication import batch written: {len(objects)} rows ({updated} updates)")
+
+    def finish(self):
+        """Write any buffered rows and return the stats dict"""
+        self.flush()
+        return self.stats
@@ -0,0 +1,72 @@
+"""
+Ranked GlobalMedication search for the prescription typeahead.
+
+On Postgres the predicates below are served by the pg_trgm GIN and
+text_pattern_ops indexes created in migration 0009; other backends run the
+same ORM query against the plain btree indexes. Results are ordered by a
+relevance tier (exact > prefix > substring) and, on Postgres, by trigram
+word similarity within a tier.
+"""
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+
+from eclinic.models import GlobalMedication
+
+# Below this length trigram matching cannot use the index, so only prefix
+# matches are considered.
+MIN_SUBSTRING_QUERY_LENGTH = 3
+
+PREFIX_FIELDS = ('name', 'generic_name', 'brand_name')
+SUBSTRING_FIELDS = ('name', 'generic_name', 'brand_name', 'composition', 'therapeutic_class')
+
+
+def _any_field(fields, lookup, query):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__{lookup}': query})
+    return condition
+
+
+def search_global_medications(query, limit=20, queryset=None):
+    """
+    Return up to ``limit`` active medications matching ``query``, best first.
+
+    Args:
+        query: Raw search string from the client
+        limit: Maximum number of rows
+        queryset: Optional base queryset (defaults to active medications)
+    """
+    query = (query or '').strip()
+    if not query:
+        return GlobalMedication.objects.none()
+
+    if queryset is None:
+        queryset = GlobalMedication.objects.filter(is_active=True)
+
+    if len(query) < MIN_SUBSTRING_QUERY_LENGTH:
+        matches = _any_field(PREFIX_FIELDS, 'istartswith', query)
+    else:
+        matches = _any_field(SUBSTRING_FIELDS, 'icontains', query)
+
+    relevance = Case(
+        When(name__iexact=query, then=Value(0)),
+        When(name__istartswith=query, then=Value(1)),
+        When(_any_field(('generic_name', 'brand_name'), 'istartswith', query), then=Value(2)),
+        When(name__icontains=query, then=Value(3)),
+        When(_any_field(('generic_name', 'brand_name'), 'icontains', query), then=Value(4)),
+        default=Value(5),
+        output_field=IntegerField(),
+    )
+    results = queryset.filter(matches).annotate(relevance=relevance)
+
+    ordering = ['relevance']
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        results = results.annotate(similarity=TrigramWordSimilarity(query, 'name'))
+        ordering.append('-similarity')
+    ordering.extend([Length('name').asc(), 'name'])
+
+    return results.order_by(*ordering)[:limit]
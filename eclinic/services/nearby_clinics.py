@@ -0,0 +1,140 @@
+"""
+Nearby clinic lookup for NearbyClinicView.
+
+1. Bounding-box prefilter on latitude/longitude, served by the partial
+   (latitude, longitude) index on active, verified clinics.
+2. Exact haversine distance in Python on the rows inside the box.
+
+Popular areas are served from a per grid cell cache: the candidate set
+(serialized clinics with coordinates) for a cell is cached, so nearby
+users share one query and only the distance filter runs per request. A
+version stamp bumped on every clinic save/delete invalidates all cells.
+"""
+
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from eclinic.models import Clinic
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+# Cell size for cached lookups (~5.5 km of latitude)
+GRID_CELL_DEGREES = getattr(settings, 'NEARBY_CLINIC_GRID_DEGREES', 0.05)
+# Radii are rounded up to this step so nearby requests share cache entries
+RADIUS_BUCKET_KM = 5
+NEARBY_CLINIC_CACHE_TTL = getattr(settings, 'NEARBY_CLINIC_CACHE_TTL', 60 * 5)
+MAX_CACHED_RADIUS_KM = getattr(settings, 'NEARBY_CLINIC_MAX_CACHED_RADIUS_KM', 50)
+
+VERSION_CACHE_KEY = 'eclinic:nearby:version'
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _longitude_delta(radius_km, latitude):
+    """Degrees of longitude covering ``radius_km`` at ``latitude`` (None = all longitudes)"""
+    cos_lat = math.cos(math.radians(min(abs(latitude), 90.0)))
+    if cos_lat < 1e-6:
+        return None
+    delta = radius_km / (KM_PER_DEGREE * cos_lat)
+    return None if delta >= 180 else delta
+
+
+def _box_filter(min_lat, max_lat, min_lng, max_lng):
+    """Q for a lat/lng box; longitude bounds may wrap past +/-180, or be None for all"""
+    condition = Q(latitude__gte=max(min_lat, -90), latitude__lte=min(max_lat, 90))
+    if min_lng is None:
+        return condition
+    if min_lng < -180:
+        return condition & (Q(longitude__gte=min_lng + 360) | Q(longitude__lte=max_lng))
+    if max_lng > 180:
+        return condition & (Q(longitude__gte=min_lng) | Q(longitude__lte=max_lng - 360))
+    return condition & Q(longitude__gte=min_lng, longitude__lte=max_lng)
+
+
+def _candidates(box, specialization):
+    """Serialized clinics inside ``box`` as (latitude, longitude, data) tuples"""
+    from eclinic.serializers import ClinicSerializer
+
+    queryset = Clinic.objects.filter(
+        _box_filter(*box),
+        is_active=True,
+        is_verified=True,
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).select_related('admin')
+    if specialization:
+        queryset = queryset.filter(specialties__icontains=specialization)
+
+    clinics = list(queryset)
+    data = ClinicSerializer(clinics, many=True).data
+    return [(float(clinic.latitude), float(clinic.longitude), item) for clinic, item in zip(clinics, data)]
+
+
+def _point_box(lat, lng, radius_km):
+    lat_delta = radius_km / KM_PER_DEGREE
+    # Widest longitude span is at the box edge closest to a pole
+    lng_delta = _longitude_delta(radius_km, max(abs(lat - lat_delta), abs(lat + lat_delta)))
+    if lng_delta is None:
+        return lat - lat_delta, lat + lat_delta, None, None
+    return lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta
+
+
+def _cell_box(cell_lat, cell_lng, radius_km):
+    """Box containing every point within ``radius_km`` of any point in the cell"""
+    south, west = cell_lat * GRID_CELL_DEGREES, cell_lng * GRID_CELL_DEGREES
+    north, east = south + GRID_CELL_DEGREES, west + GRID_CELL_DEGREES
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = _longitude_delta(radius_km, max(abs(south - lat_delta), abs(north + lat_delta)))
+    if lng_delta is None:
+        return south - lat_delta, north + lat_delta, None, None
+    return south - lat_delta, north + lat_delta, west - lng_delta, east + lng_delta
+
+
+def _cached_candidates(lat, lng, radius_km, specialization):
+    bucket = math.ceil(radius_km / RADIUS_BUCKET_KM) * RADIUS_BUCKET_KM
+    cell_lat = math.floor(lat / GRID_CELL_DEGREES)
+    cell_lng = math.floor(lng / GRID_CELL_DEGREES)
+    version = cache.get_or_set(VERSION_CACHE_KEY, 1, None)
+    key = f"eclinic:nearby:{version}:{cell_lat}:{cell_lng}:{bucket}:{(specialization or '').strip().lower()}"
+
+    candidates = cache.get(key)
+    if candidates is None:
+        candidates = _candidates(_cell_box(cell_lat, cell_lng, bucket), specialization)
+        cache.set(key, candidates, NEARBY_CLINIC_CACHE_TTL)
+    return candidates
+
+
+def find_nearby_clinics(lat, lng, radius_km, specialization=None):
+    """
+    Serialized active, verified clinics within ``radius_km`` of (lat, lng),
+    nearest first, each with ``distance_km``.
+    """
+    if radius_km <= MAX_CACHED_RADIUS_KM:
+        candidates = _cached_candidates(lat, lng, radius_km, specialization)
+    else:
+        candidates = _candidates(_point_box(lat, lng, radius_km), specialization)
+
+    results = []
+    for clinic_lat, clinic_lng, data in candidates:
+        distance = haversine_km(lat, lng, clinic_lat, clinic_lng)
+        if distance <= radius_km:
+            results.append((distance, data))
+    results.sort(key=lambda result: result[0])
+    return [{**data, 'distance_km': round(distance, 2)} for distance, data in results]
+
+
+def invalidate_nearby_clinics():
+    """Invalidate every cached cell (called when a clinic changes)"""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 2, None)
@@ -0,0 +1,144 @@
+"""
+Streaming parser for RxNorm RXNCONSO.RRF data.
+
+Rows are read straight out of the release zip (no extraction) and parsed
+into GlobalMedication field dicts. Parsing is CPU bound, so it can be
+spread over worker processes; this module deliberately avoids Django
+imports so workers stay cheap to start.
+"""
+
+import io
+import os
+import re
+import zipfile
+from itertools import islice
+from multiprocessing import Pool
+
+# IN = Ingredient, PIN = Precise Ingredient, BN = Brand Name,
+# SBD/SCD = Semantic Branded/Clinical Drug, GPCK/BPCK = packs
+VALID_TTYS = {'IN', 'PIN', 'BN', 'SBD', 'SCD', 'GPCK', 'BPCK'}
+GENERIC_TTYS = {'IN', 'PIN'}
+BRANDED_TTYS = {'BN', 'SBD'}
+
+DOSAGE_FORM_KEYWORDS = {
+    'tablet': ['tablet', 'tab', 'tabs'],
+    'capsule': ['capsule', 'cap', 'caps'],
+    'syrup': ['syrup', 'suspension', 'liquid'],
+    'injection': ['injection', 'injectable', 'vial'],
+    'cream': ['cream', 'ointment', 'gel'],
+    'drops': ['drops', 'eye drops', 'ear drops'],
+    'inhaler': ['inhaler', 'inhalation'],
+}
+
+STRENGTH_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(mg|mcg|g|ml|mcg/ml|mg/ml|g/ml)', re.IGNORECASE)
+
+FREQUENCY_OPTIONS = ['once_daily', 'twice_daily', 'thrice_daily']
+TIMING_OPTIONS = [
+    'before_breakfast', 'after_breakfast', 'before_lunch', 'after_lunch',
+    'before_dinner', 'after_dinner', 'at_bedtime'
+]
+
+# Lines handed to a worker process at a time
+PARSE_CHUNK_SIZE = 10000
+
+
+def iter_rrf_lines(file_path):
+    """
+    Yield lines of RXNCONSO.RRF from a release zip or a plain .RRF file,
+    streaming from the archive member instead of extracting it.
+    """
+    if zipfile.is_zipfile(file_path):
+        with zipfile.ZipFile(file_path) as archive:
+            members = [
+                name for name in archive.namelist()
+                if os.path.basename(name).upper().startswith('RXNCONSO')
+            ]
+            if not members:
+                raise ValueError('No RXNCONSO file found in zip archive')
+            with archive.open(members[0]) as raw:
+                yield from io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    else:
+        with open(file_path, 'r', encoding='utf-8', newline='') as handle:
+            yield from handle
+
+
+def parse_rxnorm_line(line):
+    """
+    Parse one RXNCONSO.RRF line into GlobalMedication fields, or None if the
+    concept is not an English preferred term of a supported type.
+
+    RRF is pipe-delimited without quoting:
+    RXCUI|LAT|TS|LUI|STT|SUI|ISPREF|RXAUI|SAUI|SCUI|SDUI|SAB|TTY|CODE|STR|SRL|SUPPRESS|CVF|
+    """
+    row = line.rstrip('\r\n').split('|')
+    if len(row) < 18:
+        return None
+
+    lat, ispref, tty, str_name = row[1], row[6], row[12], row[14]
+    if lat != 'ENG' or ispref != 'Y' or tty not in VALID_TTYS:
+        return None
+
+    name = str_name.strip()[:200]
+    if len(name) < 2:
+        return None
+
+    if tty in GENERIC_TTYS:
+        medication_type = 'generic'
+    elif tty in BRANDED_TTYS:
+        medication_type = 'branded'
+    else:
+        medication_type = 'combination'
+
+    name_lower = name.lower()
+    dosage_form = 'tablet'
+    for form, keywords in DOSAGE_FORM_KEYWORDS.items():
+        if any(keyword in name_lower for keyword in keywords):
+            dosage_form = form
+            break
+
+    strength = ''
+    strength_match = STRENGTH_PATTERN.search(name)
+    if strength_match:
+        strength = f"{strength_match.group(1)}{strength_match.group(2)}"
+
+    return {
+        'name': name,
+        'generic_name': name if medication_type == 'generic' else '',
+        'brand_name': name if medication_type == 'branded' else '',
+        'dosage_form': dosage_form,
+        'strength': strength,
+        'medication_type': medication_type,
+        'frequency_options': FREQUENCY_OPTIONS,
+        'timing_options': TIMING_OPTIONS,
+        'is_prescription_required': True,
+        'is_active': True,
+        'is_verified': False,
+    }
+
+
+def _parse_chunk(lines):
+    return [medication for medication in map(parse_rxnorm_line, lines) if medication]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_rxnorm_medications(file_path, workers=1, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Yield parsed medication dicts from an RxNorm file in file order.
+
+    With ``workers`` > 1 chunks of lines are parsed in a process pool while
+    the caller consumes (and writes) earlier results.
+    """
+    chunks = _chunks(iter_rrf_lines(file_path), chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _parse_chunk(chunk)
+        return
+
+    with Pool(processes=workers) as pool:
+        for parsed in pool.imap(_parse_chunk, chunks):
+            yield from parsed
@@ -2,10 +2,13 @@
 Signals for automatic file upload to DigitalOcean Spaces
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 from .models import Clinic
+from utils.image_derivatives import queue_derivatives
+from .services.clinic_analytics import invalidate_clinic_analytics
+from .services.nearby_clinics import invalidate_nearby_clinics
 import threading
 import boto3
 import os
@@ -107,4 +110,17 @@ def upload_files_sync(clinic_id):
                     print(f"❌ [SYNC] Error uploading cover image: {e}")
                     
     except Exception as e:
-        print(f"❌ [SYNC] Error in upload_files_sync: {e}") 
\ No newline at end of file
+        print(f"❌ [SYNC] Error in upload_files_sync: {e}") 
+
+@receiver(post_save, sender=Clinic)
+def queue_cover_image_derivatives(sender, instance, **kwargs):
+    """Render thumbnail/WebP variants when the cover image changes"""
+    queue_derivatives(instance, 'cover_image', 'cover_image_variants')
+
+
+@receiver(post_save, sender=Clinic)
+@receiver(post_delete, sender=Clinic)
+def invalidate_clinic_caches(sender, instance, **kwargs):
+    """Drop cached nearby clinic cells and analytics when a clinic changes"""
+    invalidate_nearby_clinics()
+    invalidate_clinic_analytics()
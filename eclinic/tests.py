@@ -41,3 +41,329 @@ class ClinicModelTest(TestCase):
         self.assertEqual(clinic.clinic_type, 'virtual_clinic')
         self.assertEqual(clinic.specialties, ['General Medicine'])
         self.assertEqual(clinic.registration_number, 'REG123')
+
+
+class MedicationSearchTest(TestCase):
+    def setUp(self):
+        from .models import GlobalMedication
+        GlobalMedication.objects.create(name='Paracetamol Extra', generic_name='Paracetamol')
+        GlobalMedication.objects.create(name='Paracetamol', generic_name='Paracetamol')
+        GlobalMedication.objects.create(name='Crocin', generic_name='Paracetamol', brand_name='Crocin')
+        GlobalMedication.objects.create(name='Ibuprofen', generic_name='Ibuprofen')
+        GlobalMedication.objects.create(name='Paracetamol Old', generic_name='Paracetamol', is_active=False)
+
+    def test_ranked_by_relevance(self):
+        from .services.medication_search import search_global_medications
+        names = [m.name for m in search_global_medications('paracetamol')]
+        self.assertEqual(names, ['Paracetamol', 'Paracetamol Extra', 'Crocin'])
+
+    def test_short_query_uses_prefix_match(self):
+        from .services.medication_search import search_global_medications
+        names = [m.name for m in search_global_medications('ib')]
+        self.assertEqual(names, ['Ibuprofen'])
+        self.assertEqual(list(search_global_medications('')), [])
+
+
+class FDASearchCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _response(self, status_code, results=None):
+        from unittest import mock
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = {'results': results or []}
+        return response
+
+    def test_results_cached_by_normalized_query(self):
+        from unittest import mock
+        from .services.fda_api import fda_api
+        label = {'openfda': {'generic_name': ['ACETAMINOPHEN'], 'product_ndc': ['0001']}}
+        with mock.patch.object(fda_api.session, 'get', return_value=self._response(200, [label])) as get:
+            self.assertEqual(fda_api.search_drugs('Acetaminophen', 5)[0]['name'], 'ACETAMINOPHEN')
+            self.assertEqual(len(fda_api.search_drugs('  acetaminophen ', 1)), 1)
+        self.assertEqual(get.call_count, 1)
+
+    def test_empty_results_negative_cached(self):
+        from unittest import mock
+        from .services.fda_api import fda_api
+        with mock.patch.object(fda_api.session, 'get', return_value=self._response(404)) as get:
+            self.assertEqual(fda_api.search_drugs('zzzz'), [])
+            self.assertEqual(fda_api.search_drugs('zzzz'), [])
+        self.assertEqual(get.call_count, 1)
+
+    def test_slow_lookup_outlives_async_request(self):
+        """A lookup past the latency budget is answered without FDA but still completes"""
+        import threading
+        from unittest import mock
+        from .services import fda_api
+        finished = threading.Event()
+        release = threading.Event()
+
+        def slow_search(query, limit):
+            release.wait(5)
+            finished.set()
+            return []
+
+        with mock.patch.object(fda_api, 'search_fda_medications', slow_search), \
+                mock.patch('eclinic.views.FDA_LATENCY_BUDGET', 0.05):
+            response = self.client.get('/api/eclinic/medications/public-search/', {'q': 'para', 'include_fda': 'true'})
+            release.set()
+            self.assertTrue(finished.wait(5))
+        self.assertTrue(response.json()['data']['fda_timed_out'])
+
+    def test_saturated_executor_skips_lookup(self):
+        from unittest import mock
+        from .services import fda_api
+        with mock.patch.object(fda_api, '_fda_search_slots') as slots:
+            slots.acquire.return_value = False
+            self.assertIsNone(fda_api.submit_fda_search('para'))
+
+
+class ClinicMedicationSearchTest(TestCase):
+    def setUp(self):
+        from .models import ClinicInventory, GlobalMedication
+        self.doctor = User.objects.create_user(phone='+911234567892', name='Doctor', role='doctor')
+        self.patient = User.objects.create_user(phone='+911234567893', name='Patient', role='patient')
+        self.clinic = Clinic.objects.create(name='Search Clinic', clinic_type='virtual_clinic', admin=self.doctor)
+        paracetamol = GlobalMedication.objects.create(name='Paracetamol', generic_name='Paracetamol')
+        ClinicInventory.objects.create(
+            clinic=self.clinic, global_medication=paracetamol, item_name='Paracetamol',
+            category='medicine', current_stock=40, unit='tablets'
+        )
+        ClinicInventory.objects.create(
+            clinic=self.clinic, item_name='Paracip Syrup', category='medicine', current_stock=5
+        )
+
+    def _finalize(self, *names):
+        from consultations.models import Consultation
+        from prescriptions.models import Prescription
+        from .services.clinic_medications import record_prescribed_medications
+        consultation = Consultation.objects.create(
+            patient=self.patient, doctor=self.doctor, clinic=self.clinic,
+            scheduled_date='2025-01-10', scheduled_time='09:00',
+            chief_complaint='Fever', consultation_fee=500
+        )
+        prescription = Prescription.objects.create(
+            consultation=consultation, doctor=self.doctor, patient=self.patient, is_finalized=True
+        )
+        for name in names:
+            prescription.medications.create(medicine_name=name, dosage_form='Tablet')
+        record_prescribed_medications(prescription)
+
+    def test_search_combines_sources(self):
+        from .services.clinic_medications import search_clinic_medications
+        self._finalize('Paracetamol', 'Paracamol 650')
+        self._finalize('paracamol  650')
+
+        with self.assertNumQueries(4):
+            results, total = search_clinic_medications(self.clinic.id, 'parac', 10)
+
+        self.assertEqual([r['source'] for r in results],
+                         ['global_catalog', 'clinic_inventory', 'previously_prescribed'])
+        self.assertEqual(results[0]['stock'], 40)
+        self.assertEqual(results[2]['prescription_count'], 2)
+        self.assertEqual(total, 3)
+
+
+class MedicationBulkImportTest(TestCase):
+    RRF_LINES = [
+        '1|ENG|P|L1|PF|S1|Y|A1||||RXNORM|IN|1|Ibuprofen|0|N|4096|',
+        '2|ENG|P|L2|PF|S2|Y|A2||||RXNORM|SCD|2|Amoxicillin 500 MG Oral Capsule|0|N|4096|',
+        '3|ENG|P|L3|PF|S3|Y|A3||||RXNORM|BN|3|Crocin "Advance"|0|N|4096|',
+        '4|ENG|P|L4|PF|S4|Y|A4||||RXNORM|IN|4|IBUPROFEN|0|N|4096|',
+        '5|SPA|P|L5|PF|S5|Y|A5||||MSHSPA|IN|5|Ibuprofeno|0|N||',
+        '6|ENG|P|L6|PF|S6|N|A6||||RXNORM|IN|6|Naproxen|0|N|4096|',
+    ]
+
+    def setUp(self):
+        import os
+        import tempfile
+        import zipfile
+        from .models import GlobalMedication
+        GlobalMedication.objects.create(name='Paracetamol', generic_name='Paracetamol')
+        GlobalMedication.objects.create(name='amoxicillin 500 mg oral capsule', indication='Old')
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.zip_path = os.path.join(self.tempdir.name, 'RxNorm_full.zip')
+        with zipfile.ZipFile(self.zip_path, 'w') as archive:
+            archive.writestr('rrf/RXNCONSO.RRF', '\n'.join(self.RRF_LINES) + '\n')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_import_streams_zip_and_dedups(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import GlobalMedication
+        call_command('import_rxnorm_data', file=self.zip_path, batch_size=2, stdout=StringIO())
+
+        names = set(GlobalMedication.objects.values_list('name', flat=True))
+        self.assertEqual(names, {'Paracetamol', 'amoxicillin 500 mg oral capsule', 'Ibuprofen', 'Crocin "Advance"'})
+
+        call_command('import_rxnorm_data', file=self.zip_path, update_existing=True, stdout=StringIO())
+        amoxicillin = GlobalMedication.objects.get(name='amoxicillin 500 mg oral capsule')
+        self.assertEqual((amoxicillin.dosage_form, amoxicillin.strength), ('capsule', '500MG'))
+        self.assertEqual(GlobalMedication.objects.count(), 4)
+
+    def test_bulk_importer_queries_per_batch(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .services.medication_import import MedicationBulkImporter
+        importer = MedicationBulkImporter(batch_size=50)
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(100):
+                importer.add({'name': f'Medication {i}'})
+            stats = importer.finish()
+        selects = [q for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 2)
+        self.assertLess(len(queries.captured_queries), 20)
+        self.assertEqual(stats['created'], 100)
+
+
+class NearbyClinicSearchTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.clinics = {}
+        for index, (name, lat, lng, verified, specialties) in enumerate([
+            ('Bandra Clinic', 19.0596, 72.8295, True, ['Cardiology', 'General Medicine']),
+            ('Dadar Clinic', 19.0178, 72.8478, True, ['Dermatology']),
+            ('Pune Clinic', 18.5204, 73.8567, True, ['Cardiology']),
+            ('Unverified Clinic', 19.0600, 72.8300, False, ['Cardiology']),
+        ]):
+            admin = User.objects.create_user(phone=f'+91300000000{index}', name=f'Admin {index}', role='admin')
+            self.clinics[name] = Clinic.objects.create(
+                name=name, clinic_type='virtual_clinic', admin=admin, registration_number=f'NEAR{index}',
+                latitude=lat, longitude=lng, is_verified=verified, specialties=specialties
+            )
+
+    def test_nearest_first_within_radius(self):
+        from .services.nearby_clinics import find_nearby_clinics
+        results = find_nearby_clinics(19.0760, 72.8777, 10)
+        self.assertEqual([clinic['name'] for clinic in results], ['Bandra Clinic', 'Dadar Clinic'])
+        self.assertAlmostEqual(results[0]['distance_km'], 5.4, delta=0.2)
+
+        results = find_nearby_clinics(19.0760, 72.8777, 200, specialization='cardio')
+        self.assertEqual([clinic['name'] for clinic in results], ['Bandra Clinic', 'Pune Clinic'])
+
+    def test_grid_cell_cache(self):
+        from .services.nearby_clinics import find_nearby_clinics
+        find_nearby_clinics(19.0760, 72.8777, 10)
+        # Same cell and radius bucket: served from cache
+        with self.assertNumQueries(0):
+            results = find_nearby_clinics(19.0761, 72.8778, 8)
+        self.assertEqual(len(results), 2)
+
+        clinic = self.clinics['Dadar Clinic']
+        clinic.is_active = False
+        clinic.save()
+        results = find_nearby_clinics(19.0760, 72.8777, 10)
+        self.assertEqual([clinic['name'] for clinic in results], ['Bandra Clinic'])
+
+    def test_bounding_box_wraps_antimeridian(self):
+        from .services.nearby_clinics import find_nearby_clinics
+        clinic = self.clinics['Pune Clinic']
+        clinic.latitude, clinic.longitude = -17.0, 179.99
+        clinic.save()
+        results = find_nearby_clinics(-17.0, -179.99, 10)
+        self.assertEqual([clinic['name'] for clinic in results], ['Pune Clinic'])
+
+
+class ClinicAnalyticsTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        for index, (city, verified, specialties) in enumerate([
+            ('Mumbai', True, ['Cardiology', 'General Medicine']),
+            ('Mumbai', False, ['Cardiology']),
+            ('Pune', True, []),
+        ]):
+            admin = User.objects.create_user(phone=f'+91310000000{index}', name=f'Admin {index}', role='admin')
+            Clinic.objects.create(
+                name=f'Clinic {index}', clinic_type='virtual_clinic', admin=admin, registration_number=f'AN{index}',
+                city=city, is_verified=verified, specialties=specialties
+            )
+
+    def test_grouped_aggregates(self):
+        from .services.clinic_analytics import get_clinic_analytics
+        with self.assertNumQueries(6):
+            analytics = get_clinic_analytics()
+
+        self.assertEqual(analytics['overview']['total_clinics'], 3)
+        self.assertEqual(analytics['overview']['verified_clinics'], 2)
+        self.assertEqual(analytics['overview']['verification_rate'], 66.7)
+        self.assertEqual(analytics['growth']['new_clinics_7d'], 3)
+        self.assertEqual(analytics['geographic']['cities'][0], {'city': 'Mumbai', 'count': 2})
+        self.assertEqual(analytics['specializations']['top_specialties'][0], {'specialty': 'Cardiology', 'count': 2})
+        self.assertEqual(analytics['specializations']['total_specialties'], 2)
+        months = analytics['trends']['monthly_growth']
+        self.assertEqual(len(months), 12)
+        self.assertEqual(months[-1]['count'], 3)
+        self.assertEqual(sum(month['count'] for month in months), 3)
+
+    def test_cached_until_clinic_saved(self):
+        from .services.clinic_analytics import get_clinic_analytics
+        get_clinic_analytics()
+        with self.assertNumQueries(0):
+            get_clinic_analytics()
+
+        clinic = Clinic.objects.get(registration_number='AN1')
+        clinic.is_verified = True
+        clinic.save()
+        self.assertEqual(get_clinic_analytics()['overview']['verified_clinics'], 3)
+
+
+class PublicResponseCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.admin = User.objects.create_user(phone='+911234567960', name='Admin', role='admin')
+        self.clinic = Clinic.objects.create(name='Cached Clinic', clinic_type='virtual_clinic', admin=self.admin,
+                                            registration_number='CACHE1')
+        self.client = APIClient()
+        self.url = '/api/eclinic/public/'
+
+    def test_repeat_requests_skip_the_view(self):
+        response = self.client.get(self.url, {'search': 'Cached', 'page': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['count'], 1)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertIn('Accept', response['Vary'])
+        self.assertIn('public', response['Cache-Control'])
+
+        # Same parameters in another order: served from the cache
+        with self.assertNumQueries(0):
+            cached = self.client.get(f'{self.url}?page=1&search=Cached')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, {'search': 'Cached', 'page': 1},
+                                            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_model_changes_invalidate(self):
+        response = self.client.get(self.url, {'search': 'Cached'})
+        other_admin = User.objects.create_user(phone='+911234567961', name='Admin 2', role='admin')
+        with self.captureOnCommitCallbacks(execute=True):
+            Clinic.objects.create(name='Cached Clinic 2', clinic_type='virtual_clinic', admin=other_admin,
+                                  registration_number='CACHE2')
+
+        fresh = self.client.get(self.url, {'search': 'Cached'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json()['data']['count'], 2)
+        self.assertNotEqual(fresh['ETag'], response['ETag'])
+
+    def test_bulk_updates_bump_the_version(self):
+        from utils.response_cache import bump_model_version
+        response = self.client.get(self.url, {'search': 'Cached'})
+
+        # update() skips post_save, so the caller bumps
+        Clinic.objects.filter(pk=self.clinic.pk).update(name='Cached Clinic Renamed')
+        bump_model_version(Clinic)
+        fresh = self.client.get(self.url, {'search': 'Cached'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json()['data']['results'][0]['name'], 'Cached Clinic Renamed')
+        self.assertNotEqual(fresh['ETag'], response['ETag'])
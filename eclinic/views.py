@@ -5,7 +5,8 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, Sum, Avg
+from django.db.models.functions import Upper
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from datetime import datetime, timedelta
@@ -20,14 +21,26 @@ from .models import ClinicService, ClinicInventory, ClinicAppointment, ClinicRev
 from .serializers import ClinicServiceSerializer, ClinicInventorySerializer, ClinicAppointmentSerializer, ClinicReviewSerializer, ClinicDocumentSerializer
 from .serializers import ClinicServiceCreateSerializer, ClinicInventoryCreateSerializer, ClinicAppointmentCreateSerializer, ClinicReviewCreateSerializer, ClinicDocumentCreateSerializer
 from .serializers import ClinicSearchSerializer
-from prescriptions.models import PrescriptionMedication
 from .serializers import (
     GlobalMedicationSerializer, GlobalMedicationCreateSerializer, GlobalMedicationSearchSerializer
 )
 from .models import (
     GlobalMedication
 )
-from .services.fda_api import search_fda_medications, get_fda_medication_details
+from .services.medication_search import search_global_medications
+from .services.clinic_medications import search_clinic_medications
+from .services.medication_import import MedicationBulkImporter, medication_key
+from .services.nearby_clinics import find_nearby_clinics
+from .services.clinic_analytics import get_clinic_analytics
+from utils.response_cache import cache_response
+from .services.fda_api import (
+    get_fda_medication_details, submit_fda_search, FDA_LATENCY_BUDGET
+)
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import asyncio
+import time
 
 
 class ClinicPagination(PageNumberPagination):
@@ -183,58 +196,28 @@ class GlobalMedicationViewSet(ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            results = []
+            started = time.monotonic()
+            
+            # 1. Start the FDA lookup first so it runs while the local search does
+            fda_future = None
+            if source in ['fda', 'all'] and include_fda:
+                fda_future = submit_fda_search(query, limit)
             
-            # 1. Search local database
+            # 2. Search local database
+            results = []
             if source in ['local', 'all']:
-                local_medications = GlobalMedication.objects.filter(
-                    is_active=True
-                ).filter(
-                    Q(name__icontains=query) |
-                    Q(generic_name__icontains=query) |
-                    Q(brand_name__icontains=query) |
-                    Q(composition__icontains=query) |
-                    Q(therapeutic_class__icontains=query)
-                )[:limit]
-                
-                for med in local_medications:
-                    results.append({
-                        'id': f"local_{med.id}",
-                        'name': med.name,
-                        'generic_name': med.generic_name,
-                        'brand_name': med.brand_name,
-                        'strength': med.strength,
-                        'dosage_form': med.get_dosage_form_display(),
-                        'source': 'local_database',
-                        'therapeutic_class': med.therapeutic_class,
-                        'is_verified': med.is_verified,
-                        'medication_type': med.get_medication_type_display(),
-                        'composition': med.composition,
-                        'indication': med.indication,
-                        'manufacturer': med.manufacturer
-                    })
+                results.extend(search_local_medications(query, limit))
             
-            # 2. Search FDA API if requested
-            if source in ['fda', 'all'] and include_fda and len(results) < limit:
-                fda_limit = limit - len(results)
-                fda_results = search_fda_medications(query, fda_limit)
-                
-                for fda_med in fda_results:
-                    results.append({
-                        'id': fda_med['id'],
-                        'name': fda_med['name'],
-                        'generic_name': fda_med['generic_name'],
-                        'brand_name': fda_med['brand_name'],
-                        'strength': fda_med['strength'],
-                        'dosage_form': fda_med['dosage_form'],
-                        'source': 'fda_api',
-                        'therapeutic_class': fda_med['therapeutic_class'],
-                        'is_verified': fda_med['is_verified'],
-                        'medication_type': fda_med['medication_type'],
-                        'composition': fda_med['composition'],
-                        'indication': fda_med['indication'],
-                        'manufacturer': fda_med['manufacturer']
-                    })
+            # 3. Merge FDA results if they arrive within the latency budget
+            #    (a saturated executor skips FDA, reported as timed out)
+            fda_timed_out = source in ['fda', 'all'] and include_fda and fda_future is None
+            if fda_future is not None:
+                try:
+                    remaining = max(0, FDA_LATENCY_BUDGET - (time.monotonic() - started))
+                    fda_results = fda_future.result(timeout=remaining)
+                    results.extend(format_fda_medication(fda_med) for fda_med in fda_results[:limit - len(results)])
+                except FutureTimeoutError:
+                    fda_timed_out = True
             
             return Response({
                 'success': True,
@@ -242,7 +225,8 @@ class GlobalMedicationViewSet(ModelViewSet):
                     'medications': results,
                     'total_found': len(results),
                     'query': query,
-                    'sources_searched': ['local_database'] + (['fda_api'] if include_fda else [])
+                    'sources_searched': ['local_database'] + (['fda_api'] if include_fda else []),
+                    'fda_timed_out': fda_timed_out
                 },
                 'message': 'Medications found successfully',
                 'timestamp': timezone.now().isoformat()
@@ -274,26 +258,35 @@ class GlobalMedicationViewSet(ModelViewSet):
                     'timestamp': timezone.now().isoformat()
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            created_count = 0
             errors = []
-            
+            valid_medications = []
+            context = {'request': request, 'bulk_import': True}
+
             for med_data in medications_data:
-                try:
-                    serializer = GlobalMedicationCreateSerializer(data=med_data, context={'request': request})
-                    if serializer.is_valid():
-                        serializer.save()
-                        created_count += 1
-                    else:
-                        errors.append({
-                            'data': med_data,
-                            'errors': serializer.errors
-                        })
-                except Exception as e:
+                serializer = GlobalMedicationCreateSerializer(data=med_data, context=context)
+                if serializer.is_valid():
+                    valid_medications.append((med_data, serializer.validated_data))
+                else:
                     errors.append({
                         'data': med_data,
-                        'error': str(e)
+                        'errors': serializer.errors
                     })
-            
+
+            # One lookup for names that already exist instead of one per row
+            existing = set(
+                GlobalMedication.objects.annotate(name_key=Upper('name'))
+                .filter(name_key__in=[medication_key(data['name']) for _, data in valid_medications])
+                .values_list('name_key', flat=True)
+            )
+            importer = MedicationBulkImporter(created_by=request.user)
+            for med_data, data in valid_medications:
+                if medication_key(data['name']) in existing or not importer.add(data):
+                    errors.append({
+                        'data': med_data,
+                        'errors': {'name': ['A medication with this name already exists.']}
+                    })
+            created_count = importer.finish()['created']
+
             return Response({
                 'success': True,
                 'data': {
@@ -594,141 +587,13 @@ class ClinicInventoryViewSet(ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            results = []
-            
-            # 1. Search in global medication catalog
-            global_medications = GlobalMedication.objects.filter(
-                is_active=True
-            ).filter(
-                Q(name__icontains=query) |
-                Q(generic_name__icontains=query) |
-                Q(brand_name__icontains=query) |
-                Q(composition__icontains=query)
-            )[:limit]
-            
-            for med in global_medications:
-                # Check if this medication exists in clinic inventory
-                clinic_inventory = ClinicInventory.objects.filter(
-                    clinic_id=clinic_id,
-                    global_medication=med,
-                    is_active=True
-                ).first()
-                
-                results.append({
-                    'id': f"global_{med.id}",
-                    'name': med.display_name,
-                    'strength': med.strength or '',
-                    'form': med.get_dosage_form_display(),
-                    'source': 'global_catalog',
-                    'stock': clinic_inventory.current_stock if clinic_inventory else 0,
-                    'unit': clinic_inventory.unit if clinic_inventory else 'units',
-                    'is_low_stock': clinic_inventory.is_low_stock if clinic_inventory else True,
-                    'expiry_date': clinic_inventory.expiry_date if clinic_inventory else None,
-                    'supplier': clinic_inventory.supplier_name if clinic_inventory else None,
-                    'global_medication_id': med.id,
-                    'composition': med.composition,
-                    'therapeutic_class': med.therapeutic_class,
-                    'frequency_options': med.frequency_options,
-                    'timing_options': med.timing_options
-                })
-            
-            # 2. Search in clinic inventory (medicines only) - for clinic-specific items
-            inventory_medications = ClinicInventory.objects.filter(
-                clinic_id=clinic_id,
-                category='medicine',
-                is_active=True,
-                global_medication__isnull=True  # Only clinic-specific items
-            ).filter(
-                Q(item_name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(brand__icontains=query)
-            )[:limit]
-            
-            for med in inventory_medications:
-                results.append({
-                    'id': f"inventory_{med.id}",
-                    'name': med.item_name,
-                    'strength': med.description or '',
-                    'form': med.brand or 'Tablet',
-                    'source': 'clinic_inventory',
-                    'stock': med.current_stock,
-                    'unit': med.unit,
-                    'is_low_stock': med.is_low_stock,
-                    'expiry_date': med.expiry_date,
-                    'supplier': med.supplier_name,
-                    'global_medication_id': None,
-                    'composition': med.description,
-                    'therapeutic_class': '',
-                    'frequency_options': [],
-                    'timing_options': []
-                })
-            
-            # 3. Search in previously prescribed medications (from prescriptions in this clinic)
-            try:
-                clinic_prescriptions = PrescriptionMedication.objects.filter(
-                    prescription__consultation__clinic_id=clinic_id
-                ).filter(
-                    Q(medicine_name__icontains=query) |
-                    Q(composition__icontains=query) |
-                    Q(dosage_form__icontains=query)
-                ).values('medicine_name', 'composition', 'dosage_form').distinct()[:limit]
-                
-                # If no clinic-specific prescriptions found, search all prescriptions by doctors in this clinic
-                if not clinic_prescriptions.exists():
-                    clinic_prescriptions = PrescriptionMedication.objects.filter(
-                        prescription__doctor__clinic_associations__clinic_id=clinic_id
-                    ).filter(
-                        Q(medicine_name__icontains=query) |
-                        Q(composition__icontains=query) |
-                        Q(dosage_form__icontains=query)
-                    ).values('medicine_name', 'composition', 'dosage_form').distinct()[:limit]
-            except Exception as e:
-                # If there's an issue with clinic relationships, search all medications
-                clinic_prescriptions = PrescriptionMedication.objects.filter(
-                    Q(medicine_name__icontains=query) |
-                    Q(composition__icontains=query) |
-                    Q(dosage_form__icontains=query)
-                ).values('medicine_name', 'composition', 'dosage_form').distinct()[:limit]
-            
-            # Add prescribed medications (avoid duplicates)
-            existing_names = {med['name'] for med in results}
-            for med in clinic_prescriptions:
-                if med['medicine_name'] not in existing_names:
-                    results.append({
-                        'id': f"prescribed_{med['medicine_name']}",
-                        'name': med['medicine_name'],
-                        'strength': med['composition'] or '',
-                        'form': med['dosage_form'] or 'Tablet',
-                        'source': 'previously_prescribed',
-                        'stock': None,
-                        'unit': None,
-                        'is_low_stock': None,
-                        'expiry_date': None,
-                        'supplier': None,
-                        'global_medication_id': None,
-                        'composition': med['composition'],
-                        'therapeutic_class': '',
-                        'frequency_options': [],
-                        'timing_options': []
-                    })
-                    existing_names.add(med['medicine_name'])
-            
-            # Sort by relevance (global catalog first, then inventory, then prescribed)
-            def sort_key(x):
-                if x['source'] == 'global_catalog':
-                    return 0
-                elif x['source'] == 'clinic_inventory':
-                    return 1
-                else:
-                    return 2
-            
-            results.sort(key=sort_key)
+            results, total_found = search_clinic_medications(clinic_id, query, limit)
             
             return Response({
                 'success': True,
                 'data': {
-                    'medications': results[:limit],
-                    'total_found': len(results),
+                    'medications': results,
+                    'total_found': total_found,
                     'query': query
                 },
                 'message': 'Medications found successfully',
@@ -954,6 +819,7 @@ class ClinicSearchView(APIView):
         responses={200: ClinicSerializer(many=True)},
         description="Search clinics with advanced filters"
     )
+    @cache_response([Clinic, ClinicService], per_role=True)
     def get(self, request):
         """Search clinics with advanced filters"""
         serializer = ClinicSearchSerializer(data=request.query_params)
@@ -1132,127 +998,7 @@ class ClinicAnalyticsView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            # Time periods
-            now = timezone.now()
-            last_7_days = now - timedelta(days=7)
-            last_30_days = now - timedelta(days=30)
-            last_90_days = now - timedelta(days=90)
-            
-            # Basic metrics
-            total_clinics = Clinic.objects.count()
-            active_clinics = Clinic.objects.filter(is_active=True).count()
-            verified_clinics = Clinic.objects.filter(is_verified=True).count()
-            online_clinics = Clinic.objects.filter(accepts_online_consultations=True).count()
-            
-            # Growth metrics
-            new_clinics_7d = Clinic.objects.filter(created_at__gte=last_7_days).count()
-            new_clinics_30d = Clinic.objects.filter(created_at__gte=last_30_days).count()
-            new_clinics_90d = Clinic.objects.filter(created_at__gte=last_90_days).count()
-            
-            # Geographic analytics
-            city_distribution = Clinic.objects.values('city').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10] if Clinic.objects.exists() else []
-            
-            state_distribution = Clinic.objects.values('state').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10] if Clinic.objects.exists() else []
-            
-            # Specialization analytics
-            all_specialties = []
-            if Clinic.objects.exists():
-                for clinic in Clinic.objects.all():
-                    if clinic.specialties:
-                        all_specialties.extend(clinic.specialties)
-            
-            specialty_counts = {}
-            for specialty in all_specialties:
-                specialty_counts[specialty] = specialty_counts.get(specialty, 0) + 1
-            
-            top_specialties = sorted(specialty_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-            
-            # Monthly trends (last 12 months)
-            monthly_trends = []
-            for i in range(12):
-                month_start = now.replace(day=1) - timedelta(days=30*i)
-                month_end = month_start.replace(day=1) + timedelta(days=32)
-                month_end = month_end.replace(day=1) - timedelta(days=1)
-                
-                count = Clinic.objects.filter(
-                    created_at__gte=month_start,
-                    created_at__lte=month_end
-                ).count()
-                
-                monthly_trends.append({
-                    'month': month_start.strftime('%B %Y'),
-                    'count': count,
-                    'period': month_start.strftime('%Y-%m')
-                })
-            
-            monthly_trends.reverse()
-            
-            # Performance metrics
-            verification_rate = round((verified_clinics / total_clinics * 100) if total_clinics > 0 else 0, 1)
-            activation_rate = round((active_clinics / total_clinics * 100) if total_clinics > 0 else 0, 1)
-            online_rate = round((online_clinics / total_clinics * 100) if total_clinics > 0 else 0, 1)
-            
-            # Recent activity
-            recent_clinics = Clinic.objects.order_by('-created_at')[:5] if Clinic.objects.exists() else []
-            recent_activity = []
-            for clinic in recent_clinics:
-                recent_activity.append({
-                    'id': clinic.id,
-                    'name': clinic.name,
-                    'city': clinic.city,
-                    'state': clinic.state,
-                    'created_at': clinic.created_at.strftime('%Y-%m-%d'),
-                    'is_verified': clinic.is_verified,
-                    'is_active': clinic.is_active
-                })
-            
-            analytics = {
-                # Overview metrics
-                'overview': {
-                    'total_clinics': total_clinics,
-                    'active_clinics': active_clinics,
-                    'verified_clinics': verified_clinics,
-                    'online_clinics': online_clinics,
-                    'verification_rate': verification_rate,
-                    'activation_rate': activation_rate,
-                    'online_rate': online_rate
-                },
-                
-                # Growth metrics
-                'growth': {
-                    'new_clinics_7d': new_clinics_7d,
-                    'new_clinics_30d': new_clinics_30d,
-                    'new_clinics_90d': new_clinics_90d,
-                    'growth_rate_7d': round((new_clinics_7d / total_clinics * 100) if total_clinics > 0 else 0, 1),
-                    'growth_rate_30d': round((new_clinics_30d / total_clinics * 100) if total_clinics > 0 else 0, 1),
-                    'growth_rate_90d': round((new_clinics_90d / total_clinics * 100) if total_clinics > 0 else 0, 1)
-                },
-                
-                # Geographic data
-                'geographic': {
-                    'cities': [{'city': item['city'], 'count': item['count']} for item in city_distribution],
-                    'states': [{'state': item['state'], 'count': item['count']} for item in state_distribution]
-                },
-                
-                # Specialization data
-                'specializations': {
-                    'top_specialties': [{'specialty': item[0], 'count': item[1]} for item in top_specialties],
-                    'total_specialties': len(specialty_counts)
-                },
-                
-                # Trends
-                'trends': {
-                    'monthly_growth': monthly_trends,
-                    'last_updated': now.strftime('%Y-%m-%d %H:%M:%S')
-                },
-                
-                # Recent activity
-                'recent_activity': recent_activity
-            }
+            analytics = get_clinic_analytics()
             
             return Response({
                 'success': True,
@@ -1289,6 +1035,7 @@ class PublicClinicView(APIView):
         responses={200: ClinicSerializer(many=True)},
         description="Get public list of e-clinics"
     )
+    @cache_response([Clinic])
     def get(self, request):
         """Get public list of e-clinics"""
         try:
@@ -1374,7 +1121,6 @@ class NearbyClinicView(APIView):
         """Find nearby clinics"""
         latitude = request.query_params.get('latitude')
         longitude = request.query_params.get('longitude')
-        radius_km = float(request.query_params.get('radius_km', 10))
         specialization = request.query_params.get('specialization')
         
         if not latitude or not longitude:
@@ -1390,50 +1136,92 @@ class NearbyClinicView(APIView):
         try:
             lat = float(latitude)
             lng = float(longitude)
+            radius_km = float(request.query_params.get('radius_km', 10))
         except ValueError:
             return Response({
                 'success': False,
                 'error': {
                     'code': 'INVALID_COORDINATES',
-                    'message': 'Invalid latitude or longitude'
+                    'message': 'Invalid latitude, longitude or radius'
                 },
                 'timestamp': timezone.now().isoformat()
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Find nearby clinics
-        queryset = Clinic.objects.filter(
-            is_active=True,
-            is_verified=True,
-            latitude__isnull=False,
-            longitude__isnull=False
-        ).extra(
-            select={
-                'distance': "6371 * acos(cos(radians(%s)) * cos(radians(latitude)) * cos(radians(longitude) - radians(%s)) + sin(radians(%s)) * sin(radians(latitude)))"
-            },
-            select_params=[lat, lng, lat],
-            where=[
-                "6371 * acos(cos(radians(%s)) * cos(radians(latitude)) * cos(radians(longitude) - radians(%s)) + sin(radians(%s)) * sin(radians(latitude))) <= %s"
-            ],
-            params=[lat, lng, lat, radius_km],
-            order_by=['distance']
-        )
-        
-        # Apply specialization filter if provided
-        if specialization:
-            queryset = queryset.filter(specialties__icontains=specialization)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180 and radius_km > 0):
+            return Response({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_COORDINATES',
+                    'message': 'Latitude must be within [-90, 90], longitude within [-180, 180] and radius positive'
+                },
+                'timestamp': timezone.now().isoformat()
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = ClinicSerializer(queryset, many=True)
+        # Bounding box on the location index, exact distance on the survivors
+        clinics = find_nearby_clinics(lat, lng, radius_km, specialization)
         return Response({
             'success': True,
-            'data': serializer.data,
+            'data': clinics,
             'message': 'Nearby clinics retrieved successfully',
             'timestamp': timezone.now().isoformat()
         }, status=status.HTTP_200_OK)
 
 
-@api_view(['GET'])
+# Columns needed by search_local_medications; skips the large label text fields
+SEARCH_RESULT_FIELDS = (
+    'id', 'name', 'generic_name', 'brand_name', 'strength', 'dosage_form', 'therapeutic_class',
+    'is_verified', 'medication_type', 'composition', 'indication', 'manufacturer',
+)
+
+
+def search_local_medications(query, limit):
+    """Search active GlobalMedication rows (ranked, index-backed) and format them for search results"""
+    local_medications = search_global_medications(
+        query,
+        limit,
+        queryset=GlobalMedication.objects.filter(is_active=True).only(*SEARCH_RESULT_FIELDS)
+    )
+    
+    return [{
+        'id': f"local_{med.id}",
+        'name': med.name,
+        'generic_name': med.generic_name,
+        'brand_name': med.brand_name,
+        'strength': med.strength,
+        'dosage_form': med.get_dosage_form_display(),
+        'source': 'local_database',
+        'therapeutic_class': med.therapeutic_class,
+        'is_verified': med.is_verified,
+        'medication_type': med.get_medication_type_display(),
+        'composition': med.composition,
+        'indication': med.indication,
+        'manufacturer': med.manufacturer
+    } for med in local_medications]
+
+
+def format_fda_medication(fda_med):
+    """Format an openFDA medication for search results"""
+    return {
+        'id': fda_med['id'],
+        'name': fda_med['name'],
+        'generic_name': fda_med['generic_name'],
+        'brand_name': fda_med['brand_name'],
+        'strength': fda_med['strength'],
+        'dosage_form': fda_med['dosage_form'],
+        'source': 'fda_api',
+        'therapeutic_class': fda_med['therapeutic_class'],
+        'is_verified': fda_med['is_verified'],
+        'medication_type': fda_med['medication_type'],
+        'composition': fda_med['composition'],
+        'indication': fda_med['indication'],
+        'manufacturer': fda_med['manufacturer']
+    }
+
+
+@async_api_view(['GET'])
 @permission_classes([permissions.AllowAny])
-def public_medication_search(request):
+@cache_response([GlobalMedication], cache_if=lambda response: not response.data['data']['fda_timed_out'])
+async def public_medication_search(request):
     """Public medication search endpoint - no authentication required"""
     query = request.query_params.get('q', '').strip()
     
@@ -1462,58 +1250,30 @@ def public_medication_search(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        results = []
+        started = time.monotonic()
         
-        # 1. Search local database
+        # 1. Start the FDA lookup on the bounded executor; unlike a task on this
+        #    request's loop it is not cancelled when the response is returned
+        fda_future = None
+        if source in ['fda', 'all'] and include_fda:
+            fda_future = submit_fda_search(query, limit)
+        
+        # 2. Search local database concurrently (sync ORM, run in the thread pool)
+        results = []
         if source in ['local', 'all']:
-            local_medications = GlobalMedication.objects.filter(
-                is_active=True
-            ).filter(
-                Q(name__icontains=query) |
-                Q(generic_name__icontains=query) |
-                Q(brand_name__icontains=query) |
-                Q(composition__icontains=query) |
-                Q(therapeutic_class__icontains=query)
-            )[:limit]
-            
-            for med in local_medications:
-                results.append({
-                    'id': f"local_{med.id}",
-                    'name': med.name,
-                    'generic_name': med.generic_name,
-                    'brand_name': med.brand_name,
-                    'strength': med.strength,
-                    'dosage_form': med.get_dosage_form_display(),
-                    'source': 'local_database',
-                    'therapeutic_class': med.therapeutic_class,
-                    'is_verified': med.is_verified,
-                    'medication_type': med.get_medication_type_display(),
-                    'composition': med.composition,
-                    'indication': med.indication,
-                    'manufacturer': med.manufacturer
-                })
+            results.extend(await sync_to_async(search_local_medications)(query, limit))
         
-        # 2. Search FDA API if requested
-        if source in ['fda', 'all'] and include_fda and len(results) < limit:
-            fda_limit = limit - len(results)
-            fda_results = search_fda_medications(query, fda_limit)
-            
-            for fda_med in fda_results:
-                results.append({
-                    'id': fda_med['id'],
-                    'name': fda_med['name'],
-                    'generic_name': fda_med['generic_name'],
-                    'brand_name': fda_med['brand_name'],
-                    'strength': fda_med['strength'],
-                    'dosage_form': fda_med['dosage_form'],
-                    'source': 'fda_api',
-                    'therapeutic_class': fda_med['therapeutic_class'],
-                    'is_verified': fda_med['is_verified'],
-                    'medication_type': fda_med['medication_type'],
-                    'composition': fda_med['composition'],
-                    'indication': fda_med['indication'],
-                    'manufacturer': fda_med['manufacturer']
-                })
+        # 3. Merge FDA results if they arrive within the latency budget; a slow
+        #    lookup keeps running on its worker thread and still fills the cache
+        fda_timed_out = source in ['fda', 'all'] and include_fda and fda_future is None
+        if fda_future is not None:
+            remaining = max(0, FDA_LATENCY_BUDGET - (time.monotonic() - started))
+            done, _ = await asyncio.wait({asyncio.wrap_future(fda_future)}, timeout=remaining)
+            if done:
+                fda_results = done.pop().result()
+                results.extend(format_fda_medication(fda_med) for fda_med in fda_results[:limit - len(results)])
+            else:
+                fda_timed_out = True
         
         return Response({
             'success': True,
@@ -1521,7 +1281,8 @@ def public_medication_search(request):
                 'medications': results,
                 'total_found': len(results),
                 'query': query,
-                'sources_searched': ['local_database'] + (['fda_api'] if include_fda else [])
+                'sources_searched': ['local_database'] + (['fda_api'] if include_fda else []),
+                'fda_timed_out': fda_timed_out
             },
             'message': 'Medications found successfully',
             'timestamp': timezone.now().isoformat()
@@ -1,13 +1,25 @@
 # Gunicorn configuration file
 import multiprocessing
+import os
+
+# Serving mode: "wsgi" (sync workers) or "asgi" (uvicorn workers, one event
+# loop per worker). ASGI mode lets async views overlap their external I/O
+# (SMS gateway, openFDA, object storage) instead of pinning a worker per call.
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi").lower()
 
 # Server socket
 bind = "0.0.0.0:8000"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+if SERVER_MODE == "asgi":
+    wsgi_app = "myproject.asgi:application"
+    workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1))
+    worker_class = "myproject.workers.ASGIWorker"
+else:
+    wsgi_app = "myproject.wsgi:application"
+    workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+    worker_class = "sync"
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 100
@@ -41,7 +53,7 @@ tmp_upload_dir = None
 
 # Server hooks
 def on_starting(server):
-    server.log.info("Starting Sushrusa Backend Server")
+    server.log.info("Starting Sushrusa Backend Server (%s mode)", SERVER_MODE)
 
 def on_reload(server):
     server.log.info("Reloading Sushrusa Backend Server")
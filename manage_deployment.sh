@@ -49,8 +49,13 @@ start_server() {
     fi
     
     # Start gunicorn server
-    print_status "Starting gunicorn server..."
-    gunicorn --config gunicorn.conf.py myproject.wsgi:application &
+    # SERVER_MODE=asgi switches to uvicorn workers (see gunicorn.conf.py)
+    print_status "Starting gunicorn server (${SERVER_MODE:-wsgi} mode)..."
+    gunicorn --config gunicorn.conf.py &
+
+    # OTP SMS and OTP audit writes are queued in Redis and handled by this worker
+    print_status "Starting OTP delivery worker..."
+    nohup python manage.py otp_delivery_worker > logs/otp_delivery_worker.log 2>&1 &
     
     # Wait for server to start
     sleep 3
@@ -70,6 +75,8 @@ start_server() {
 stop_server() {
     print_header "Stopping Sushrusa Backend Server..."
     
+    pkill -f otp_delivery_worker || true
+
     if pgrep -f gunicorn > /dev/null; then
         print_status "Stopping gunicorn processes..."
         pkill -f gunicorn
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 
@@ -46,6 +47,7 @@ DJANGO_APPS = [
 
 THIRD_PARTY_APPS = [
     'rest_framework',
+    'adrf',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
@@ -73,6 +75,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'utils.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,6 +83,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'utils.middleware.EventBatchMiddleware',
 ]
 
 ROOT_URLCONF = 'myproject.urls'
@@ -177,16 +181,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed when installed, output identical to JSONRenderer/JSONParser
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'utils.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'utils.parsers.FastJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
@@ -233,6 +238,9 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Seconds a resolved JWT principal (user + profiles + clinic) stays cached
+AUTH_PRINCIPAL_CACHE_TTL = int(os.environ.get('AUTH_PRINCIPAL_CACHE_TTL', '60'))
+
 # CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -275,12 +283,28 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
 # Cache Configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# One cache shared by every worker: rate limits, cached principals, version
+# stamps (response cache, investigation catalog) and the doctor status stats
+# all rely on it. CACHE_URL=locmem:// keeps a per-process cache, which is only
+# correct for a single-process development server; the test runner always
+# uses it so the suite runs without outside services.
+CACHE_URL = os.environ.get('CACHE_URL', os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+if TESTING or CACHE_URL.startswith('locmem://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'sushrusa',
+        }
     }
-}
 
 # Email Configuration (for OTP sending)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -449,6 +473,25 @@ CHANNEL_LAYERS = {
 # OTP Configuration
 OTP_TEST_MODE = True
 OTP_TEST_CODE = '999999'
+OTP_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+OTP_MAX_VERIFY_ATTEMPTS = 5
+# (limit, window_seconds) sliding windows per phone number and per client IP
+OTP_RATE_LIMITS = {
+    'phone': [(1, 30), (5, 900)],
+    'ip': [(20, 3600)],
+}
+
+# openFDA search caching (eclinic.services.fda_api)
+FDA_CACHE_TTL = int(os.environ.get('FDA_CACHE_TTL', 60 * 60 * 24))
+FDA_NEGATIVE_CACHE_TTL = int(os.environ.get('FDA_NEGATIVE_CACHE_TTL', 60 * 10))
+FDA_REQUEST_TIMEOUT = 5
+# Combined local+FDA searches answer with local results after this long
+FDA_LATENCY_BUDGET_MS = int(os.environ.get('FDA_LATENCY_BUDGET_MS', 800))
+
+# Response compression (utils.middleware.CompressionMiddleware); brotli is used when installed
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
 
 
 # WebSocket URL patterns
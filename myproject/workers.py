@@ -0,0 +1,22 @@
+"""
+Gunicorn worker classes for ASGI serving (SERVER_MODE=asgi in gunicorn.conf.py)
+"""
+
+from uvicorn.workers import UvicornWorker
+
+
+class ASGIWorker(UvicornWorker):
+    """
+    Uvicorn worker with one event loop per process.
+
+    The local ``websockets`` app shadows the PyPI ``websockets`` package that
+    uvicorn would otherwise pick for WebSocket handling, so wsproto is used
+    instead. Django does not implement the ASGI lifespan protocol.
+    """
+
+    CONFIG_KWARGS = {
+        "loop": "auto",
+        "http": "auto",
+        "ws": "wsproto",
+        "lifespan": "off",
+    }
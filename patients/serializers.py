@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from authentication.models import User
 from .models import PatientProfile, MedicalRecord, PatientDocument, PatientNote
+from utils.direct_uploads import DirectUploadFileField
 
 
 class PatientProfileSerializer(serializers.ModelSerializer):
@@ -152,6 +153,7 @@ class MedicalRecordSerializer(serializers.ModelSerializer):
 
 class MedicalRecordCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating medical records"""
+    document = DirectUploadFileField('medical_record', required=False, allow_null=True)
     
     class Meta:
         model = MedicalRecord
@@ -219,6 +221,7 @@ class PatientDocumentSerializer(serializers.ModelSerializer):
 
 class PatientDocumentUploadSerializer(serializers.ModelSerializer):
     """Serializer for uploading patient documents"""
+    file = DirectUploadFileField('patient_document')
     
     class Meta:
         model = PatientDocument
@@ -1,3 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from .models import PatientDocument
+
+User = get_user_model()
+
+
+class DirectUploadTest(TestCase):
+    """Test cases for two-phase direct uploads of patient documents"""
+
+    def setUp(self):
+        self.patient = User.objects.create_user(phone='+912000000001', name='Patient', role='patient')
+        self.s3 = mock.Mock()
+        self.s3.generate_presigned_post.return_value = {'url': 'https://spaces.example/', 'fields': {'key': 'k'}}
+        patcher = mock.patch('utils.direct_uploads.get_s3_client', return_value=self.s3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _serializer(self, token):
+        from .serializers import PatientDocumentUploadSerializer
+        request = mock.Mock(user=self.patient)
+        view = mock.Mock(kwargs={'patient_id': self.patient.id})
+        return PatientDocumentUploadSerializer(
+            data={'document_type': 'lab_report', 'title': 'CBC', 'file': token},
+            context={'request': request, 'view': view}
+        )
+
+    def test_confirmed_upload_is_registered(self):
+        """The token replaces the file and the stored name points at the uploaded object"""
+        from utils.direct_uploads import create_direct_upload
+        upload = create_direct_upload(
+            self.patient, 'patient_document', 'cbc.PDF', 'application/pdf', 2048,
+            md5='0cc175b9c0f1b6a831c399e269772661'
+        )
+        self.assertTrue(upload['file_path'].startswith('patient_documents/'))
+        self.assertTrue(upload['file_path'].endswith('.pdf'))
+        conditions = self.s3.generate_presigned_post.call_args.kwargs['Conditions']
+        self.assertIn(['content-length-range', 2048, 2048], conditions)
+
+        self.s3.head_object.return_value = {'ContentLength': 2048, 'ETag': '"0cc175b9c0f1b6a831c399e269772661"'}
+        serializer = self._serializer(upload['upload_token'])
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        document = serializer.save()
+
+        self.assertEqual(PatientDocument.objects.get(id=document.id).file.name, upload['file_path'])
+        self.s3.delete_object.assert_not_called()
+
+    def test_mismatched_upload_is_rejected(self):
+        """A size mismatch fails validation and removes the object"""
+        from utils.direct_uploads import create_direct_upload
+        upload = create_direct_upload(self.patient, 'patient_document', 'cbc.pdf', 'application/pdf', 2048)
+
+        self.s3.head_object.return_value = {'ContentLength': 4096, 'ETag': '"x"'}
+        serializer = self._serializer(upload['upload_token'])
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['file'][0].code, 'UPLOAD_SIZE_MISMATCH')
+        self.s3.delete_object.assert_called_once()
+
+        other = User.objects.create_user(phone='+912000000002', name='Other', role='patient')
+        serializer = self._serializer(upload['upload_token'])
+        serializer.context['request'].user = other
+        self.assertFalse(serializer.is_valid())
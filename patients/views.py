@@ -21,7 +21,7 @@ from .serializers import (
     PatientNoteSerializer, PatientNoteCreateSerializer,
     PatientListSerializer, PatientSearchSerializer, PatientStatsSerializer
 )
-from consultations.models import Consultation
+from consultations.models import Consultation, scheduled_between
 from consultations.serializers import ConsultationListSerializer
 
 
@@ -752,7 +752,7 @@ class PatientConsultationView(APIView):
             if date_from:
                 try:
                     date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
-                    queryset = queryset.filter(scheduled_at__date__gte=date_from)
+                    queryset = queryset.filter(scheduled_between(date_from=date_from))
                 except ValueError:
                     return Response({
                         'success': False,
@@ -767,7 +767,7 @@ class PatientConsultationView(APIView):
             if date_to:
                 try:
                     date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
-                    queryset = queryset.filter(scheduled_at__date__lte=date_to)
+                    queryset = queryset.filter(scheduled_between(date_to=date_to))
                 except ValueError:
                     return Response({
                         'success': False,
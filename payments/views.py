@@ -3,7 +3,6 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from django.db.models import Q, Count, Sum, Avg
 from django.shortcuts import get_object_or_404
@@ -32,13 +31,15 @@ from .serializers import (
     PaymentProcessSerializer, DiscountValidationSerializer,
     PaymentWebhookSerializer
 )
+from utils.pagination import KeysetPageNumberPagination
 
 
-class PaymentPagination(PageNumberPagination):
-    """Custom pagination for payment lists"""
+class PaymentPagination(KeysetPageNumberPagination):
+    """Custom pagination for payment lists (?pagination=cursor for keyset paging)"""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_ordering = ('-created_at', 'id')
 
 
 class PatientPaymentsView(APIView):
@@ -958,7 +959,7 @@ class PaymentHistoryView(APIView):
         return Response({
             'success': True,
             'data': {
-                'count': paginator.page.paginator.count,
+                'count': paginator.get_count(),
                 'next': paginator.get_next_link(),
                 'previous': paginator.get_previous_link(),
                 'results': serializer.data
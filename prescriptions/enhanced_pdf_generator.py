@@ -905,6 +905,27 @@ class WPDFGenerator:
         # Add blank space at bottom
         self.c.setFillColor(colors.white)
         self.c.rect(0, 0, self.width, 80, fill=True, stroke=False)
+        self._draw_verification_qr()
+
+    def _draw_verification_qr(self, size=64):
+        """QR code with the signed verification link, bottom left of the footer"""
+        try:
+            from reportlab.graphics import renderPDF
+            from reportlab.graphics.barcode.qr import QrCodeWidget
+            from reportlab.graphics.shapes import Drawing
+            from .verification import verification_url
+
+            widget = QrCodeWidget(verification_url(self.prescription))
+            x1, y1, x2, y2 = widget.getBounds()
+            drawing = Drawing(size, size, transform=[size / (x2 - x1), 0, 0, size / (y2 - y1), 0, 0])
+            drawing.add(widget)
+            renderPDF.draw(drawing, self.c, 30, 8)
+
+            self.c.setFillColor(colors.black)
+            self.c.setFont("Helvetica", 7)
+            self.c.drawString(30 + size + 6, 8 + size / 2, "Scan to verify this prescription")
+        except Exception as e:
+            print(f"Error drawing verification QR code: {e}")
 
     def generate_pdf(self):
         # Debug marker to confirm our generator is being used
@@ -1158,10 +1179,15 @@ class MobilePDFGenerator(WPDFGenerator):
             
             # Read the image file content
             image_file = self.prescription_image.image_file
-            image_content = image_file.read()
-            
-            # Reset file pointer
-            image_file.seek(0)
+            if image_file.storage.exists(image_file.name):
+                image_content = image_file.read()
+                
+                # Reset file pointer
+                image_file.seek(0)
+            else:
+                # Uploaded straight to Spaces (two-phase direct upload)
+                from utils.direct_uploads import read_direct_upload
+                image_content = read_direct_upload(image_file.name)
             
             # Create ImageReader from file content
             img = ImageReader(ContentFile(image_content))
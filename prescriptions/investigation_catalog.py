@@ -0,0 +1,100 @@
+"""
+In-process snapshot of the investigation catalog.
+
+The catalog (active InvestigationCategory and InvestigationTest rows) is
+seeded by the populate_*investigations commands and rarely changes, yet
+every prescription screen loads it. Each process keeps one serialized
+snapshot, tagged with the catalog version stored in the shared cache.
+
+The version is a fingerprint of the tables (latest ``updated_at`` and row
+count of each), so every process and the populate commands agree on it
+without coordinating. Category/test saves and deletes drop the cached
+version after commit; changes that bypass signals (QuerySet.update, raw
+SQL, a cache that isn't shared) are picked up once it expires after
+CATALOG_VERSION_TTL. Between changes requests only read the version key.
+
+Each section carries a strong ETag (hash of its content), so clients
+revalidate with If-None-Match and get 304s while the catalog is unchanged.
+"""
+
+import hashlib
+import json
+import threading
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+
+from .models import InvestigationCategory, InvestigationTest
+from .serializers import InvestigationCategorySerializer, InvestigationTestSerializer
+
+CATALOG_VERSION_KEY = 'prescriptions:investigation_catalog:version'
+CATALOG_VERSION_TTL = 300
+
+# Seconds a client may reuse a catalog response before revalidating
+CATALOG_MAX_AGE = 60
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class CatalogSnapshot:
+    """Serialized catalog sections and their ETags for one catalog version"""
+
+    def __init__(self, version, sections):
+        self.version = version
+        self.sections = sections
+        self.etags = {name: _etag(data) for name, data in sections.items()}
+
+
+def _etag(data):
+    content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return f'"{hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _table_fingerprint():
+    parts = []
+    for model in (InvestigationCategory, InvestigationTest):
+        stats = model.objects.aggregate(latest=Max('updated_at'), rows=Count('id'))
+        parts.append(f"{stats['latest'].isoformat() if stats['latest'] else '-'}:{stats['rows']}")
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = _table_fingerprint()
+        cache.set(CATALOG_VERSION_KEY, version, CATALOG_VERSION_TTL)
+    return version
+
+
+def bump_catalog_version():
+    cache.delete(CATALOG_VERSION_KEY)
+
+
+def build_catalog_snapshot(version):
+    categories = InvestigationCategorySerializer(
+        InvestigationCategory.objects.filter(is_active=True), many=True
+    ).data
+    tests = InvestigationTestSerializer(
+        InvestigationTest.objects.filter(is_active=True).select_related('category'), many=True
+    ).data
+    return CatalogSnapshot(version, {
+        'list_all': {'categories': categories, 'tests': tests},
+        'categories': categories,
+        'tests': tests,
+    })
+
+
+def get_catalog():
+    """Snapshot for the current catalog version, rebuilt only after a change"""
+    global _snapshot
+    # Read before building, so a snapshot is never labelled newer than its data
+    version = catalog_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = build_catalog_snapshot(version)
+            snapshot = _snapshot
+    return snapshot
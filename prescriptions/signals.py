@@ -2,10 +2,15 @@
 Signals for automatic PDF upload to DigitalOcean Spaces
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from .models import PrescriptionPDF, PrescriptionImage
+from django.db import transaction
+from .investigation_catalog import bump_catalog_version
+from .models import (
+    InvestigationCategory, InvestigationTest, Prescription, PrescriptionMedication, PrescriptionPDF, PrescriptionImage
+)
+from .verification import invalidate_verification_details
 import threading
 import boto3
 import os
@@ -223,4 +228,29 @@ def upload_prescription_image_to_spaces(sender, instance, created, **kwargs):
         print(f"🚀 [SIGNAL] Started async upload thread for prescription image {instance.id}")
                     
     except Exception as e:
-        print(f"❌ Error in upload_prescription_image_to_spaces signal: {e}") 
\ No newline at end of file
+        print(f"❌ Error in upload_prescription_image_to_spaces signal: {e}") 
+
+
+@receiver(post_save, sender=Prescription)
+@receiver(post_delete, sender=Prescription)
+def invalidate_prescription_verification(sender, instance, **kwargs):
+    """Drop cached public verification details when a prescription changes"""
+    invalidate_verification_details(instance.id)
+
+
+@receiver(post_save, sender=PrescriptionPDF)
+@receiver(post_delete, sender=PrescriptionPDF)
+@receiver(post_save, sender=PrescriptionMedication)
+@receiver(post_delete, sender=PrescriptionMedication)
+def invalidate_prescription_verification_related(sender, instance, **kwargs):
+    """PDF versions and medication counts are part of the verification details"""
+    invalidate_verification_details(instance.prescription_id)
+
+
+@receiver(post_save, sender=InvestigationCategory)
+@receiver(post_delete, sender=InvestigationCategory)
+@receiver(post_save, sender=InvestigationTest)
+@receiver(post_delete, sender=InvestigationTest)
+def invalidate_investigation_catalog(sender, instance, **kwargs):
+    """New catalog version once the change is committed; snapshots rebuild on next read"""
+    transaction.on_commit(bump_catalog_version)
@@ -1,3 +1,146 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from consultations.models import Consultation
+from .models import Prescription
+from .verification import make_verification_token, read_verification_token, InvalidVerificationToken
+
+User = get_user_model()
+
+
+class PrescriptionVerificationTest(TestCase):
+    """Test cases for signed, cache-first public prescription verification"""
+
+    def setUp(self):
+        cache.clear()
+        # Rate limits use the local cache fallback
+        redis_patch = mock.patch('authentication.otp_service._get_redis', return_value=None)
+        redis_patch.start()
+        self.addCleanup(redis_patch.stop)
+        self.doctor = User.objects.create_user(phone='+911000000101', name='Doctor', role='doctor')
+        self.patient = User.objects.create_user(phone='+911000000102', name='Patient', role='patient')
+        consultation = Consultation.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            scheduled_date='2025-01-10',
+            scheduled_time='09:30:00',
+            chief_complaint='Fever',
+            consultation_fee=500
+        )
+        self.prescription = Prescription.objects.create(
+            consultation=consultation, doctor=self.doctor, patient=self.patient, is_finalized=True
+        )
+        self.url = f'/api/prescriptions/verify/{self.prescription.id}/'
+        self.client = APIClient()
+
+    def test_token_roundtrip_and_tampering(self):
+        token = make_verification_token(self.prescription)
+        self.assertEqual(read_verification_token(token)['pid'], self.prescription.id)
+
+        payload, signature = token.split('.')
+        with self.assertRaises(InvalidVerificationToken):
+            read_verification_token(f'{payload}.{"0" * len(signature)}')
+        with self.assertRaises(InvalidVerificationToken):
+            read_verification_token('garbage')
+
+    def test_token_verification_needs_no_queries(self):
+        token = make_verification_token(self.prescription)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'token': token, 'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['verification_status'], 'VALID')
+        self.assertEqual(data['doctor']['name'], 'Doctor')
+
+        # A genuine token for another prescription is rejected
+        other = f'/api/prescriptions/verify/{self.prescription.id + 1}/'
+        self.assertEqual(self.client.get(other, {'token': token, 'format': 'json'}).status_code, 400)
+
+    def test_details_are_cached_and_invalidated(self):
+        token = make_verification_token(self.prescription)
+        response = self.client.get(self.url, {'token': token, 'details': 'true', 'format': 'json'})
+        self.assertEqual(response.json()['data']['current']['medications_count'], 0)
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'format': 'json'})
+
+        self.prescription.is_finalized = False
+        self.prescription.save()
+        self.assertEqual(self.client.get(self.url, {'format': 'json'}).json()['data']['verification_status'], 'DRAFT')
+
+        self.prescription.delete()
+        data = self.client.get(self.url, {'token': token, 'details': 'true', 'format': 'json'}).json()['data']
+        self.assertEqual(data['verification_status'], 'REVOKED')
+
+    def test_lookup_without_token_hides_details(self):
+        data = self.client.get(self.url, {'format': 'json'}).json()['data']
+        self.assertEqual(data['verification_status'], 'VALID')
+        self.assertFalse(data['signature_valid'])
+        self.assertNotIn('patient', data)
+        self.assertNotIn('doctor', data)
+
+    def test_rate_limited_per_ip(self):
+        from . import verification
+
+        with mock.patch.object(verification, 'VERIFY_RATE_LIMITS', [(2, 60)]):
+            statuses = [
+                self.client.get(self.url, {'format': 'json'}, HTTP_X_FORWARDED_FOR=f'10.0.0.{n}').status_code
+                for n in range(3)
+            ]
+        # A spoofed X-Forwarded-For doesn't get a fresh bucket
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class InvestigationCatalogTest(TestCase):
+    """Test cases for the versioned investigation catalog snapshot"""
+
+    def setUp(self):
+        from .models import InvestigationCategory, InvestigationTest
+        cache.clear()
+        self.category = InvestigationCategory.objects.create(name='Blood Tests', order=1)
+        self.test = InvestigationTest.objects.create(category=self.category, name='CBC', code='CBC')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(phone='+911000000103', name='Doctor', role='doctor'))
+
+    def test_revalidates_with_etag_without_queries(self):
+        response = self.client.get('/api/prescriptions/investigations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([test['name'] for test in response.json()['data']['tests']], ['CBC'])
+        etag = response['ETag']
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/prescriptions/investigations/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/prescriptions/investigations/tests/').status_code, 200)
+
+    def test_saves_publish_a_new_snapshot(self):
+        etag = self.client.get('/api/prescriptions/investigations/categories/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Haematology'
+            self.category.save()
+
+        response = self.client.get('/api/prescriptions/investigations/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['data'][0]['name'], 'Haematology')
+
+    def test_version_follows_the_tables_after_expiry(self):
+        from django.utils import timezone
+        from .investigation_catalog import CATALOG_VERSION_KEY, catalog_version
+        from .models import InvestigationTest
+        self.client.get('/api/prescriptions/investigations/tests/')
+        # Every process derives the same version from the same tables
+        version = catalog_version()
+        cache.delete(CATALOG_VERSION_KEY)
+        self.assertEqual(catalog_version(), version)
 
-# Create your tests here.
+        # Written without signals, e.g. by another process with its own cache
+        InvestigationTest.objects.filter(pk=self.test.pk).update(is_active=False, updated_at=timezone.now())
+        cache.delete(CATALOG_VERSION_KEY)
+        self.assertEqual(self.client.get('/api/prescriptions/investigations/tests/').json()['data'], [])
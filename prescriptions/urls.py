@@ -42,13 +42,11 @@ custom_urlpatterns = [
     path('<int:pk>/finalize-and-generate-pdf/', PrescriptionViewSet.as_view({'post': 'finalize_and_generate_pdf'}), name='prescription-finalize-and-generate-pdf'),
     
     # Public verification endpoint (no authentication required)
-    path('verify/<int:prescription_id>/', PrescriptionViewSet.as_view({'get': 'verify_prescription'}), name='prescription-verify'),
+    path('verify/<int:prescription_id>/', PrescriptionViewSet.as_view(
+        {'get': 'verify_prescription'}, **PrescriptionViewSet.verify_prescription.kwargs
+    ), name='prescription-verify'),
     
     # Investigation URLs
-    path('investigations/', InvestigationViewSet.as_view({
-        'get': 'list_all',
-        'post': 'create'
-    }), name='investigation-list'),
     path('investigations/categories/', InvestigationViewSet.as_view({
         'get': 'categories'
     }), name='investigation-categories'),
@@ -85,6 +83,14 @@ nested_urlpatterns = [
     path('<int:prescription_pk>/', include(vital_signs_router.urls)),
 ]
 
+# Would otherwise be taken by the router's prescription detail route
+investigation_list_urlpatterns = [
+    path('investigations/', InvestigationViewSet.as_view({
+        'get': 'list_all',
+        'post': 'create'
+    }), name='investigation-list'),
+]
+
 # Combine all URL patterns - put router URLs first to handle standard CRUD operations
-urlpatterns = router.urls + custom_urlpatterns + nested_urlpatterns
+urlpatterns = investigation_list_urlpatterns + router.urls + custom_urlpatterns + nested_urlpatterns
 
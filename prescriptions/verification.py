@@ -0,0 +1,194 @@
+"""
+Public prescription verification.
+
+Printed prescriptions carry a QR code with a signed verification token: the
+claims shown to whoever scans it (prescription, consultation, doctor,
+patient, issue date, finalized flag) plus an HMAC over them made with
+``authentication.utils.create_digital_signature``. Checking a token needs
+no database access. Details that may change after printing (current
+status, medication count, latest PDF) are an optional enrichment, cached
+per prescription and invalidated by the prescription signals. Without a
+genuine token only existence and status are disclosed, never patient or
+doctor details.
+
+A token stays valid for as long as SECRET_KEY does; ask for details to see
+whether the prescription still exists.
+"""
+
+import base64
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.urls import reverse
+
+from authentication.otp_service import SlidingWindowRateLimiter
+from authentication.utils import create_digital_signature, verify_digital_signature
+
+from .models import Prescription, PrescriptionPDF
+
+PRESCRIPTION_VERIFY_BASE_URL = getattr(settings, 'PRESCRIPTION_VERIFY_BASE_URL', 'https://sushrusaeclinic.com')
+VERIFICATION_CACHE_TTL = 300
+
+# (limit, window_seconds) pairs per client IP; every pair must pass
+VERIFY_RATE_LIMITS = getattr(settings, 'PRESCRIPTION_VERIFY_RATE_LIMITS', [(30, 60), (300, 3600)])
+
+# Keeps these signatures from being valid for any other signed payload
+_SIGNATURE_CONTEXT = 'prescription-verify'
+
+
+class InvalidVerificationToken(ValueError):
+    pass
+
+
+def calculate_age(date_of_birth):
+    """Age in whole years as a string, "N/A" without a date of birth"""
+    if not date_of_birth:
+        return "N/A"
+    today = date.today()
+    age = today.year - date_of_birth.year
+    if (today.month, today.day) < (date_of_birth.month, date_of_birth.day):
+        age -= 1
+    return str(age)
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(payload):
+    return create_digital_signature(f"{_SIGNATURE_CONTEXT}:{payload}")
+
+
+def make_verification_token(prescription):
+    """Signed token for the QR code of ``prescription``"""
+    claims = {
+        'pid': prescription.id,
+        'cid': prescription.consultation_id,
+        'doc': prescription.doctor.name,
+        'pat': prescription.patient.name,
+        'iss': prescription.issued_date.isoformat() if prescription.issued_date else None,
+        'fin': prescription.is_finalized,
+    }
+    payload = _b64encode(json.dumps(claims, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+    return f"{payload}.{_sign(payload)}"
+
+
+def read_verification_token(token):
+    """Claims of a genuine token; raises InvalidVerificationToken otherwise"""
+    payload, _, signature = (token or '').partition('.')
+    if not payload or not signature or not verify_digital_signature(f"{_SIGNATURE_CONTEXT}:{payload}", signature):
+        raise InvalidVerificationToken("Invalid verification token")
+    try:
+        return json.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidVerificationToken("Invalid verification token")
+
+
+def verification_url(prescription):
+    """Absolute verification URL with the signed token, for QR codes"""
+    path = reverse('prescription-verify', kwargs={'prescription_id': prescription.id})
+    token = make_verification_token(prescription)
+    return f"{PRESCRIPTION_VERIFY_BASE_URL.rstrip('/')}{path}?token={token}"
+
+
+def token_verification_data(claims):
+    """Verification payload built from token claims alone"""
+    return {
+        'prescription_id': claims['pid'],
+        'consultation_id': claims['cid'],
+        'issued_date': claims['iss'],
+        'is_finalized': claims['fin'],
+        'doctor': {'name': claims['doc']},
+        'patient': {'name': claims['pat']},
+        'verification_status': 'VALID' if claims['fin'] else 'DRAFT',
+        'signature_valid': True,
+    }
+
+
+def public_verification_data(details):
+    """What an anonymous lookup without a token may see of ``details``"""
+    return {
+        'prescription_id': details['prescription_id'],
+        'verification_status': details['verification_status'],
+        'signature_valid': False,
+    }
+
+
+def _details_key(prescription_id):
+    return f"prescriptions:verify:{prescription_id}"
+
+
+def build_verification_details(prescription_id):
+    """Current details of a prescription in one query, None if it doesn't exist"""
+    latest_pdf = PrescriptionPDF.objects.filter(prescription=OuterRef('pk')).order_by('-version_number')
+    prescription = Prescription.objects.select_related('doctor', 'patient').annotate(
+        medications_total=Count('medications'),
+        latest_pdf_version=Subquery(latest_pdf.values('version_number')[:1])
+    ).filter(id=prescription_id).first()
+    if prescription is None:
+        return None
+
+    return {
+        'prescription_id': prescription.id,
+        'consultation_id': prescription.consultation_id,
+        'issued_date': prescription.issued_date,
+        'issued_time': prescription.issued_time,
+        'is_finalized': prescription.is_finalized,
+        'is_draft': prescription.is_draft,
+        'doctor': {
+            'name': prescription.doctor.name,
+            'qualifications': getattr(prescription.doctor, 'qualifications', 'MBBS'),
+            'specialization': getattr(prescription.doctor, 'specialization', 'Family Physician'),
+        },
+        'patient': {
+            'name': prescription.patient.name,
+            'age': calculate_age(getattr(prescription.patient, 'date_of_birth', None)),
+            'gender': getattr(prescription.patient, 'gender', 'N/A'),
+        },
+        'medications_count': prescription.medications_total,
+        'verification_status': 'VALID' if prescription.is_finalized else 'DRAFT',
+        'pdf_available': prescription.latest_pdf_version is not None,
+        'latest_pdf_version': prescription.latest_pdf_version,
+    }
+
+
+def get_verification_details(prescription_id):
+    """Cached build_verification_details; misses for unknown ids are cached too"""
+    key = _details_key(prescription_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached or None
+    details = build_verification_details(prescription_id)
+    cache.set(key, details or {}, VERIFICATION_CACHE_TTL)
+    return details
+
+
+def invalidate_verification_details(prescription_id):
+    cache.delete(_details_key(prescription_id))
+
+
+def verify_client_ip(request):
+    """
+    Rate limit key: the peer address. X-Forwarded-For is client supplied and
+    would let every request pick a fresh bucket; deployments behind a proxy
+    must have it set REMOTE_ADDR.
+    """
+    return request.META.get('REMOTE_ADDR')
+
+
+def check_verify_rate_limit(ip_address):
+    """Seconds until ``ip_address`` may verify again, 0 if allowed"""
+    if not ip_address:
+        return 0
+    for limit, window in VERIFY_RATE_LIMITS:
+        retry_after = SlidingWindowRateLimiter('prescription_verify', limit, window).hit(ip_address)
+        if retry_after:
+            return max(1, int(retry_after))
+    return 0
@@ -1,10 +1,10 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.db import models
 from django.utils import timezone
 from django.http import HttpResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
@@ -17,13 +17,22 @@ from .serializers import (
 )
 from .enhanced_pdf_generator import generate_prescription_pdf, generate_mobile_prescription_pdf
 from utils.signed_urls import generate_signed_url
+from utils.direct_uploads import DirectUploadError, confirm_direct_upload
+from utils.pagination import KeysetPageNumberPagination
+from eclinic.services.clinic_medications import record_prescribed_medications
+from .investigation_catalog import CATALOG_MAX_AGE, get_catalog
+from .verification import (
+    InvalidVerificationToken, check_verify_rate_limit, get_verification_details,
+    public_verification_data, read_verification_token, token_verification_data, verify_client_ip
+)
 import os
 
-class PrescriptionPagination(PageNumberPagination):
-    """Custom pagination for prescription lists"""
+class PrescriptionPagination(KeysetPageNumberPagination):
+    """Custom pagination for prescription lists (?pagination=cursor for keyset paging)"""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_ordering = ('-created_at', 'id')
 
 class IsDoctorOrPatientOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -355,9 +364,12 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
                     }, status=status.HTTP_400_BAD_REQUEST)
             
             # Finalize the prescription
+            was_finalized = prescription.is_finalized
             prescription.is_draft = False
             prescription.is_finalized = True
             prescription.save()
+            if not was_finalized:
+                record_prescribed_medications(prescription)
             
             # Get header and footer images (use default paths or from request)
             header_image_path = None
@@ -610,9 +622,12 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
                     }, status=status.HTTP_400_BAD_REQUEST)
             
             # Finalize the prescription
+            was_finalized = prescription.is_finalized
             prescription.is_draft = False
             prescription.is_finalized = True
             prescription.save()
+            if not was_finalized:
+                record_prescribed_medications(prescription)
             
             # Get header and footer images (use default paths or from request)
             header_image_path = None
@@ -874,45 +889,66 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
             'timestamp': timezone.now().isoformat()
         }, status=status.HTTP_200_OK)
 
-    @action(detail=False, methods=['get'], url_path='verify/(?P<prescription_id>[^/.]+)')
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('token', OpenApiTypes.STR, description='Signed verification token from the prescription QR code'),
+            OpenApiParameter('details', OpenApiTypes.BOOL, description='With a token: also return the current (cached) details'),
+        ]
+    )
+    @action(detail=False, methods=['get'], url_path='verify/(?P<prescription_id>[^/.]+)',
+            permission_classes=[permissions.AllowAny], authentication_classes=[])
     def verify_prescription(self, request, prescription_id=None):
-        """Public endpoint to verify prescription authenticity (no authentication required)"""
+        """
+        Public endpoint to verify prescription authenticity (no authentication required)
+        
+        A ``token`` from the printed QR code is checked from its signature
+        alone, without touching the database; ``details=true`` adds the
+        current details. Requests without a token only learn whether the
+        prescription exists and its status. Rate limited per client IP.
+        """
+        wants_json = request.headers.get('Accept') == 'application/json' or request.GET.get('format') == 'json'
+        
+        retry_after = check_verify_rate_limit(verify_client_ip(request))
+        if retry_after:
+            response = self._verification_error(
+                request, prescription_id, wants_json, 'RATE_LIMITED',
+                'Too many verification requests. Please try again later.', status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
+        
         try:
-            # Get prescription by ID
-            prescription = Prescription.objects.select_related(
-                'doctor', 'patient', 'consultation'
-            ).prefetch_related('medications').get(id=prescription_id)
-            
-            # Get the latest PDF version
-            latest_pdf = PrescriptionPDF.objects.filter(prescription=prescription).order_by('-created_at').first()
+            token = request.GET.get('token')
+            if token:
+                try:
+                    claims = read_verification_token(token)
+                except InvalidVerificationToken:
+                    claims = None
+                if claims is None or str(claims.get('pid')) != str(prescription_id):
+                    return self._verification_error(
+                        request, prescription_id, wants_json, 'INVALID_TOKEN',
+                        'This prescription could not be verified: the verification code is not genuine',
+                        status.HTTP_400_BAD_REQUEST
+                    )
+                verification_data = token_verification_data(claims)
+                if request.GET.get('details', '').lower() in ('1', 'true', 'yes'):
+                    details = get_verification_details(prescription_id)
+                    verification_data['current'] = details
+                    if details is None:
+                        verification_data['verification_status'] = 'REVOKED'
+            else:
+                details = get_verification_details(prescription_id)
+                if details is None:
+                    return self._verification_error(
+                        request, prescription_id, wants_json, 'PRESCRIPTION_NOT_FOUND',
+                        f'Prescription with ID {prescription_id} not found', status.HTTP_404_NOT_FOUND
+                    )
+                verification_data = public_verification_data(details)
             
-            # Prepare verification data
-            verification_data = {
-                'prescription_id': prescription.id,
-                'consultation_id': prescription.consultation_id,
-                'issued_date': prescription.issued_date,
-                'issued_time': prescription.issued_time,
-                'is_finalized': prescription.is_finalized,
-                'is_draft': prescription.is_draft,
-                'doctor': {
-                    'name': prescription.doctor.name,
-                    'qualifications': getattr(prescription.doctor, 'qualifications', 'MBBS'),
-                    'specialization': getattr(prescription.doctor, 'specialization', 'Family Physician'),
-                },
-                'patient': {
-                    'name': prescription.patient.name,
-                    'age': self._calculate_age(getattr(prescription.patient, 'date_of_birth', None)),
-                    'gender': getattr(prescription.patient, 'gender', 'N/A'),
-                },
-                'medications_count': prescription.medications.count(),
-                'verification_status': 'VALID' if prescription.is_finalized else 'DRAFT',
-                'pdf_available': latest_pdf is not None,
-                'latest_pdf_version': latest_pdf.version_number if latest_pdf else None,
-                'verification_timestamp': timezone.now().isoformat(),
-            }
+            verification_data['verification_timestamp'] = timezone.now().isoformat()
             
             # Check if request wants JSON (API call) or HTML (browser)
-            if request.headers.get('Accept') == 'application/json' or request.GET.get('format') == 'json':
+            if wants_json:
                 return Response({
                     'success': True,
                     'data': verification_data,
@@ -927,60 +963,38 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
                     'prescription_id': prescription_id
                 })
             
-        except Prescription.DoesNotExist:
-            if request.headers.get('Accept') == 'application/json' or request.GET.get('format') == 'json':
-                return Response({
-                    'success': False,
-                    'error': {
-                        'code': 'PRESCRIPTION_NOT_FOUND',
-                        'message': f'Prescription with ID {prescription_id} not found'
-                    },
-                    'timestamp': timezone.now().isoformat()
-                }, status=status.HTTP_404_NOT_FOUND)
-            else:
-                # Return HTML error page
-                from django.shortcuts import render
-                return render(request, 'prescription_verify.html', {
-                    'error': f'Prescription with ID {prescription_id} not found',
-                    'prescription_id': prescription_id
-                }, status=404)
         except Exception as e:
-            if request.headers.get('Accept') == 'application/json' or request.GET.get('format') == 'json':
-                return Response({
-                    'success': False,
-                    'error': {
-                        'code': 'VERIFICATION_ERROR',
-                        'message': f'Failed to verify prescription: {str(e)}'
-                    },
-                    'timestamp': timezone.now().isoformat()
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            else:
-                # Return HTML error page
-                from django.shortcuts import render
-                return render(request, 'prescription_verify.html', {
-                    'error': f'Failed to verify prescription: {str(e)}',
-                    'prescription_id': prescription_id
-                }, status=500)
+            return self._verification_error(
+                request, prescription_id, wants_json, 'VERIFICATION_ERROR',
+                f'Failed to verify prescription: {str(e)}', status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-    def _calculate_age(self, date_of_birth):
-        """Calculate age from date of birth"""
-        if not date_of_birth:
-            return "N/A"
-        
-        from datetime import datetime
-        today = datetime.now().date()
-        age = today.year - date_of_birth.year
-        if today.month < date_of_birth.month or (today.month == date_of_birth.month and today.day < date_of_birth.day):
-            age -= 1
-        return str(age)
+    def _verification_error(self, request, prescription_id, wants_json, code, message, http_status):
+        """Verification error as JSON or as the HTML verification page"""
+        if wants_json:
+            return Response({
+                'success': False,
+                'error': {
+                    'code': code,
+                    'message': message
+                },
+                'timestamp': timezone.now().isoformat()
+            }, status=http_status)
+        # Return HTML error page
+        from django.shortcuts import render
+        return render(request, 'prescription_verify.html', {
+            'error': message,
+            'prescription_id': prescription_id
+        }, status=http_status)
 
     @action(detail=True, methods=['post'], url_path='generate-mobile-pdf')
     def generate_mobile_pdf(self, request, pk=None):
         """Generate PDF for mobile consultation with uploaded prescription image"""
         prescription = self.get_object()
+        upload_token = request.data.get('prescription_image_token')
         
-        # Check if prescription image is provided
-        if 'prescription_image' not in request.FILES:
+        # Check if prescription image is provided (multipart file or direct upload token)
+        if 'prescription_image' not in request.FILES and not upload_token:
             return Response({
                 'success': False,
                 'error': {
@@ -992,7 +1006,20 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
         
         try:
             # Save the uploaded image using PrescriptionImage model
-            uploaded_file = request.FILES['prescription_image']
+            if 'prescription_image' in request.FILES:
+                uploaded_file = request.FILES['prescription_image']
+            else:
+                try:
+                    uploaded_file = confirm_direct_upload(request.user, upload_token, 'prescription_image')
+                except DirectUploadError as e:
+                    return Response({
+                        'success': False,
+                        'error': {
+                            'code': e.code,
+                            'message': e.message
+                        },
+                        'timestamp': timezone.now().isoformat()
+                    }, status=status.HTTP_400_BAD_REQUEST)
             
             # Create PrescriptionImage instance
             prescription_image = PrescriptionImage.objects.create(
@@ -1070,46 +1097,35 @@ class InvestigationViewSet(viewsets.ModelViewSet):
     serializer_class = InvestigationCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def _catalog_response(self, request, section, message):
+        """Serve a catalog section from the in-process snapshot, with ETag revalidation"""
+        catalog = get_catalog()
+        etag = catalog.etags[section]
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response({
+                'success': True,
+                'data': catalog.sections[section],
+                'message': message
+            })
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=CATALOG_MAX_AGE, must_revalidate=True)
+        return response
+    
     @action(detail=False, methods=['get'])
     def list_all(self, request):
         """Get all investigation categories and tests"""
-        categories = InvestigationCategory.objects.filter(is_active=True).prefetch_related('tests')
-        tests = InvestigationTest.objects.filter(is_active=True).select_related('category')
-        
-        data = {
-            'categories': InvestigationCategorySerializer(categories, many=True).data,
-            'tests': InvestigationTestSerializer(tests, many=True).data
-        }
-        
-        return Response({
-            'success': True,
-            'data': data,
-            'message': 'Investigation list retrieved successfully'
-        })
+        return self._catalog_response(request, 'list_all', 'Investigation list retrieved successfully')
     
     @action(detail=False, methods=['get'])
     def categories(self, request):
         """Get all investigation categories"""
-        categories = InvestigationCategory.objects.filter(is_active=True)
-        serializer = InvestigationCategorySerializer(categories, many=True)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Categories retrieved successfully'
-        })
+        return self._catalog_response(request, 'categories', 'Categories retrieved successfully')
     
     @action(detail=False, methods=['get'])
     def tests(self, request):
         """Get all investigation tests"""
-        tests = InvestigationTest.objects.filter(is_active=True).select_related('category')
-        serializer = InvestigationTestSerializer(tests, many=True)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Tests retrieved successfully'
-        })
+        return self._catalog_response(request, 'tests', 'Tests retrieved successfully')
 
     def update_test(self, request, pk=None):
         """Update an existing investigation test (partial update allowed)."""
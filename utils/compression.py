@@ -0,0 +1,108 @@
+"""
+Response body codecs for CompressionMiddleware.
+
+gzip is always available; brotli is used when the ``brotli`` package is
+installed and the client accepts it. Streaming compressors flush after
+every chunk, so streamed responses still reach the client chunk by chunk.
+"""
+
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+
+# Quality 4-5 is the usual sweet spot for on-the-fly brotli; 11 is for static assets
+BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+
+_ACCEPT_ENCODING_RE = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level=GZIP_LEVEL):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self):
+        return _GzipStream(self.level)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, quality=BROTLI_QUALITY):
+        self.quality = quality
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self):
+        return _BrotliStream(self.quality)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def available_codecs():
+    """Codecs in server preference order"""
+    codecs = [GzipCodec()]
+    if brotli is not None:
+        codecs.insert(0, BrotliCodec())
+    return codecs
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in (header or '').split(','):
+        match = _ACCEPT_ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = quality
+    return accepted
+
+
+def negotiate(header, codecs):
+    """Best codec the client accepts, None for identity"""
+    accepted = accepted_encodings(header)
+    best, best_quality = None, 0
+    for codec in codecs:
+        quality = accepted.get(codec.name, accepted.get('*', 0))
+        # Ties keep the earlier (preferred) codec
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
@@ -0,0 +1,233 @@
+"""
+Two-phase direct uploads to DigitalOcean Spaces.
+
+1. POST /api/utils/direct-uploads/ with {target, filename, content_type,
+   size[, md5]} returns a presigned POST (url + form fields) and an
+   upload_token.
+2. The client POSTs the file straight to Spaces, then sends the
+   upload_token in place of the file to the usual create endpoint.
+   DirectUploadFileField checks the object (size, MD5/ETag) with a HEAD
+   request and stores its key on the model.
+
+File bytes never pass through our workers or local disk. The token is
+signed and carries everything needed to confirm, so no pending-upload
+table is kept.
+"""
+
+import logging
+import os
+import re
+import uuid
+from functools import lru_cache
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core import signing
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+DIRECT_UPLOAD_EXPIRES = getattr(settings, 'DIRECT_UPLOAD_EXPIRES', 60 * 15)
+DIRECT_UPLOAD_TOKEN_MAX_AGE = getattr(settings, 'DIRECT_UPLOAD_TOKEN_MAX_AGE', 60 * 60 * 6)
+TOKEN_SALT = 'utils.direct_uploads'
+
+IMAGE_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']
+DOCUMENT_TYPES = IMAGE_TYPES + [
+    'application/pdf', 'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'text/plain'
+]
+MB = 1024 * 1024
+
+
+class UploadTarget:
+    def __init__(self, prefix, content_types, max_size):
+        self.prefix = prefix
+        self.content_types = content_types
+        self.max_size = max_size
+
+
+# Prefixes match each model field's upload_to
+UPLOAD_TARGETS = {
+    'patient_document': UploadTarget('patient_documents/', DOCUMENT_TYPES, 10 * MB),
+    'medical_record': UploadTarget('medical_records/', DOCUMENT_TYPES, 10 * MB),
+    'consultation_attachment': UploadTarget('consultation_attachments/', DOCUMENT_TYPES, 25 * MB),
+    'prescription_image': UploadTarget('prescriptions/images/', IMAGE_TYPES, 10 * MB),
+    'doctor_document': UploadTarget('doctor_documents/', DOCUMENT_TYPES, 10 * MB),
+    'signature': UploadTarget('signatures/', IMAGE_TYPES + ['application/pdf'], 5 * MB),
+}
+
+MD5_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class DirectUploadError(Exception):
+    """Raised when an upload cannot be issued or confirmed; ``code`` matches the API error code"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class DirectUpload(str):
+    """
+    Storage name of a confirmed upload.
+
+    A str so it can be assigned to a FileField as-is (Django stores the name
+    without re-uploading); also exposes size/content_type like UploadedFile so
+    existing validate_<field> methods keep working.
+    """
+
+    def __new__(cls, name, size, content_type, original_name=''):
+        upload = super().__new__(cls, name)
+        upload.size = size
+        upload.content_type = content_type
+        upload.original_name = original_name
+        return upload
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+        region_name=settings.AWS_S3_REGION_NAME,
+        config=Config(signature_version='s3v4', s3={'addressing_style': 'virtual'})
+    )
+
+
+def _object_key(name):
+    return f"{settings.AWS_LOCATION}/{name}"
+
+
+def _storage_name(target, filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if not re.match(r'^\.[a-z0-9]{1,10}$', extension):
+        extension = ''
+    return f"{target.prefix}{uuid.uuid4().hex}{extension}"
+
+
+def create_direct_upload(user, target_name, filename, content_type, size, md5=None):
+    """
+    Issue a presigned POST for one file.
+
+    Spaces enforces the content type and the exact declared size, so a
+    confirmed upload is always the file that was announced here.
+    """
+    target = UPLOAD_TARGETS.get(target_name)
+    if target is None:
+        raise DirectUploadError('INVALID_TARGET', f"Unknown upload target '{target_name}'")
+    if content_type not in target.content_types:
+        raise DirectUploadError('INVALID_FILE_TYPE', f"Content type '{content_type}' is not allowed")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise DirectUploadError('INVALID_SIZE', 'size must be an integer number of bytes')
+    if size <= 0 or size > target.max_size:
+        raise DirectUploadError('FILE_TOO_LARGE', f"File size must be between 1 byte and {target.max_size // MB}MB")
+    if md5:
+        md5 = md5.lower()
+        if not MD5_PATTERN.match(md5):
+            raise DirectUploadError('INVALID_CHECKSUM', 'md5 must be a 32 character hex digest')
+
+    name = _storage_name(target, filename)
+    acl = getattr(settings, 'AWS_DEFAULT_ACL', 'private')
+    presigned = get_s3_client().generate_presigned_post(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=_object_key(name),
+        Fields={'acl': acl, 'Content-Type': content_type},
+        Conditions=[
+            {'acl': acl},
+            {'Content-Type': content_type},
+            ['content-length-range', size, size],
+        ],
+        ExpiresIn=DIRECT_UPLOAD_EXPIRES
+    )
+    token = signing.dumps({
+        'u': user.pk,
+        't': target_name,
+        'n': name,
+        's': size,
+        'c': content_type,
+        'm': md5 or '',
+        'f': (filename or '')[:255],
+    }, salt=TOKEN_SALT, compress=True)
+
+    return {
+        'upload': {
+            'method': 'POST',
+            'url': presigned['url'],
+            'fields': presigned['fields'],
+        },
+        'upload_token': token,
+        'file_path': name,
+        'expires_in': DIRECT_UPLOAD_EXPIRES,
+    }
+
+
+def confirm_direct_upload(user, token, target_name=None):
+    """
+    Check that the object behind ``token`` exists and matches what was
+    announced; returns a DirectUpload. Mismatching objects are deleted.
+    """
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=DIRECT_UPLOAD_TOKEN_MAX_AGE)
+    except signing.SignatureExpired:
+        raise DirectUploadError('UPLOAD_EXPIRED', 'Upload token has expired')
+    except signing.BadSignature:
+        raise DirectUploadError('INVALID_UPLOAD_TOKEN', 'Upload token is invalid')
+
+    if payload['u'] != getattr(user, 'pk', None) or (target_name and payload['t'] != target_name):
+        raise DirectUploadError('INVALID_UPLOAD_TOKEN', 'Upload token is not valid for this request')
+
+    client = get_s3_client()
+    key = _object_key(payload['n'])
+    try:
+        head = client.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            raise DirectUploadError('UPLOAD_NOT_FOUND', 'File has not been uploaded yet')
+        raise
+
+    error = None
+    if head.get('ContentLength') != payload['s']:
+        error = DirectUploadError('UPLOAD_SIZE_MISMATCH', 'Uploaded file size does not match')
+    elif payload['m'] and head.get('ETag', '').strip('"') != payload['m']:
+        # Single-part uploads (the only kind a presigned POST makes) use the MD5 as ETag
+        error = DirectUploadError('UPLOAD_CHECKSUM_MISMATCH', 'Uploaded file checksum does not match')
+    if error:
+        logger.warning(f"Rejected direct upload {key}: {error.code}")
+        client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+        raise error
+
+    return DirectUpload(payload['n'], payload['s'], payload['c'], payload['f'])
+
+
+def read_direct_upload(name):
+    """Return the bytes of an object uploaded directly to Spaces"""
+    response = get_s3_client().get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=_object_key(name))
+    return response['Body'].read()
+
+
+class DirectUploadFileField(serializers.FileField):
+    """
+    FileField that also accepts an upload_token from a direct upload
+    (multipart uploads keep working unchanged).
+    """
+
+    def __init__(self, upload_target, **kwargs):
+        self.upload_target = upload_target
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            request = self.context.get('request')
+            try:
+                return confirm_direct_upload(getattr(request, 'user', None), data, self.upload_target)
+            except DirectUploadError as e:
+                raise serializers.ValidationError(e.message, code=e.code)
+        return super().to_internal_value(data)
@@ -0,0 +1,175 @@
+"""
+Transaction-aware websocket event bus.
+
+Signal handlers call ``publish()`` instead of ``group_send``. Events are
+only released by ``transaction.on_commit``, so nothing is sent for a rolled
+back transaction. Inside a ``batch()`` scope (every HTTP request gets one
+via EventBatchMiddleware) released events are collected, deduplicated by
+key and sent together when the scope closes: all group_send calls run
+concurrently in a single event-loop hop instead of one blocking Redis
+round trip each.
+
+Outside a batch scope each event is sent on its own after commit.
+
+Messages built with ``group_message()`` carry their websocket frame
+pre-encoded; consumers forward it as is.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, contextmanager
+
+from asgiref.local import Local
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from utils import fast_json
+
+logger = logging.getLogger(__name__)
+
+# Follows the request across sync_to_async/async_to_sync boundaries
+_local = Local()
+
+
+class _Batch:
+    def __init__(self):
+        self.events = {}
+
+    def add(self, key, groups, message):
+        if key is None:
+            key = object()
+        # Later events for the same key replace earlier ones
+        self.events[key] = (groups, message)
+
+    def drain(self):
+        events, self.events = self.events, {}
+        return events
+
+
+def group_message(handler, data, frame_type=None):
+    """
+    Channel-layer message for consumer method ``handler`` that carries the
+    websocket frame {"type": frame_type or handler, "data": data} already
+    encoded, so it is serialized once rather than once per recipient socket.
+    """
+    return {
+        'type': handler,
+        'text': fast_json.dumps({'type': frame_type or handler, 'data': data})
+    }
+
+
+def _batches():
+    batches = getattr(_local, 'batches', None)
+    if batches is None:
+        batches = _local.batches = []
+    return batches
+
+
+def _resolve(events):
+    """
+    [(group, message)] with lazy messages built once per event. Builders may
+    use the ORM, so this always runs in sync context.
+    """
+    resolved = []
+    for groups, message in events:
+        try:
+            message = message() if callable(message) else message
+        except Exception as e:
+            logger.error(f"Error building websocket event: {e}")
+            continue
+        resolved.extend((group, message) for group in groups)
+    return resolved
+
+
+async def _group_send_all(sends):
+    if not sends:
+        return
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    results = await asyncio.gather(
+        *(channel_layer.group_send(group, message) for group, message in sends),
+        return_exceptions=True
+    )
+    for (group, _), result in zip(sends, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error sending websocket event to {group}: {result}")
+
+
+async def send_events(events):
+    """Send (groups, message) events concurrently over the channel layer"""
+    sends = await sync_to_async(_resolve)(events)
+    await _group_send_all(sends)
+
+
+def send(events):
+    """Send (groups, message) events now, in one event-loop hop"""
+    sends = _resolve(events)
+    if not sends:
+        return
+    try:
+        async_to_sync(_group_send_all)(sends)
+    except Exception as e:
+        logger.error(f"Error publishing websocket events: {e}")
+
+
+def _release(key, groups, message):
+    batches = _batches()
+    if batches:
+        batches[-1].add(key, groups, message)
+    else:
+        send([(groups, message)])
+
+
+def publish(groups, message, key=None):
+    """
+    Send ``message`` to each channel-layer group in ``groups`` once the
+    current transaction commits.
+
+    ``message`` may be a zero-argument callable, evaluated once at send
+    time (after deduplication). Events sharing ``key`` within a batch are
+    collapsed to the latest one.
+    """
+    if isinstance(groups, str):
+        groups = [groups]
+    transaction.on_commit(lambda: _release(key, tuple(groups), message))
+
+
+def _close(current):
+    """Detach ``current``; returns the events the caller must send (None if handed over)"""
+    batches = _batches()
+    batches.remove(current)
+    events = current.drain()
+    if batches:
+        # Nested scope: the enclosing batch sends them
+        for key, event in events.items():
+            batches[-1].add(key, *event)
+        return None
+    return list(events.values())
+
+
+@contextmanager
+def batch():
+    """Collect events released inside the block and send them together on exit"""
+    current = _Batch()
+    _batches().append(current)
+    try:
+        yield current
+    finally:
+        events = _close(current)
+        if events:
+            send(events)
+
+
+@asynccontextmanager
+async def abatch():
+    """Async batch(): sends on the running event loop"""
+    current = _Batch()
+    _batches().append(current)
+    try:
+        yield current
+    finally:
+        events = _close(current)
+        if events:
+            await send_events(events)
@@ -0,0 +1,55 @@
+"""
+JSON encoding shared by the API renderer/parser and the websocket consumers.
+
+orjson is used when it is installed, the stdlib json module otherwise. Both
+paths produce what DRF's JSONRenderer produces: compact separators,
+unescaped unicode, and rest_framework's JSONEncoder rules for everything
+JSON has no type for (datetimes in ISO 8601 with "Z" for UTC, dates and
+times via isoformat, Decimal as a number, UUID as a string, lazy
+translations, querysets, ...). Non-string dict keys are stringified.
+
+Payloads orjson refuses (integers wider than 64 bits, unsupported types)
+are retried with the stdlib, so they fail or succeed exactly as before.
+orjson writes NaN and infinity as null where the stdlib path raises.
+"""
+
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def dumps_bytes(obj):
+    """UTF-8 encoded JSON for ``obj``"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            pass
+    return _encoder.encode(obj).encode('utf-8')
+
+
+def dumps(obj):
+    """JSON text for ``obj`` (websocket text frames)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_encoder.default, option=ORJSON_OPTIONS).decode('utf-8')
+        except TypeError:
+            pass
+    return _encoder.encode(obj)
+
+
+def loads(data):
+    """Parse JSON from str or bytes; raises json.JSONDecodeError (a ValueError)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,158 @@
+"""
+Resized WebP derivatives for user-facing images (profile pictures, clinic
+cover images, doctor signatures).
+
+When an image field changes, a background job renders one WebP per size in
+IMAGE_DERIVATIVE_SIZES and stores it next to the original:
+
+    profile_pictures/abc.jpg -> profile_pictures/abc__thumb.webp, ...
+
+Each model keeps a ``*_variants`` JSON field ({'source': name, 'thumb':
+name, ...}). Serializers use it to hand out size-specific URLs and fall
+back to the original until the variants exist.
+"""
+
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .response_cache import bump_model_version
+from .signed_urls import get_signed_media_url
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; images are never upscaled
+IMAGE_DERIVATIVE_SIZES = getattr(settings, 'IMAGE_DERIVATIVE_SIZES', {
+    'thumb': 128,
+    'small': 320,
+    'medium': 800,
+})
+IMAGE_DERIVATIVE_QUALITY = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+# Refuse decompression bombs before decoding
+MAX_SOURCE_PIXELS = 40_000_000
+
+derivative_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-derivatives')
+
+
+def derivative_name(name, size):
+    stem, _ = os.path.splitext(name)
+    return f"{stem}__{size}.webp"
+
+
+def _read_source(name):
+    if default_storage.exists(name):
+        with default_storage.open(name, 'rb') as handle:
+            return handle.read()
+    # Not on local storage: uploaded straight to Spaces
+    from .direct_uploads import read_direct_upload
+    return read_direct_upload(name)
+
+
+def _store(name, content):
+    if getattr(settings, 'ALWAYS_UPLOAD_FILES_TO_AWS', False):
+        from .direct_uploads import get_s3_client
+        get_s3_client().put_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=f"{settings.AWS_LOCATION}/{name}",
+            Body=content,
+            ContentType='image/webp',
+            ACL=getattr(settings, 'AWS_DEFAULT_ACL', 'private'),
+            CacheControl='max-age=31536000'
+        )
+        return
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(content))
+
+
+def render_derivatives(content):
+    """Return {size: webp bytes} for image ``content``"""
+    with Image.open(io.BytesIO(content)) as image:
+        width, height = image.size
+        if width * height > MAX_SOURCE_PIXELS:
+            raise ValueError(f"Image too large ({width}x{height})")
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        rendered = {}
+        for size, edge in IMAGE_DERIVATIVE_SIZES.items():
+            variant = image.copy()
+            variant.thumbnail((edge, edge), Image.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, 'WEBP', quality=IMAGE_DERIVATIVE_QUALITY, method=4)
+            rendered[size] = buffer.getvalue()
+        return rendered
+
+
+def generate_derivatives(name):
+    """Render and store the derivatives of ``name``; returns the variants dict"""
+    rendered = render_derivatives(_read_source(name))
+    variants = {'source': name}
+    for size, content in rendered.items():
+        variants[size] = derivative_name(name, size)
+        _store(variants[size], content)
+    return variants
+
+
+def _generate_and_record(model, pk, field_name, variants_field, name):
+    close_old_connections()
+    try:
+        variants = generate_derivatives(name)
+    except (UnidentifiedImageError, ValueError, OSError) as e:
+        logger.info(f"Skipping image derivatives for {name}: {e}")
+        return
+    except Exception as e:
+        logger.error(f"Error generating image derivatives for {name}: {e}")
+        return
+    # update() skips post_save; the filter ignores results for a replaced image
+    if model.objects.filter(pk=pk, **{field_name: name}).update(**{variants_field: variants}):
+        # Cached responses listing the row would keep the old variants
+        bump_model_version(model)
+    close_old_connections()
+
+
+def queue_derivatives(instance, field_name, variants_field):
+    """
+    Schedule derivative generation if ``field_name`` changed since the
+    variants were last rendered. Call from post_save.
+    """
+    name = str(getattr(instance, field_name) or '')
+    variants = getattr(instance, variants_field) or {}
+    model = type(instance)
+    if not name:
+        if variants:
+            model.objects.filter(pk=instance.pk).update(**{variants_field: {}})
+        return
+    if variants.get('source') == name:
+        return
+    transaction.on_commit(lambda: derivative_executor.submit(
+        _generate_and_record, model, instance.pk, field_name, variants_field, name
+    ))
+
+
+def variant_url(name, variants, size):
+    """Signed URL for ``size`` of image ``name``, or of the original until it exists"""
+    if not name:
+        return None
+    name = str(name)
+    if variants and variants.get('source') == name and size in variants:
+        return get_signed_media_url(variants[size])
+    return get_signed_media_url(name)
+
+
+def variant_urls(name, variants):
+    """{'original': url, 'thumb': url, ...} for image ``name``"""
+    if not name:
+        return None
+    urls = {'original': get_signed_media_url(str(name))}
+    for size in IMAGE_DERIVATIVE_SIZES:
+        urls[size] = variant_url(name, variants, size)
+    return urls
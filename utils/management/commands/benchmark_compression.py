@@ -0,0 +1,159 @@
+import random
+import string
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from utils import compression
+
+
+WORDS = [
+    'fever', 'cough', 'headache', 'follow', 'up', 'review', 'reports', 'pain', 'chest', 'mild',
+    'persistent', 'since', 'days', 'diabetes', 'hypertension', 'routine', 'checkup', 'cold',
+]
+NAMES = ['Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Saanvi', 'Vivaan', 'Anaya', 'Arjun', 'Meera']
+STATUSES = ['scheduled', 'in_progress', 'completed', 'cancelled', 'no_show']
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def consultation_table(rng, rows):
+    """Superadmin consultation table page"""
+    start = date(2025, 1, 1)
+    return {'success': True, 'data': [{
+        'id': f'CON{n:06d}',
+        'patient': {'id': f'PAT{rng.randint(1, 9999):04d}', 'name': f'{rng.choice(NAMES)} {rng.choice(NAMES)}'},
+        'doctor': {'id': f'DOC{rng.randint(1, 300):03d}', 'name': f'Dr. {rng.choice(NAMES)}'},
+        'clinic_name': f'{rng.choice(NAMES)} Clinic',
+        'status': rng.choice(STATUSES),
+        'consultation_type': 'video_call',
+        'scheduled_date': (start + timedelta(days=n % 365)).isoformat(),
+        'scheduled_time': f'{9 + n % 9:02d}:{(n * 15) % 60:02d}:00',
+        'consultation_fee': f'{rng.choice([300, 500, 750, 1000])}.00',
+        'payment_status': rng.choice(['paid', 'pending']),
+        'chief_complaint': _words(rng, 8),
+    } for n in range(rows)], 'message': 'Consultations retrieved successfully'}
+
+
+def comprehensive_analytics(rng, rows):
+    """SuperAdminComprehensiveAnalyticsView-style nested report"""
+    start = date(2025, 1, 1)
+    return {'success': True, 'data': {
+        'daily': [{
+            'date': (start + timedelta(days=n)).isoformat(),
+            'consultations': rng.randint(50, 500),
+            'revenue': round(rng.uniform(10000, 90000), 2),
+            'new_patients': rng.randint(5, 80),
+        } for n in range(365)],
+        'doctors': [{
+            'doctor_id': f'DOC{n:03d}',
+            'name': f'Dr. {rng.choice(NAMES)}',
+            'consultations': rng.randint(0, 900),
+            'completion_rate': round(rng.uniform(60, 100), 1),
+            'average_rating': round(rng.uniform(3, 5), 2),
+        } for n in range(rows // 2)],
+    }}
+
+
+def doctor_status_snapshot(rng, rows):
+    """Full doctor status snapshot"""
+    return {'success': True, 'data': {'doctors': [{
+        'doctor_id': f'DOC{n:03d}',
+        'name': f'Dr. {rng.choice(NAMES)}',
+        'specialization': rng.choice(['Cardiology', 'Dermatology', 'Pediatrics', 'General Medicine']),
+        'is_online': rng.random() < 0.4,
+        'is_available': rng.random() < 0.3,
+        'current_status': rng.choice(['online', 'offline', 'busy']),
+        'last_activity': f'2025-06-01T{n % 24:02d}:{n % 60:02d}:00+05:30',
+    } for n in range(rows)]}}
+
+
+def patient_pdf_list(rng, rows):
+    """Patient PDF list with long signed URLs (signatures don't compress)"""
+    def signature(length):
+        return ''.join(rng.choice(string.hexdigits.lower()) for _ in range(length))
+
+    return {'success': True, 'data': [{
+        'id': n,
+        'prescription_id': n,
+        'version_number': 1 + n % 3,
+        'file_url': (
+            f'https://edrspace.sgp1.digitaloceanspaces.com/edrcontainer1/prescriptions/{n}/prescription_{n}.pdf'
+            f'?X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Credential={signature(20).upper()}%2F20250601%2Fsgp1'
+            f'%2Fs3%2Faws4_request&X-Amz-Date=20250601T000000Z&X-Amz-Expires=3600'
+            f'&X-Amz-SignedHeaders=host&X-Amz-Signature={signature(64)}'
+        ),
+        'generated_at': '2025-06-01T10:00:00+05:30',
+        'doctor_name': f'Dr. {rng.choice(NAMES)}',
+    } for n in range(rows)]}
+
+
+PAYLOADS = {
+    'consultation_table': consultation_table,
+    'comprehensive_analytics': comprehensive_analytics,
+    'doctor_status_snapshot': doctor_status_snapshot,
+    'patient_pdf_list': patient_pdf_list,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compress representative JSON payloads with every available codec and report '
+        'bytes saved and CPU time per response.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=500,
+            help='Rows per list payload (default: 500)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Compressions per payload and codec (default: 50)'
+        )
+        parser.add_argument(
+            '--payload',
+            action='append',
+            dest='payloads',
+            choices=sorted(PAYLOADS),
+            help='Payload to benchmark, may be repeated (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        if options['rows'] <= 0 or options['iterations'] <= 0:
+            raise CommandError('--rows and --iterations must be positive')
+
+        codecs = [compression.GzipCodec(level) for level in (1, compression.GZIP_LEVEL, 9)]
+        if compression.brotli is not None:
+            codecs += [compression.BrotliCodec(quality) for quality in (1, compression.BROTLI_QUALITY, 9)]
+        else:
+            self.stdout.write(self.style.WARNING('brotli is not installed; only gzip is measured'))
+
+        renderer = JSONRenderer()
+        self.stdout.write(
+            f"{'payload':<26}{'codec':<10}{'bytes':>10}{'compressed':>12}{'saved':>8}{'ms/op':>9}{'MB/s':>9}"
+        )
+        for name in options['payloads'] or sorted(PAYLOADS):
+            body = renderer.render(PAYLOADS[name](random.Random(42), options['rows']))
+            for codec in codecs:
+                level = getattr(codec, 'level', None) or getattr(codec, 'quality', None)
+                compressed = codec.compress(body)
+                started = time.perf_counter()
+                for _ in range(options['iterations']):
+                    codec.compress(body)
+                elapsed = (time.perf_counter() - started) / options['iterations']
+                self.stdout.write(
+                    f"{name:<26}{f'{codec.name}-{level}':<10}{len(body):>10}{len(compressed):>12}"
+                    f"{100 * (1 - len(compressed) / len(body)):>7.1f}%{elapsed * 1000:>9.2f}"
+                    f"{len(body) / elapsed / 1e6:>9.1f}"
+                )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
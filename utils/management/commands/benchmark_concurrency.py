@@ -0,0 +1,134 @@
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+
+DEFAULT_PATHS = [
+    '/api/eclinic/medications/public-search/?q=para&include_fda=true',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire N concurrent clients at a running server and report throughput and latency. '
+        'Run it once against SERVER_MODE=wsgi and once against SERVER_MODE=asgi to compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000',
+            help='Server to benchmark (default: http://127.0.0.1:8000)'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Request path, may be repeated (default: public medication search with FDA)'
+        )
+        parser.add_argument(
+            '--method',
+            default='GET',
+            choices=['GET', 'POST'],
+            help='HTTP method (default: GET)'
+        )
+        parser.add_argument(
+            '--json',
+            default=None,
+            help='JSON body for POST requests, e.g. \'{"phone": "9999999999"}\''
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=200,
+            help='Number of concurrent clients (default: 200)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=5,
+            help='Requests per client (default: 5)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60.0,
+            help='Per-request timeout in seconds (default: 60)'
+        )
+        parser.add_argument(
+            '--token',
+            default=None,
+            help='Bearer token for authenticated endpoints'
+        )
+
+    def handle(self, *args, **options):
+        body = json.loads(options['json']) if options['json'] else None
+        if options['concurrency'] <= 0 or options['requests'] <= 0:
+            raise CommandError('--concurrency and --requests must be positive')
+
+        report = asyncio.run(self._run(
+            base_url=options['base_url'].rstrip('/'),
+            paths=options['paths'] or DEFAULT_PATHS,
+            method=options['method'],
+            body=body,
+            concurrency=options['concurrency'],
+            per_client=options['requests'],
+            timeout=options['timeout'],
+            token=options['token'],
+        ))
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+        for key, value in report.items():
+            self.stdout.write(f'  {key}: {value}')
+
+    async def _run(self, base_url, paths, method, body, concurrency, per_client, timeout, token):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        latencies = []
+        statuses = {}
+        errors = 0
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits, headers=headers) as client:
+
+            async def worker(worker_id):
+                nonlocal errors
+                for i in range(per_client):
+                    path = paths[(worker_id + i) % len(paths)]
+                    started = time.perf_counter()
+                    try:
+                        response = await client.request(method, path, json=body)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            wall_started = time.perf_counter()
+            await asyncio.gather(*(worker(n) for n in range(concurrency)))
+            wall = time.perf_counter() - wall_started
+
+        latencies.sort()
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            return round(latencies[index], 1)
+
+        return {
+            'clients': concurrency,
+            'requests': concurrency * per_client,
+            'completed': len(latencies),
+            'errors': errors,
+            'status_codes': dict(sorted(statuses.items())),
+            'wall_time_s': round(wall, 2),
+            'throughput_rps': round(len(latencies) / wall, 1) if wall else None,
+            'latency_mean_ms': round(statistics.fmean(latencies), 1) if latencies else None,
+            'latency_p50_ms': percentile(50),
+            'latency_p95_ms': percentile(95),
+            'latency_p99_ms': percentile(99),
+        }
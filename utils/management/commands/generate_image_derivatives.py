@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from utils.image_derivatives import generate_derivatives
+from utils.response_cache import bump_model_version
+
+# (model label, image field, variants field)
+IMAGE_FIELDS = [
+    ('authentication.User', 'profile_picture', 'profile_picture_variants'),
+    ('eclinic.Clinic', 'cover_image', 'cover_image_variants'),
+    ('doctors.DoctorSignature', 'file_path', 'variants'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnail/WebP variants for existing profile pictures, clinic covers and signatures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render variants that already exist'
+        )
+
+    def handle(self, *args, **options):
+        from django.apps import apps
+
+        for label, field_name, variants_field in IMAGE_FIELDS:
+            model = apps.get_model(label)
+            rows = model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+            rendered = skipped = failed = 0
+
+            for pk, name, variants in rows.values_list('pk', field_name, variants_field).iterator():
+                if not options['force'] and (variants or {}).get('source') == name:
+                    skipped += 1
+                    continue
+                try:
+                    variants = generate_derivatives(name)
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'{label} {pk}: {e}'))
+                    continue
+                model.objects.filter(pk=pk, **{field_name: name}).update(**{variants_field: variants})
+                rendered += 1
+
+            if rendered:
+                # update() skips post_save; cached public listings embed the variants
+                bump_model_version(model)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{label}.{field_name}: {rendered} rendered, {skipped} up to date, {failed} failed'
+            ))
@@ -0,0 +1,114 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import compression, event_bus
+
+
+class EventBatchMiddleware:
+    """Send the websocket events published during a request as one batch after the response"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with event_bus.batch():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with event_bus.abatch():
+            return await self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with brotli or gzip, whichever the client prefers.
+
+    Bodies under COMPRESSION_MIN_SIZE bytes, already encoded responses and
+    already compressed media (PDFs, images, archives) are left alone.
+    Streaming responses are compressed chunk by chunk. HTML is skipped: pages
+    that echo CSRF tokens are what BREACH-style attacks target, and the API
+    only serves JSON.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    SKIP_CONTENT_TYPES = (
+        'application/pdf', 'application/zip', 'application/gzip', 'application/x-gzip',
+        'application/octet-stream', 'image/', 'video/', 'audio/', 'font/woff', 'text/html',
+    )
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.codecs = compression.available_codecs()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 206, 304):
+            return response
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(self.SKIP_CONTENT_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.codecs)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            stream = codec.stream()
+            if response.is_async:
+                response.streaming_content = _acompress_stream(response.streaming_content, stream)
+            else:
+                response.streaming_content = _compress_stream(response.streaming_content, stream)
+            # The compressed size isn't known until the stream ends
+            del response.headers['Content-Length']
+        else:
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag names the identity bytes; the encoded variant only matches weakly
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
+
+
+def _compress_stream(chunks, stream):
+    for chunk in chunks:
+        if chunk:
+            yield stream.compress(chunk)
+    yield stream.finish()
+
+
+async def _acompress_stream(chunks, stream):
+    async for chunk in chunks:
+        if chunk:
+            yield stream.compress(chunk)
+    yield stream.finish()
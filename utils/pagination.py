@@ -0,0 +1,224 @@
+"""
+Pagination helpers for large lists (consultations, payments, prescriptions).
+
+- Keyset ("cursor") pagination: the cursor encodes the ordering values of
+  the last row, so page N costs the same as page 1 and no COUNT(*) is run.
+- Approximate counts: pg_class.reltuples for unfiltered Postgres tables,
+  otherwise an exact count cached for a short time.
+
+Both are opt-in per request:
+    ?pagination=cursor[&cursor=...]    keyset mode
+    ?count=approximate                 approximate count (either mode)
+"""
+
+import base64
+import datetime
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_CACHE_TTL = getattr(settings, 'PAGINATION_COUNT_CACHE_TTL', 60)
+
+
+def approximate_count(queryset):
+    """
+    Cheap row count for a queryset.
+
+    Unfiltered querysets on Postgres read the planner estimate from
+    pg_class; anything else runs COUNT(*) once and caches it briefly.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where and not queryset.query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been analyzed
+        if row and row[0] >= 0:
+            return row[0]
+
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    cache_key = f'pagination:count:{queryset.model._meta.db_table}:{digest}'
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, COUNT_CACHE_TTL)
+    return count
+
+
+def wants_cursor_pagination(request):
+    return request.query_params.get('pagination') == 'cursor' or 'cursor' in request.query_params
+
+
+def wants_approximate_count(request):
+    return request.query_params.get('count') == 'approximate'
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.time, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPaginator:
+    """
+    Keyset pagination over an explicit ordering, e.g.
+    ('-scheduled_date', '-scheduled_time', 'id').
+
+    The last field should make the ordering unique (normally the primary
+    key). Ordering fields must be non-nullable.
+    """
+
+    def __init__(self, ordering, page_size):
+        self.ordering = list(ordering)
+        self.page_size = page_size
+
+    @staticmethod
+    def encode_cursor(values, reverse=False):
+        payload = json.dumps({'v': [_encode_value(v) for v in values], 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Return (values, reverse); raises NotFound for a malformed cursor"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return payload['v'], bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound('Invalid cursor')
+
+    def _after(self, values, reverse):
+        """Q selecting rows strictly after ``values`` in (possibly reversed) ordering"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            condition |= equal & Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _order_by(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def _row_values(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def paginate(self, queryset, cursor=None):
+        """
+        Return (rows, next_cursor, previous_cursor) for the page at ``cursor``.
+        """
+        reverse = False
+        if cursor:
+            values, reverse = self.decode_cursor(cursor)
+            if len(values) != len(self.ordering):
+                raise NotFound('Invalid cursor')
+            queryset = queryset.filter(self._after(values, reverse))
+
+        # One extra row tells us whether there is another page
+        rows = list(queryset.order_by(*self._order_by(reverse))[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Walking forwards there is a previous page whenever we started from a
+        # cursor; walking backwards there is always a next page
+        has_next, has_previous = (True, has_more) if reverse else (has_more, bool(cursor))
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(self._row_values(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(self._row_values(rows[0]), reverse=True)
+        return rows, next_cursor, previous_cursor
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """Django paginator whose count comes from approximate_count()"""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination that can switch to keyset pagination per request.
+
+    Subclasses set ``cursor_ordering``. In cursor mode the response keeps the
+    usual shape (count/next/previous/results); count is only filled in when
+    ``?count=approximate`` or ``?count=exact`` is passed.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_ordering = ('-created_at', 'id')
+
+    cursor_mode = False
+    keyset_count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_mode = wants_cursor_pagination(request)
+        if not self.cursor_mode:
+            if wants_approximate_count(request):
+                self.django_paginator_class = ApproximateCountPaginator
+            return super().paginate_queryset(queryset, request, view)
+
+        paginator = KeysetPaginator(self.cursor_ordering, self.get_page_size(request))
+        rows, self.next_cursor, self.previous_cursor = paginator.paginate(
+            queryset, request.query_params.get('cursor')
+        )
+        count_mode = request.query_params.get('count')
+        if count_mode == 'approximate':
+            self.keyset_count = approximate_count(queryset)
+        elif count_mode == 'exact':
+            self.keyset_count = queryset.count()
+        return rows
+
+    def _cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, 'cursor', cursor)
+
+    def get_count(self):
+        return self.keyset_count if self.cursor_mode else self.page.paginator.count
+
+    def get_next_link(self):
+        if self.cursor_mode:
+            return self._cursor_link(self.next_cursor)
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.cursor_mode:
+            return self._cursor_link(self.previous_cursor)
+        return super().get_previous_link()
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.get_count(),
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
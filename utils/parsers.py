@@ -0,0 +1,29 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from utils import fast_json
+from utils.renderers import FastJSONRenderer
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser decoding through utils.fast_json (orjson when installed).
+
+    orjson only reads UTF-8 and always rejects NaN/Infinity, which is what
+    the default STRICT_JSON setting does; other cases use JSONParser.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if fast_json.orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return fast_json.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
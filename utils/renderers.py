@@ -0,0 +1,29 @@
+from rest_framework.renderers import JSONRenderer
+
+from utils import fast_json
+
+# U+2028/U+2029 in UTF-8; escaped like DRF does so the output stays a JavaScript subset
+_LINE_SEPARATOR = b'\xe2\x80\xa8'
+_PARAGRAPH_SEPARATOR = b'\xe2\x80\xa9'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding through utils.fast_json (orjson when installed).
+
+    Output matches JSONRenderer; indented (``; indent=N``) and ASCII-only
+    rendering are left to the stdlib implementation.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = fast_json.dumps_bytes(data)
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
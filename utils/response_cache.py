@@ -0,0 +1,180 @@
+"""
+Shared response cache for public read endpoints.
+
+``cache_response`` wraps a DRF handler (``get`` of an APIView, or the
+function under ``api_view``/``async_api_view``). Once authentication and
+permissions have passed, a repeated request is answered from the cache
+without running the handler: the rendered JSON body is stored per host,
+path, sorted query parameters and negotiated media type.
+
+Invalidation is by version stamp: every model a view depends on (including
+related models its serializer reads) has a version in the shared cache,
+bumped after commit whenever a row is saved or deleted. QuerySet.update()
+skips those signals, so code updating a watched model in bulk calls
+``bump_model_version`` itself.
+Cache entries are keyed by those versions, so a bump makes older entries
+unreachable. The ETag is weak and computed from the same versions, so
+If-None-Match revalidation answers 304 without loading or hashing the body.
+"""
+
+import hashlib
+import inspect
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework.response import Response
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+# Seconds browsers and proxies may reuse a response without revalidating
+RESPONSE_CACHE_MAX_AGE = getattr(settings, 'RESPONSE_CACHE_MAX_AGE', 30)
+
+
+def _version_key(label):
+    return f"response_cache:version:{label}"
+
+
+def bump_model_version(model):
+    """Invalidate every cached response that depends on ``model``"""
+    cache.set(_version_key(model._meta.label_lower), uuid.uuid4().hex, None)
+
+
+def _bump_on_commit(sender, **kwargs):
+    transaction.on_commit(lambda: bump_model_version(sender))
+
+
+def watch_model(model):
+    """Bump ``model``'s version whenever one of its rows is saved or deleted"""
+    uid = f"response_cache:{model._meta.label_lower}"
+    post_save.connect(_bump_on_commit, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(_bump_on_commit, sender=model, weak=False, dispatch_uid=uid)
+
+
+def model_versions(labels):
+    """Current version of each model label, starting one where missing"""
+    keys = [_version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+    if len(versions) < len(keys):
+        versions = cache.get_many(keys)
+    return [versions.get(key, '') for key in keys]
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if not header:
+        return False
+    # Weak comparison: W/ prefixes are ignored
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in candidates or etag.removeprefix('W/') in candidates
+
+
+class _CachePolicy:
+    def __init__(self, models, timeout, max_age, per_role, cache_if):
+        self.labels = sorted(model._meta.label_lower for model in models)
+        self.timeout = timeout
+        self.max_age = max_age
+        self.per_role = per_role
+        self.cache_if = cache_if
+
+    def request_key(self, request):
+        """Normalized request identity, or None when the response can't be cached"""
+        renderer = getattr(request, 'accepted_renderer', None)
+        if request.method not in ('GET', 'HEAD') or renderer is None or renderer.format != 'json':
+            return None
+        params = sorted((key, request.query_params.getlist(key)) for key in request.query_params)
+        parts = [request.get_host(), request.path, repr(params), request.accepted_media_type]
+        if self.per_role:
+            parts.append(getattr(request.user, 'role', None) if request.user.is_authenticated else 'anonymous')
+        return hashlib.sha256('|'.join(map(str, parts)).encode('utf-8')).hexdigest()
+
+    def lookup(self, request):
+        """(key, etag, response or None) for a cacheable request"""
+        request_key = self.request_key(request)
+        if request_key is None:
+            return None, None, None
+        versions = model_versions(self.labels)
+        key = hashlib.sha256(f"{request_key}|{'|'.join(versions)}".encode('utf-8')).hexdigest()
+        etag = f'W/"{key[:32]}"'
+        if _etag_matches(request, etag):
+            return key, etag, self.finish(HttpResponseNotModified(), etag)
+        entry = cache.get(f"response_cache:entry:{key}")
+        if entry is None:
+            return key, etag, None
+        status_code, content, content_type = entry
+        return key, etag, self.finish(HttpResponse(content, status=status_code, content_type=content_type), etag)
+
+    def store(self, request, key, etag, response):
+        """Render and cache a fresh handler response; returns the response to send"""
+        if key is None or not isinstance(response, Response) or response.status_code != 200:
+            return response
+        if self.cache_if is not None and not self.cache_if(response):
+            return response
+        renderer = request.accepted_renderer
+        content = renderer.render(response.data, request.accepted_media_type, {'request': request, 'response': response})
+        content_type = f"{request.accepted_media_type}; charset={renderer.charset}" if renderer.charset \
+            else request.accepted_media_type
+        cache.set(f"response_cache:entry:{key}", (response.status_code, content, content_type), self.timeout)
+        return self.finish(HttpResponse(content, status=response.status_code, content_type=content_type), etag)
+
+    def finish(self, response, etag):
+        response['ETag'] = etag
+        if self.per_role:
+            patch_cache_control(response, private=True, max_age=self.max_age)
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        else:
+            patch_cache_control(response, public=True, max_age=self.max_age)
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+
+def cache_response(models, timeout=RESPONSE_CACHE_TIMEOUT, max_age=RESPONSE_CACHE_MAX_AGE,
+                   per_role=False, cache_if=None):
+    """
+    Cache the JSON responses of a DRF handler until ``models`` change.
+
+    Only use it on handlers whose response doesn't depend on the user, or
+    only on their role with ``per_role=True``. ``cache_if(response)`` can
+    refuse to store a response (e.g. degraded results).
+    """
+    policy = _CachePolicy(models, timeout, max_age, per_role, cache_if)
+    for model in models:
+        watch_model(model)
+
+    def decorator(handler):
+        # Method handlers get the view first, api_view functions the request
+        takes_view = next(iter(inspect.signature(handler).parameters)) == 'self'
+
+        def split(args):
+            return args[1] if takes_view else args[0]
+
+        if inspect.iscoroutinefunction(handler):
+            @wraps(handler)
+            async def async_wrapper(*args, **kwargs):
+                request = split(args)
+                key, etag, cached = await sync_to_async(policy.lookup)(request)
+                if cached is not None:
+                    return cached
+                response = await handler(*args, **kwargs)
+                return await sync_to_async(policy.store)(request, key, etag, response)
+            return async_wrapper
+
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            request = split(args)
+            key, etag, cached = policy.lookup(request)
+            if cached is not None:
+                return cached
+            return policy.store(request, key, etag, handler(*args, **kwargs))
+        return wrapper
+
+    return decorator
@@ -6,6 +6,19 @@ import boto3
 from botocore.config import Config
 from django.conf import settings
 import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _get_s3_client():
+    """S3 client for DigitalOcean Spaces, built once (signing is local)"""
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+        region_name=settings.AWS_S3_REGION_NAME
+    )
 
 def generate_signed_url(file_key, expiration=3600):
     """
@@ -25,17 +38,8 @@ def generate_signed_url(file_key, expiration=3600):
         if not file_key.startswith(f"{aws_location}/"):
             file_key = f"{aws_location}/{file_key}"
         
-        # Initialize S3 client for DigitalOcean Spaces
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-            region_name=settings.AWS_S3_REGION_NAME
-        )
-        
         # Generate signed URL with the format used in the other app
-        signed_url = s3_client.generate_presigned_url(
+        signed_url = _get_s3_client().generate_presigned_url(
             'get_object',
             Params={
                 'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
@@ -0,0 +1,42 @@
+"""
+Request coalescing ("single flight") for expensive idempotent calls.
+
+Concurrent callers asking for the same key share one in-flight call instead
+of each hitting the upstream service. Coalescing is per process.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Thread-safe coalescing of blocking calls by key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """Run ``func`` once per key at a time; concurrent callers get its result"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
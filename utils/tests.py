@@ -0,0 +1,168 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from eclinic.models import Clinic
+
+User = get_user_model()
+
+
+class ImageDerivativeTest(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        overrides = override_settings(MEDIA_ROOT=self.media.name, ALWAYS_UPLOAD_FILES_TO_AWS=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.admin = User.objects.create_user(phone='+911234567894', name='Admin', role='admin')
+
+    def _png(self, size):
+        import io
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGBA', size, (255, 0, 0, 128)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_cover_image_variants_generated_on_save(self):
+        from unittest import mock
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from PIL import Image
+        from utils import image_derivatives
+
+        clinic = Clinic(name='Cover Clinic', clinic_type='virtual_clinic', admin=self.admin)
+        clinic.cover_image.save('cover.png', ContentFile(self._png((1600, 900))), save=False)
+        # Run the background job inline
+        with mock.patch.object(image_derivatives.derivative_executor, 'submit', lambda fn, *args: fn(*args)), \
+                self.captureOnCommitCallbacks(execute=True):
+            clinic.save()
+
+        clinic.refresh_from_db()
+        variants = clinic.cover_image_variants
+        self.assertEqual(variants['source'], clinic.cover_image.name)
+        with default_storage.open(variants['thumb']) as handle, Image.open(handle) as thumb:
+            self.assertEqual((thumb.format, thumb.size, thumb.mode), ('WEBP', (128, 72), 'RGBA'))
+
+        with mock.patch.object(image_derivatives, 'get_signed_media_url', side_effect=lambda name: f'signed:{name}'):
+            urls = image_derivatives.variant_urls(clinic.cover_image, variants)
+        self.assertEqual(urls['small'], f"signed:{variants['small']}")
+        self.assertEqual(urls['original'], f'signed:{clinic.cover_image.name}')
+
+    def test_small_images_not_upscaled(self):
+        from utils.image_derivatives import render_derivatives
+        from PIL import Image
+        import io
+        rendered = render_derivatives(self._png((200, 100)))
+        with Image.open(io.BytesIO(rendered['medium'])) as image:
+            self.assertEqual(image.size, (200, 100))
+
+
+class CompressionMiddlewareTest(TestCase):
+    def _middleware(self, response):
+        from utils.middleware import CompressionMiddleware
+        return CompressionMiddleware(lambda request: response)
+
+    def _request(self, accept_encoding='gzip, deflate'):
+        from django.test import RequestFactory
+        return RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_compresses_large_json_only(self):
+        import gzip
+        from django.http import HttpResponse
+        body = b'{"data": [' + b'{"name": "Clinic", "city": "Metropolis"},' * 200 + b'{}]}'
+
+        response = self._middleware(HttpResponse(body, content_type='application/json'))(self._request())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), body)
+
+        small = self._middleware(HttpResponse(b'{}', content_type='application/json'))(self._request())
+        self.assertFalse(small.has_header('Content-Encoding'))
+        pdf = self._middleware(HttpResponse(body, content_type='application/pdf'))(self._request())
+        self.assertFalse(pdf.has_header('Content-Encoding'))
+        identity = self._middleware(HttpResponse(body, content_type='application/json'))(self._request('gzip;q=0'))
+        self.assertFalse(identity.has_header('Content-Encoding'))
+
+    def test_streaming_response_compressed_per_chunk(self):
+        import zlib
+        from django.http import StreamingHttpResponse
+        chunks = [b'{"row": %d},' % n * 50 for n in range(5)]
+
+        response = self._middleware(StreamingHttpResponse(iter(chunks), content_type='application/json'))(
+            self._request()
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        compressed = list(response.streaming_content)
+        self.assertEqual(len(compressed), len(chunks) + 1)
+        self.assertEqual(zlib.decompress(b''.join(compressed), 16 + zlib.MAX_WBITS), b''.join(chunks))
+
+
+class FastJSONTest(TestCase):
+    def _payload(self):
+        import datetime
+        import uuid
+        from decimal import Decimal
+        from django.utils.translation import gettext_lazy
+        return {
+            'fee': Decimal('499.50'),
+            'utc': datetime.datetime(2025, 1, 10, 9, 30, 15, 120000, tzinfo=datetime.timezone.utc),
+            'ist': datetime.datetime(2025, 1, 10, 9, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+            'date': datetime.date(2025, 1, 10),
+            'time': datetime.time(9, 30),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Clinic'),
+            'counts': {1: 'one'},
+            'text': 'Caf\u00e9 \u2028',
+            'big': 2 ** 70,
+        }
+
+    def test_renderer_matches_drf_json_renderer(self):
+        from unittest import mock
+        from rest_framework.renderers import JSONRenderer
+        from utils import fast_json
+        from utils.renderers import FastJSONRenderer
+
+        expected = JSONRenderer().render(self._payload())
+        self.assertEqual(FastJSONRenderer().render(self._payload()), expected)
+        with mock.patch.object(fast_json, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self._payload()), expected)
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        self.assertEqual(
+            FastJSONRenderer().render({'a': 1}, 'application/json; indent=2'),
+            JSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        )
+
+    def test_parser(self):
+        import io
+        from rest_framework.exceptions import ParseError
+        from utils.parsers import FastJSONParser
+
+        self.assertEqual(FastJSONParser().parse(io.BytesIO('{"name": "Café"}'.encode())), {'name': 'Café'})
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+    def test_group_message_frame_encoded_once(self):
+        from asgiref.sync import async_to_sync
+        from utils import event_bus, fast_json
+        from websockets.consumers import forward_group_message
+
+        message = event_bus.group_message('status_update_broadcast', {'fee': self._payload()['fee']}, 'status_update')
+        self.assertEqual(message['type'], 'status_update_broadcast')
+        self.assertEqual(fast_json.loads(message['text']), {'type': 'status_update', 'data': {'fee': 499.5}})
+
+        class Socket:
+            def __init__(self):
+                self.sent = []
+
+            async def send(self, text_data=None):
+                self.sent.append(text_data)
+
+        socket = Socket()
+        async_to_sync(forward_group_message)(socket, message, 'status_update')
+        # Messages from older senders still carry raw data
+        async_to_sync(forward_group_message)(socket, {'type': 'status_update', 'data': {'a': 1}}, 'status_update')
+        self.assertIs(socket.sent[0], message['text'])
+        self.assertEqual(fast_json.loads(socket.sent[1]), {'type': 'status_update', 'data': {'a': 1}})
@@ -5,5 +5,6 @@ app_name = 'utils'
 
 urlpatterns = [
     path('signed-url/', views.SignedUrlView.as_view(), name='signed-url'),
+    path('direct-uploads/', views.DirectUploadView.as_view(), name='direct-upload'),
     path('signature/', views.SignatureUploadView.as_view(), name='signature-upload'),
 ]
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from .signed_urls import get_signed_media_url
+from .direct_uploads import UPLOAD_TARGETS, DirectUploadError, confirm_direct_upload, create_direct_upload
 from django.utils import timezone
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
@@ -59,6 +60,66 @@ class SignedUrlView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class DirectUploadView(APIView):
+    """Issue presigned POSTs for uploading files straight to Digital Ocean"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'target': {'type': 'string', 'enum': list(UPLOAD_TARGETS)},
+                    'filename': {'type': 'string'},
+                    'content_type': {'type': 'string'},
+                    'size': {'type': 'integer', 'description': 'Exact file size in bytes'},
+                    'md5': {'type': 'string', 'description': 'Optional hex MD5, verified on confirm'}
+                },
+                'required': ['target', 'filename', 'content_type', 'size']
+            }
+        },
+        responses={200: dict},
+        description="Start a direct upload. POST the file to data.upload.url with data.upload.fields, "
+                    "then send data.upload_token in place of the file to the create endpoint."
+    )
+    def post(self, request):
+        """Create a presigned upload"""
+        try:
+            upload = create_direct_upload(
+                request.user,
+                request.data.get('target'),
+                request.data.get('filename', ''),
+                request.data.get('content_type', ''),
+                request.data.get('size'),
+                md5=request.data.get('md5')
+            )
+        except DirectUploadError as e:
+            return Response({
+                'success': False,
+                'error': {
+                    'code': e.code,
+                    'message': e.message
+                },
+                'timestamp': timezone.now().isoformat()
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': {
+                    'code': 'DIRECT_UPLOAD_ERROR',
+                    'message': f'Error creating upload: {str(e)}'
+                },
+                'timestamp': timezone.now().isoformat()
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'success': True,
+            'data': upload,
+            'message': 'Upload URL generated successfully',
+            'timestamp': timezone.now().isoformat()
+        }, status=status.HTTP_200_OK)
+
+
 class SignatureUploadView(APIView):
     """Upload signature files to Digital Ocean"""
     permission_classes = [permissions.IsAuthenticated]
@@ -126,7 +187,32 @@ class SignatureUploadView(APIView):
         """Upload signature file"""
         signature_file = request.FILES.get('signature')
         signature_type = request.data.get('type', 'doctor_signature')
-        
+        upload_token = request.data.get('upload_token')
+
+        if not signature_file and upload_token:
+            # Second phase of a direct upload: the file is already in Spaces
+            try:
+                upload = confirm_direct_upload(request.user, upload_token, 'signature')
+            except DirectUploadError as e:
+                return Response({
+                    'success': False,
+                    'error': {
+                        'code': e.code,
+                        'message': e.message
+                    },
+                    'timestamp': timezone.now().isoformat()
+                }, status=status.HTTP_400_BAD_REQUEST)
+            except Exception as e:
+                return Response({
+                    'success': False,
+                    'error': {
+                        'code': 'UPLOAD_ERROR',
+                        'message': f'Error confirming signature upload: {str(e)}'
+                    },
+                    'timestamp': timezone.now().isoformat()
+                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return self._register_signature(request, signature_type, str(upload), upload.original_name, upload.size)
+
         if not signature_file:
             return Response({
                 'success': False,
@@ -168,49 +254,8 @@ class SignatureUploadView(APIView):
             
             # Save file to Digital Ocean
             saved_path = default_storage.save(file_path, ContentFile(signature_file.read()))
-            
-            # Generate signed URL
-            signed_url = get_signed_media_url(saved_path)
-            
-            # Save signature information to DoctorSignature model if it's a doctor signature
-            if signature_type == 'doctor_signature':
-                try:
-                    from doctors.models import DoctorSignature
-                    # Get or create signature record for the doctor
-                    signature_record, created = DoctorSignature.objects.get_or_create(
-                        doctor=request.user,
-                        defaults={
-                            'signature_url': signed_url,
-                            'file_path': saved_path,
-                            'file_name': signature_file.name,
-                            'file_size': signature_file.size,
-                            'uploaded_by': request.user
-                        }
-                    )
-                    
-                    # Update if record already exists
-                    if not created:
-                        signature_record.signature_url = signed_url
-                        signature_record.file_path = saved_path
-                        signature_record.file_name = signature_file.name
-                        signature_record.file_size = signature_file.size
-                        signature_record.uploaded_by = request.user
-                        signature_record.is_active = True
-                        signature_record.save()
-                        
-                except Exception as e:
-                    print(f"Error saving signature record: {e}")
-            
-            return Response({
-                'success': True,
-                'data': {
-                    'url': signed_url,
-                    'file_path': saved_path
-                },
-                'message': 'Signature uploaded successfully',
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_200_OK)
-            
+            return self._register_signature(request, signature_type, saved_path, signature_file.name, signature_file.size)
+
         except Exception as e:
             return Response({
                 'success': False,
@@ -220,3 +265,47 @@ class SignatureUploadView(APIView):
                 },
                 'timestamp': timezone.now().isoformat()
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _register_signature(self, request, signature_type, saved_path, file_name, file_size):
+        """Record an uploaded signature and return the success response"""
+        # Generate signed URL
+        signed_url = get_signed_media_url(saved_path)
+
+        # Save signature information to DoctorSignature model if it's a doctor signature
+        if signature_type == 'doctor_signature':
+            try:
+                from doctors.models import DoctorSignature
+                # Get or create signature record for the doctor
+                signature_record, created = DoctorSignature.objects.get_or_create(
+                    doctor=request.user,
+                    defaults={
+                        'signature_url': signed_url,
+                        'file_path': saved_path,
+                        'file_name': file_name,
+                        'file_size': file_size,
+                        'uploaded_by': request.user
+                    }
+                )
+
+                # Update if record already exists
+                if not created:
+                    signature_record.signature_url = signed_url
+                    signature_record.file_path = saved_path
+                    signature_record.file_name = file_name
+                    signature_record.file_size = file_size
+                    signature_record.uploaded_by = request.user
+                    signature_record.is_active = True
+                    signature_record.save()
+
+            except Exception as e:
+                print(f"Error saving signature record: {e}")
+
+        return Response({
+            'success': True,
+            'data': {
+                'url': signed_url,
+                'file_path': saved_path
+            },
+            'message': 'Signature uploaded successfully',
+            'timestamp': timezone.now().isoformat()
+        }, status=status.HTTP_200_OK)
@@ -6,9 +6,23 @@ from django.contrib.auth.models import AnonymousUser
 from django.utils import timezone
 from doctors.models import DoctorStatus
 from authentication.models import User
+from authentication.authentication import get_user_from_access_token
+from utils.image_derivatives import variant_url
+from consultations.groups import subscription_groups
+from consultations.realtime import InvalidCursor, doctor_changes, doctor_snapshot
+from utils import event_bus, fast_json
 
 logger = logging.getLogger(__name__)
 
+
+async def forward_group_message(consumer, event, frame_type, field='data'):
+    """Send a group event to the socket, reusing its pre-encoded frame if it has one"""
+    text = event.get('text')
+    if text is None:
+        text = fast_json.dumps({'type': frame_type, 'data': event[field]})
+    await consumer.send(text_data=text)
+
+
 class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for direct communication between doctors and SuperAdmin
@@ -47,7 +61,7 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
         try:
-            data = json.loads(text_data)
+            data = fast_json.loads(text_data)
             message_type = data.get('type')
             
             if message_type == 'auth':
@@ -66,19 +80,19 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
                 # Simple heartbeat to keep connection alive
                 await self.handle_heartbeat()
             else:
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'error',
                     'message': 'Unknown message type'
                 }))
                 
         except json.JSONDecodeError:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Invalid JSON format'
             }))
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Internal server error'
             }))
@@ -88,7 +102,7 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
         token = data.get('token')
         if not token:
             logger.warning("WebSocket authentication failed: No token provided")
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'auth_error',
                 'message': 'No authentication token provided'
             }))
@@ -106,7 +120,7 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
                     await self.mark_doctor_online()
                     logger.info(f"👨‍⚕️ Doctor {user.name} marked as online via WebSocket")
                 
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'auth_success',
                     'message': 'Authentication successful',
                     'user_role': user.role
@@ -114,13 +128,13 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
                 logger.info(f"✅ Doctor-SuperAdmin WebSocket authenticated for user: {user.id}")
             else:
                 logger.warning("WebSocket authentication failed: Invalid token")
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'auth_error',
                     'message': 'Invalid authentication token'
                 }))
         except Exception as e:
             logger.error(f"❌ WebSocket authentication error: {e}")
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'auth_error',
                 'message': 'Authentication failed'
             }))
@@ -128,7 +142,7 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
     async def handle_doctor_status_update(self, data):
         """Handle doctor status update requests"""
         if not await self.is_doctor():
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Only doctors can update status'
             }))
@@ -141,19 +155,16 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
             # Broadcast the update to all connected clients
             await self.channel_layer.group_send(
                 "doctor_superadmin_communication",
-                {
-                    'type': 'status_update_broadcast',
-                    'data': updated_status
-                }
+                event_bus.group_message('status_update_broadcast', updated_status, 'status_update')
             )
             
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'status_update_success',
                 'message': 'Status updated successfully'
             }))
                 
         except Exception as e:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': f'Failed to update status: {str(e)}'
             }))
@@ -161,7 +172,7 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
     async def handle_superadmin_request(self, data):
         """Handle SuperAdmin requests to doctors"""
         if not await self.is_superadmin():
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Only SuperAdmin can send requests'
             }))
@@ -176,25 +187,22 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
             # Broadcast the request to all connected doctors
             await self.channel_layer.group_send(
                 "doctor_superadmin_communication",
-                {
-                    'type': 'superadmin_request_broadcast',
-                    'data': {
-                        'from_superadmin': self.user.id,
-                        'target_doctor_id': target_doctor_id,
-                        'request_type': request_type,
-                        'message': message,
-                        'timestamp': timezone.now().isoformat()
-                    }
-                }
+                event_bus.group_message('superadmin_request_broadcast', {
+                    'from_superadmin': self.user.id,
+                    'target_doctor_id': target_doctor_id,
+                    'request_type': request_type,
+                    'message': message,
+                    'timestamp': timezone.now().isoformat()
+                }, 'superadmin_request')
             )
             
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'request_sent_success',
                 'message': 'Request sent successfully'
             }))
                 
         except Exception as e:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': f'Failed to send request: {str(e)}'
             }))
@@ -202,7 +210,7 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
     async def handle_doctor_response(self, data):
         """Handle doctor responses to SuperAdmin"""
         if not await self.is_doctor():
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Only doctors can send responses'
             }))
@@ -217,26 +225,23 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
             # Broadcast the response to all connected SuperAdmins
             await self.channel_layer.group_send(
                 "doctor_superadmin_communication",
-                {
-                    'type': 'doctor_response_broadcast',
-                    'data': {
-                        'from_doctor': self.user.id,
-                        'doctor_name': self.user.name,
-                        'request_id': request_id,
-                        'response_type': response_type,
-                        'message': message,
-                        'timestamp': timezone.now().isoformat()
-                    }
-                }
+                event_bus.group_message('doctor_response_broadcast', {
+                    'from_doctor': self.user.id,
+                    'doctor_name': self.user.name,
+                    'request_id': request_id,
+                    'response_type': response_type,
+                    'message': message,
+                    'timestamp': timezone.now().isoformat()
+                }, 'doctor_response')
             )
             
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'response_sent_success',
                 'message': 'Response sent successfully'
             }))
                 
         except Exception as e:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': f'Failed to send response: {str(e)}'
             }))
@@ -246,7 +251,7 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
         if await self.is_doctor():
             await self.update_doctor_activity()
         
-        await self.send(json.dumps({
+        await self.send(fast_json.dumps({
             'type': 'heartbeat_response',
             'timestamp': timezone.now().isoformat()
         }))
@@ -254,42 +259,23 @@ class DoctorSuperAdminConsumer(AsyncWebsocketConsumer):
     # Broadcast message handlers
     async def status_update_broadcast(self, event):
         """Broadcast status update to all connected clients"""
-        await self.send(json.dumps({
-            'type': 'status_update',
-            'data': event['data']
-        }))
+        await forward_group_message(self, event, 'status_update')
 
     async def superadmin_request_broadcast(self, event):
         """Broadcast SuperAdmin request to all connected clients"""
-        await self.send(json.dumps({
-            'type': 'superadmin_request',
-            'data': event['data']
-        }))
+        await forward_group_message(self, event, 'superadmin_request')
 
     async def doctor_response_broadcast(self, event):
         """Broadcast doctor response to all connected clients"""
-        await self.send(json.dumps({
-            'type': 'doctor_response',
-            'data': event['data']
-        }))
+        await forward_group_message(self, event, 'doctor_response')
 
     # Database operations
     @database_sync_to_async
     def verify_token(self, token):
         """Verify JWT token and return user"""
         try:
-            from rest_framework_simplejwt.tokens import AccessToken
-            from django.contrib.auth import get_user_model
-            
-            User = get_user_model()
-            
-            # Decode the token
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            
-            # Get the user
-            user = User.objects.get(id=user_id)
-            return user
+            # Resolved through the principal cache, so no query on a hit
+            return get_user_from_access_token(token)
         except Exception as e:
             logger.error(f"Token verification error: {e}")
             return None
@@ -429,7 +415,7 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
         try:
-            data = json.loads(text_data)
+            data = fast_json.loads(text_data)
             message_type = data.get('type')
             
             if message_type == 'auth':
@@ -441,24 +427,24 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
                 # Update doctor activity when ping is received
                 if await self.is_doctor():
                     await self.update_doctor_activity()
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'pong',
                     'timestamp': timezone.now().isoformat()
                 }))
             else:
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'error',
                     'message': 'Unknown message type'
                 }))
                 
         except json.JSONDecodeError:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Invalid JSON format'
             }))
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Internal server error'
             }))
@@ -467,7 +453,7 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
         """Handle authentication message"""
         token = data.get('token')
         if not token:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'No authentication token provided'
             }))
@@ -483,19 +469,19 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
                 if await self.is_doctor():
                     await self.mark_doctor_online()
                 
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'auth_success',
                     'message': 'Authentication successful'
                 }))
                 logger.info(f"WebSocket authenticated for user: {user.id}")
             else:
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'auth_error',
                     'message': 'Invalid authentication token'
                 }))
         except Exception as e:
             logger.error(f"Authentication error: {e}")
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'auth_error',
                 'message': 'Authentication failed'
             }))
@@ -503,7 +489,7 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
     async def handle_status_update(self, data):
         """Handle doctor status update requests"""
         if not await self.is_doctor():
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Only doctors can update status'
             }))
@@ -516,31 +502,25 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
             # Broadcast the update to all connected clients
             await self.channel_layer.group_send(
                 "doctor_status_updates",
-                {
-                    'type': 'status_update',
-                    'data': updated_status
-                }
+                event_bus.group_message('status_update', updated_status)
             )
             
         except Exception as e:
             logger.error(f"Error updating doctor status: {e}")
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Failed to update status'
             }))
     
     async def status_update(self, event):
         """Send status update to WebSocket"""
-        await self.send(json.dumps({
-            'type': 'status_update',
-            'data': event['data']
-        }))
+        await forward_group_message(self, event, 'status_update')
     
     async def send_initial_status(self):
         """Send initial doctor status data"""
         try:
             statuses = await self.get_all_doctor_statuses()
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'initial_status',
                 'data': statuses
             }))
@@ -636,18 +616,8 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
     def verify_token(self, token):
         """Verify JWT token and return user"""
         try:
-            from rest_framework_simplejwt.tokens import AccessToken
-            from django.contrib.auth import get_user_model
-            
-            User = get_user_model()
-            
-            # Decode the token
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            
-            # Get the user
-            user = User.objects.get(id=user_id)
-            return user
+            # Resolved through the principal cache, so no query on a hit
+            return get_user_from_access_token(token)
         except Exception as e:
             logger.error(f"Token verification error: {e}")
             return None
@@ -678,6 +648,9 @@ class DoctorStatusConsumer(AsyncWebsocketConsumer):
             'doctor_email': status.doctor.user.email,
             'doctor_specialization': status.doctor.specialization,
             'doctor_profile_picture': status.doctor.user.profile_picture.url if status.doctor.user.profile_picture else None,
+            'doctor_profile_picture_thumb': variant_url(
+                status.doctor.user.profile_picture, status.doctor.user.profile_picture_variants, 'thumb'
+            ),
             'is_online': status.is_online,
             'is_logged_in': status.is_logged_in,
             'is_available': status.is_available,
@@ -733,32 +706,29 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
         try:
-            data = json.loads(text_data)
+            data = fast_json.loads(text_data)
             message_type = data.get('type')
             
             if message_type == 'ping':
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'pong',
                     'timestamp': timezone.now().isoformat()
                 }))
             else:
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'error',
                     'message': 'Unknown message type'
                 }))
                 
         except json.JSONDecodeError:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Invalid JSON format'
             }))
     
     async def notification_message(self, event):
         """Send notification to WebSocket"""
-        await self.send(json.dumps({
-            'type': 'notification',
-            'data': event['data']
-        }))
+        await forward_group_message(self, event, 'notification')
 
 
 class ConsultationConsumer(AsyncWebsocketConsumer):
@@ -774,49 +744,79 @@ class ConsultationConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
-        # Join consultation updates group
-        await self.channel_layer.group_add(
-            "consultation_updates",
-            self.channel_name
-        )
+        # Join only the groups this user may see (own, clinic or platform-wide)
+        self.groups_joined = await self.get_subscription_groups()
+        for group in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
         
         await self.accept()
-        logger.info(f"Consultation WebSocket connected for user: {self.user.id}")
+        logger.info(f"Consultation WebSocket connected for user: {self.user.id} ({', '.join(self.groups_joined) or 'no groups'})")
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
-        await self.channel_layer.group_discard(
-            "consultation_updates",
-            self.channel_name
-        )
+        for group in getattr(self, 'groups_joined', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
         logger.info(f"Consultation WebSocket disconnected for user: {self.user.id}")
     
+    @database_sync_to_async
+    def get_subscription_groups(self):
+        return subscription_groups(self.user)
+    
+    @database_sync_to_async
+    def get_snapshot(self):
+        return doctor_snapshot(self.user) if self.user.role == 'doctor' else None
+    
+    @database_sync_to_async
+    def get_changes(self, since):
+        return doctor_changes(self.user, since) if self.user.role == 'doctor' else None
+    
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
         try:
-            data = json.loads(text_data)
+            data = fast_json.loads(text_data)
             message_type = data.get('type')
             
             if message_type == 'ping':
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'pong',
                     'timestamp': timezone.now().isoformat()
                 }))
+            elif message_type == 'snapshot':
+                # Initial dashboard state; changes then arrive as consultation_update events
+                await self.send(fast_json.dumps({
+                    'type': 'snapshot',
+                    'data': await self.get_snapshot()
+                }))
+            elif message_type == 'sync':
+                # Catch up after a reconnect with the last cursor seen
+                try:
+                    changes = await self.get_changes(data.get('since'))
+                except InvalidCursor as e:
+                    await self.send(fast_json.dumps({
+                        'type': 'error',
+                        'message': str(e)
+                    }))
+                    return
+                await self.send(fast_json.dumps({
+                    'type': 'changes',
+                    'data': changes
+                }))
             else:
-                await self.send(json.dumps({
+                await self.send(fast_json.dumps({
                     'type': 'error',
                     'message': 'Unknown message type'
                 }))
                 
         except json.JSONDecodeError:
-            await self.send(json.dumps({
+            await self.send(fast_json.dumps({
                 'type': 'error',
                 'message': 'Invalid JSON format'
             }))
     
     async def consultation_update(self, event):
         """Send consultation update to WebSocket"""
-        await self.send(json.dumps({
-            'type': 'consultation_update',
-            'data': event['data']
-        })) 
\ No newline at end of file
+        await forward_group_message(self, event, 'consultation_update')
+    
+    async def consultation_notification(self, event):
+        """Forward a consultation signal event (see consultations/signals.py)"""
+        await forward_group_message(self, event, 'consultation_update', field='message')
@@ -1,10 +1,7 @@
-import json
-import jwt
 from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from django.conf import settings
-from authentication.models import User
+from authentication.authentication import get_user_from_access_token
 
 class WebSocketAuthMiddleware(BaseMiddleware):
     """
@@ -14,7 +11,7 @@ class WebSocketAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
         # Get the token from query parameters
         query_string = scope.get('query_string', b'').decode()
-        query_params = dict(x.split('=') for x in query_string.split('&') if x)
+        query_params = dict(x.split('=', 1) for x in query_string.split('&') if '=' in x)
         token = query_params.get('token', '')
         
         if token:
@@ -27,16 +24,5 @@ class WebSocketAuthMiddleware(BaseMiddleware):
     
     @database_sync_to_async
     def get_user_from_token(self, token):
-        """Get user from JWT token"""
-        try:
-            # Decode the JWT token
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = payload.get('user_id')
-            
-            if user_id:
-                return User.objects.get(id=user_id)
-            else:
-                return AnonymousUser()
-                
-        except (jwt.InvalidTokenError, User.DoesNotExist):
-            return AnonymousUser() 
\ No newline at end of file
+        """Get user from JWT token (served from the principal cache)"""
+        return get_user_from_access_token(token) or AnonymousUser()